@@ -0,0 +1,108 @@
+"""
+Benchmark of JSON responses with FastJSONProvider and compression
+
+Builds session payloads like the transcription routes return (a full
+transcript, its segments and 30 up-sots) and reports the time jsonify()
+takes with Flask's default provider and with FastJSONProvider, then the
+size on the wire and the time of a request through init_compression()
+for identity, gzip and (when Brotli is installed) br.
+
+Run from the repository root:
+    python benchmarks/bench_json_compression.py [segment counts...]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the routes package sets up the audio library; keep its
+# background transcoding and storage collection idle
+os.environ.setdefault("TRANSCODE_ENABLED", "false")
+os.environ.setdefault("STORAGE_GC_ENABLED", "false")
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from src.routes.api import compression
+from src.routes.api.compression import init_compression
+from src.routes.api.json_provider import FastJSONProvider, orjson
+
+WORDS = "the mayor budget council road school tax vote park water city plan meeting report a of to in".split()
+UP_SOTS = 30
+REPEATS = 20
+
+
+def make_payload(count, seed=1):
+    """
+    Build a session payload with count segments
+    """
+    rng = random.Random(seed)
+    segments = []
+    for i in range(count):
+        start = i * 4000
+        segments.append({
+            "timecode": "%02d:%02d:%02d" % (start // 3600000, start // 60000 % 60, start // 1000 % 60),
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))),
+            "start_ms": start,
+            "end_ms": start + 3900,
+            "duration_ms": 3900,
+            "relevance_score": rng.random()
+        })
+    return {
+        "success": True,
+        "session_id": "bench",
+        "segments_count": count,
+        "up_sots_count": UP_SOTS,
+        "up_sots": segments[:UP_SOTS],
+        "full_transcript": " ".join(segment["text"] for segment in segments),
+        "transcription": {"segments": segments}
+    }
+
+
+def timed(func, repeats=REPEATS):
+    """
+    Average wall time of a call in milliseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main(counts):
+    app = Flask(__name__)
+    init_compression(app)
+    payloads = {count: make_payload(count) for count in counts}
+
+    @app.route("/payload/<int:count>")
+    def payload(count):
+        return jsonify(payloads[count])
+
+    providers = {"stdlib": DefaultJSONProvider(app), "fast": FastJSONProvider(app)}
+    encodings = ["identity", "gzip", "br"] if compression.brotli else ["identity", "gzip"]
+    print(f"orjson {'installed' if orjson else 'missing'}, brotli {'installed' if compression.brotli else 'missing'}")
+
+    for count, data in payloads.items():
+        bodies = {}
+        for name, provider in providers.items():
+            app.json = provider
+            with app.test_request_context():
+                bodies[name] = jsonify(data).get_data()
+                elapsed = timed(lambda: jsonify(data).get_data())
+            print(f"{count:>6} segments  serialize {name:<7} {elapsed:>7.2f}ms {len(bodies[name]) / 1000:>8.0f} KB")
+        assert json.loads(bodies["fast"]) == json.loads(bodies["stdlib"])
+
+        client = app.test_client()
+        for encoding in encodings:
+            headers = {"Accept-Encoding": encoding}
+            size = len(client.get(f"/payload/{count}", headers=headers).data)
+            elapsed = timed(lambda: client.get(f"/payload/{count}", headers=headers))
+            print(f"{count:>6} segments  request   {encoding:<7} {elapsed:>7.2f}ms {size / 1000:>8.0f} KB")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [900, 2700])
@@ -0,0 +1,108 @@
+"""
+Benchmark of PDF transcript rendering
+
+Renders transcripts of 100, 1k and 10k segments with PdfWriter and
+reports the wall time and the peak memory traced while rendering. Time
+is measured in a run without tracemalloc, which slows fpdf2 several
+times over. Pass --legacy to also time the multi_cell writer PdfWriter
+replaced (about ten seconds at 10k segments, and much longer traced).
+
+Run from the repository root:
+    python benchmarks/bench_pdf_writer.py [--legacy] [segment counts...]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF
+
+from src.models.transcription.output_generator import OutputGenerator
+from src.models.transcription.output_writers import OutputWriter, register_writer
+
+
+@register_writer("pdf_multicell")
+class MultiCellPdfWriter(OutputWriter):
+    """
+    The PDF writer as it was before PdfWriter's own line layout
+    """
+
+    extension = "multicell.pdf"
+    mimetype = "application/pdf"
+    slow = True
+    streamable = False
+
+    def begin(self):
+        self.pdf = FPDF()
+        self.pdf.add_page()
+        self.pdf.set_font("helvetica", 'B', 16)
+        self.pdf.cell(0, 10, "TRANSCRIPT WITH TIMECODES", new_x="LMARGIN", new_y="NEXT", align='C')
+        self.pdf.ln(5)
+        return b""
+
+    def write(self, cue):
+        self.pdf.set_font("helvetica", 'B', 12)
+        self.pdf.cell(0, 10, f"[{cue.timecode}]", new_x="LMARGIN", new_y="NEXT")
+        self.pdf.set_font("helvetica", size=12)
+        self.pdf.multi_cell(0, 10, cue.text)
+        self.pdf.ln(5)
+        return b""
+
+    def end(self):
+        return bytes(self.pdf.output())
+
+
+def make_segments(count):
+    """
+    Build a transcript whose segments wrap over a few lines each
+    """
+    return [{
+        "timecode": "00:00:00",
+        "text": ("The mayor said the budget for next year would rise by %d percent, "
+                 "and the council agreed. " % i) * 2,
+        "start_ms": i * 3000,
+        "end_ms": i * 3000 + 2500
+    } for i in range(count)]
+
+
+def measure(generator, fmt, segments):
+    """
+    Render once for time and once under tracemalloc for peak memory
+    """
+    start = time.perf_counter()
+    result = generator.render(segments, "interview.wav", [fmt], "bench")[fmt]
+    elapsed = time.perf_counter() - start
+    assert result["success"], result.get("error")
+
+    tracemalloc.start()
+    generator.render(segments, "interview.wav", [fmt], "bench")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak, os.path.getsize(result["file_path"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("counts", nargs="*", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--legacy", action="store_true", help="also render with the multi_cell writer")
+    args = parser.parse_args()
+
+    generator = OutputGenerator(tempfile.mkdtemp())
+    formats = ["pdf", "pdf_multicell"] if args.legacy else ["pdf"]
+
+    print(f"{'segments':>9} {'writer':<14} {'time':>9} {'peak':>10} {'size':>10}")
+    for count in args.counts:
+        segments = make_segments(count)
+        for fmt in formats:
+            elapsed, peak, size = measure(generator, fmt, segments)
+            print(f"{count:>9} {fmt:<14} {elapsed:>8.2f}s {peak / 1e6:>8.1f}MB {size / 1e6:>8.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
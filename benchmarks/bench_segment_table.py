@@ -0,0 +1,126 @@
+"""
+Benchmark of up-sot selection with segment dicts and with SegmentTable
+
+Compares the original list-of-dicts get_up_sots() with the current one,
+given lists (a table is built on every call) and given a table built
+once, as cached per session by the transcription routes. Also reports
+the memory taken per segment by dicts and by a table.
+
+Run from the repository root:
+    python benchmarks/bench_segment_table.py [segment counts...]
+"""
+
+import os
+import re
+import json
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.transcription.audio_processor import AudioProcessor
+from src.models.transcription.segment_table import SegmentTable
+
+WORDS = "the mayor budget council road school tax vote park water city plan meeting report a of to in".split()
+SCRIPT = "mayor budget tax vote"
+REPEATS = 5
+
+
+def make_segments(count, seed=1):
+    """
+    Build a transcript of random segments
+    """
+    rng = random.Random(seed)
+    segments = []
+    t = 0
+    for _ in range(count):
+        duration = rng.randint(200, 6000)
+        start = t
+        t += duration + rng.randint(0, 800)
+        segments.append({
+            "timecode": "%02d:%02d:%02d" % (start // 3600000, start // 60000 % 60, start // 1000 % 60),
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 20))),
+            "start_ms": start,
+            "end_ms": start + duration,
+            "duration_ms": duration
+        })
+    return segments
+
+
+def legacy_up_sots(segments, max_count=10, sensitivity=0.5, sort_by_relevance=False, reference_script=None):
+    """
+    get_up_sots() as it was before SegmentTable
+    """
+    min_duration_ms = 1000 * (1.0 - sensitivity)
+    filtered = [segment for segment in segments if segment["duration_ms"] >= min_duration_ms]
+    if reference_script and sort_by_relevance:
+        script_words = set(re.findall(r'\b\w+\b', reference_script.lower()))
+        for segment in filtered:
+            words = set(re.findall(r'\b\w+\b', segment["text"].lower()))
+            segment["relevance_score"] = len(script_words & words) / len(script_words | words) if script_words and words else 0
+        filtered.sort(key=lambda x: x["relevance_score"], reverse=True)
+    else:
+        filtered.sort(key=lambda x: x["start_ms"])
+    return filtered[:max_count] if max_count > 0 else filtered
+
+
+def timed(func, repeats=REPEATS):
+    """
+    Average wall time of a call in milliseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def traced_bytes(func):
+    """
+    Bytes still allocated by func's result
+    """
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(counts):
+    processor = AudioProcessor(tempfile.mkdtemp())
+    cases = {
+        "chronological": {"max_count": 10, "sensitivity": 0.5},
+        "relevance": {"max_count": 10, "sensitivity": 0.5, "sort_by_relevance": True, "reference_script": SCRIPT}
+    }
+
+    print(f"{'segments':>9} {'order':<14} {'legacy':>10} {'list':>10} {'table':>10} {'build':>10}")
+    for count in counts:
+        segments = make_segments(count)
+        build_ms = timed(lambda: SegmentTable.from_segments(segments))
+        table = SegmentTable.from_segments(segments)
+
+        for name, kwargs in cases.items():
+            expected = legacy_up_sots([dict(segment) for segment in segments], **kwargs)
+            assert processor.get_up_sots(segments, **kwargs) == expected
+            assert processor.get_up_sots(table, **kwargs) == expected
+
+            # Legacy scoring writes into the dicts, so it gets fresh copies as a
+            # session loaded from storage would
+            copies = [[dict(segment) for segment in segments] for _ in range(REPEATS)]
+            legacy_ms = timed(lambda: legacy_up_sots(copies.pop(), **kwargs))
+            list_ms = timed(lambda: processor.get_up_sots(segments, **kwargs))
+            table_ms = timed(lambda: processor.get_up_sots(table, **kwargs))
+            print(f"{count:>9} {name:<14} {legacy_ms:>8.2f}ms {list_ms:>8.2f}ms {table_ms:>8.2f}ms {build_ms:>8.2f}ms")
+
+        # Dicts as decoded from a stored session, each with its own strings
+        encoded = json.dumps(segments)
+        dict_bytes = traced_bytes(lambda: json.loads(encoded))
+        table_bytes = traced_bytes(lambda: SegmentTable.from_segments(segments))
+        print(f"{count:>9} memory per segment: dicts {dict_bytes / count:.0f} B, table {table_bytes / count:.0f} B")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 20000])
@@ -0,0 +1,90 @@
+"""
+Benchmark of transcript parsing for /extract
+
+Compares the regex /extract used before TranscriptParser with
+parse_transcript() given the transcript as one string, as a JSON body
+is, and in 64 KiB chunks, as a text/plain body is read. Reports the
+best of several runs on transcripts of 1 MB and 10 MB by default.
+
+Run from the repository root:
+    python benchmarks/bench_transcript_parser.py [sizes in MB...]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.transcription.transcript_parser import parse_transcript
+
+WORDS = "the mayor budget council road school tax vote at 10 am 123:45 a of to in".split()
+CHUNK_SIZE = 64 * 1024
+REPEATS = 10
+
+LEGACY_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2}|\d{2}:\d{2})\s+(.*?)(?=\s+\d{2}:\d{2}|\s*$)')
+
+
+def make_transcript(size, seed=1):
+    """
+    Build a transcript of about size characters, one segment per line
+    """
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    seconds = 0
+    while length < size:
+        timecode = "%02d:%02d:%02d" % (seconds // 3600 % 100, seconds // 60 % 60, seconds % 60)
+        line = timecode + " " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+        lines.append(line)
+        length += len(line) + 1
+        seconds += rng.randint(1, 6)
+    return "\n".join(lines)
+
+
+def legacy_extract(transcript):
+    """
+    Segments as /extract found them before TranscriptParser
+    """
+    segments = []
+    for match in LEGACY_PATTERN.finditer(transcript):
+        text = match.group(2).strip()
+        if text:
+            segments.append({'timecode': match.group(1), 'text': text, 'relevance': 1.0})
+    return segments
+
+
+def best_ms(func, repeats=REPEATS):
+    """
+    Shortest wall time of a call in milliseconds
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main(sizes):
+    print(f"{'size':>6} {'segments':>9} {'legacy':>10} {'string':>10} {'chunks':>10}")
+    for size in sizes:
+        transcript = make_transcript(int(size * 1e6))
+        chunks = [transcript[i:i + CHUNK_SIZE] for i in range(0, len(transcript), CHUNK_SIZE)]
+
+        expected = [(segment['timecode'], segment['text']) for segment in legacy_extract(transcript)]
+        segments = list(parse_transcript(transcript))
+        assert [(segment['timecode'], segment['text']) for segment in segments] == expected
+        assert list(parse_transcript(chunks)) == segments
+
+        legacy_ms = best_ms(lambda: legacy_extract(transcript))
+        string_ms = best_ms(lambda: list(parse_transcript(transcript)))
+        chunks_ms = best_ms(lambda: list(parse_transcript(chunks)))
+        print(f"{size:>4g}MB {len(segments):>9} {legacy_ms:>8.1f}ms {string_ms:>8.1f}ms {chunks_ms:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main([float(arg) for arg in sys.argv[1:]] or [1, 10])
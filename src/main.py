@@ -7,13 +7,25 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from src.models.user import db
 from src.routes.api import api_bp
+from src.routes.api.json_provider import FastJSONProvider
+from src.routes.api.compression import init_compression
+from src.routes.static_assets import StaticAssets
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
+# Serialize JSON with orjson when available and compress large responses
+app.json = FastJSONProvider(app)
+init_compression(app)
+
+# Serve static files from a manifest built at startup, with fingerprinted
+# URLs cached for good and precompressed text assets
+static_assets = StaticAssets(app.static_folder, app.static_url_path)
+app.view_functions['static'] = static_assets.send_static
+
 # Register API blueprint
 app.register_blueprint(api_bp, url_prefix='/api')
 
@@ -47,14 +59,16 @@ def serve(path):
     if static_folder_path is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+    if path != "":
+        response = static_assets.response(path)
+        if response is not None:
+            return response
+
+    response = static_assets.response('index.html')
+    if response is not None:
+        return response
     else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+        return "index.html not found", 404
 
 
 if __name__ == '__main__':
@@ -0,0 +1,138 @@
+"""
+Audio Probe Module for the Retro Transcription Web Tool
+Reads duration and format details of audio files without decoding them
+"""
+
+import os
+import struct
+from pydub.utils import mediainfo
+
+# WAVE format tags
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Data chunk size written by recorders that stream without seeking back
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def probe_wav(path):
+    """
+    Read format and duration from a WAV header
+
+    Only the chunk headers are read; the sample data is skipped over, so
+    the cost does not depend on the length of the recording.
+
+    Args:
+        path (str): Path to a RIFF/WAVE file
+
+    Returns:
+        dict: duration_ms, sample_rate, channels, bits_per_sample and codec,
+            or None if the file is not a WAV this parser understands
+    """
+    file_size = os.path.getsize(path)
+
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            return None
+
+        fmt = None
+        data_size = None
+
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    return None
+                fmt = struct.unpack('<HHIIHH', body[:16])
+                if fmt[0] == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # The real format tag is the first field of the sub-format GUID
+                    fmt = (struct.unpack('<H', body[24:26])[0],) + fmt[1:]
+            elif chunk_id == b'data':
+                data_start = f.tell()
+                if chunk_size == _UNKNOWN_SIZE or data_start + chunk_size > file_size:
+                    # Streamed or truncated file: the data runs to the end
+                    chunk_size = file_size - data_start
+                data_size = chunk_size
+                if fmt is not None:
+                    break
+                f.seek(chunk_size, os.SEEK_CUR)
+            else:
+                f.seek(chunk_size, os.SEEK_CUR)
+
+            # Chunks are word aligned
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+
+    if fmt is None or data_size is None:
+        return None
+
+    format_tag, channels, sample_rate, byte_rate, _, bits_per_sample = fmt
+    if not byte_rate:
+        return None
+
+    if format_tag == WAVE_FORMAT_PCM:
+        codec = f"pcm_s{bits_per_sample}le" if bits_per_sample > 8 else "pcm_u8"
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        codec = f"pcm_f{bits_per_sample}le"
+    else:
+        codec = f"wav_0x{format_tag:04x}"
+
+    return {
+        "duration_ms": data_size * 1000 // byte_rate,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bits_per_sample": bits_per_sample,
+        "audio_codec": codec
+    }
+
+
+def probe_audio(path):
+    """
+    Get duration and format details of an audio file
+
+    WAV files are read from their header. Other formats are probed with
+    ffprobe through pydub, which reads the container metadata rather than
+    decoding the audio.
+
+    Args:
+        path (str): Path to the audio file
+
+    Returns:
+        dict: duration_ms, sample_rate, channels, bits_per_sample and
+            audio_codec (values are None when they cannot be determined)
+    """
+    info = probe_wav(path)
+    if info is not None:
+        return info
+
+    try:
+        details = mediainfo(path)
+    except Exception:
+        details = {}
+
+    def to_int(value):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+    duration = details.get("duration")
+    try:
+        duration_ms = int(float(duration) * 1000) if duration not in (None, "", "N/A") else None
+    except ValueError:
+        duration_ms = None
+
+    return {
+        "duration_ms": duration_ms,
+        "sample_rate": to_int(details.get("sample_rate")),
+        "channels": to_int(details.get("channels")),
+        "bits_per_sample": to_int(details.get("bits_per_sample")) or None,
+        "audio_codec": details.get("codec_name")
+    }
@@ -7,12 +7,15 @@ import os
 import json
 import time
 import tempfile
+import uuid
 from datetime import datetime
 import speech_recognition as sr
 from pydub import AudioSegment
 from pydub.silence import split_on_silence, detect_nonsilent
 import numpy as np
 
+from src.models.transcription.segment_table import SegmentTable
+
 class AudioProcessor:
     """
     Handles audio processing and transcription for the web application
@@ -49,13 +52,18 @@ class AudioProcessor:
             str: Path to the saved audio file
         """
         if not filename:
+            # Unique per call: uploads in the same second must not share a file
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"recording_{timestamp}.wav"
+            filename = f"recording_{timestamp}_{uuid.uuid4().hex}.wav"
         
         file_path = os.path.join(self.upload_folder, filename)
         
-        with open(file_path, 'wb') as f:
+        # Write to a new inode and swap it in, so a library recording
+        # hardlinked to an earlier upload of the same name is never overwritten
+        part_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        with open(part_path, 'wb') as f:
             f.write(audio_data)
+        os.replace(part_path, file_path)
         
         return file_path
     
@@ -87,12 +95,15 @@ class AudioProcessor:
             # Process each chunk
             transcript_segments = []
             
+            # Chunk files are unique per call so transcriptions can run concurrently
+            chunk_prefix = uuid.uuid4().hex
+            
             for i, (start_ms, end_ms) in enumerate(non_silent_ranges):
                 # Extract chunk
                 chunk = audio[start_ms:end_ms]
                 
                 # Convert to proper format for recognition
-                chunk_file = os.path.join(self.upload_folder, f"temp_chunk_{i}.wav")
+                chunk_file = os.path.join(self.upload_folder, f"temp_chunk_{chunk_prefix}_{i}.wav")
                 chunk.export(chunk_file, format="wav")
                 
                 # Transcribe chunk
@@ -142,7 +153,7 @@ class AudioProcessor:
         Get the most important segments as 'up-sots'
         
         Args:
-            segments (list): List of transcript segments
+            segments (list or SegmentTable): Transcript segments
             max_count (int): Maximum number of up-sots to return (0-30)
             sensitivity (float): Sensitivity for determining segment boundaries (0.0-1.0)
             sort_by_relevance (bool): Whether to sort by relevance to reference script
@@ -154,38 +165,24 @@ class AudioProcessor:
         if not segments:
             return []
         
+        table = segments if isinstance(segments, SegmentTable) else SegmentTable.from_segments(segments)
+        
         # Adjust segment selection based on sensitivity
         # Higher sensitivity means more segments (lower threshold for inclusion)
         min_duration_ms = 1000 * (1.0 - sensitivity)  # 0-1000ms based on sensitivity
-        filtered_segments = [s for s in segments if s["duration_ms"] >= min_duration_ms]
         
         # If we have a reference script and sort_by_relevance is True,
         # score segments based on relevance to the script
-        if reference_script and sort_by_relevance:
+        by_relevance = bool(reference_script and sort_by_relevance)
+        if by_relevance:
             import re
             
-            # Simple word-based relevance scoring
+            # Simple word-based relevance scoring (Jaccard similarity)
             script_words = set(re.findall(r'\b\w+\b', reference_script.lower()))
-            
-            for segment in filtered_segments:
-                segment_words = set(re.findall(r'\b\w+\b', segment["text"].lower()))
-                
-                # Calculate Jaccard similarity
-                if script_words and segment_words:
-                    intersection = script_words.intersection(segment_words)
-                    union = script_words.union(segment_words)
-                    segment["relevance_score"] = len(intersection) / len(union)
-                else:
-                    segment["relevance_score"] = 0
-            
-            # Sort by relevance score
-            filtered_segments.sort(key=lambda x: x["relevance_score"], reverse=True)
-        else:
-            # Sort by timestamp (chronological)
-            filtered_segments.sort(key=lambda x: x["start_ms"])
+            candidates = np.flatnonzero(table.duration_ms >= min_duration_ms)
+            table = table.with_scores(table.jaccard_scores(script_words, candidates))
         
-        # Limit to max_count
-        if max_count > 0:
-            filtered_segments = filtered_segments[:max_count]
+        # Filter, order (by relevance or chronologically) and limit to max_count
+        order = table.rank(min_duration_ms=min_duration_ms, by_score=by_relevance, limit=max(max_count, 0))
         
-        return filtered_segments
+        return table.to_dicts(order)
@@ -5,11 +5,92 @@ Handles permanent storage and retrieval of audio recordings
 
 import os
 import json
+import errno
 import shutil
+import hashlib
+import logging
 import datetime
 from pathlib import Path
 import uuid
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from src.models.transcription.recording_index import RecordingIndex
+from src.models.transcription.audio_probe import probe_audio
+
+# Recordings live in recordings/<xx>/<yy>/ under the storage folder, where
+# xx/yy are taken from a hash of the recording ID (65536 shards)
+SHARD_ROOT = 'recordings'
+SHARD_LEVELS = 2
+
+# Written once every flat recording has been moved into its shard
+SHARD_MARKER = '.sharded'
+
+# ioctl request for a copy-on-write clone (Linux FICLONE)
+FICLONE = 0x40049409
+
+# Errors meaning a link or clone is not possible between two paths
+_UNLINKABLE_ERRORS = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EMLINK}
+
+
+def place_file(source_path, dest_path, move=False):
+    """
+    Put a file at a new path, writing as little data as possible
+    
+    Tries, in order: rename (only when move is set), a copy-on-write
+    reflink, a hardlink, and finally a streamed copy. Only the copy
+    writes the audio again; the others just add a directory entry.
+    
+    Args:
+        source_path (str): File to place
+        dest_path (str): New path, which must not exist yet
+        move (bool): Whether the source may be consumed
+    
+    Returns:
+        tuple: (method used, bytes written)
+    """
+    if move:
+        try:
+            os.rename(source_path, dest_path)
+            return 'rename', 0
+        except OSError as e:
+            if e.errno not in _UNLINKABLE_ERRORS:
+                raise
+    
+    if fcntl:
+        try:
+            with open(source_path, 'rb') as src, open(dest_path, 'xb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source_path, dest_path)
+            return 'reflink', 0
+        except OSError as e:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            if e.errno not in _UNLINKABLE_ERRORS:
+                raise
+    
+    try:
+        os.link(source_path, dest_path)
+        return 'hardlink', 0
+    except OSError as e:
+        if e.errno not in _UNLINKABLE_ERRORS:
+            raise
+    
+    # Different filesystems: stream the data across (sendfile where available)
+    try:
+        shutil.copy2(source_path, dest_path)
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    if move:
+        os.remove(source_path)
+    return 'copy', os.path.getsize(dest_path)
+
+
 class AudioStorage:
     """
     Handles permanent storage and retrieval of audio recordings
@@ -20,34 +101,104 @@ class AudioStorage:
         Initialize the audio storage manager
         
         Args:
-            storage_folder (str, optional): Folder to store permanent audio files
+            storage_folder (str, optional): Folder to store permanent audio files,
+                AUDIO_STORAGE_FOLDER or ~/retro_transcription_storage by default
         """
         # Set storage folder
         if storage_folder:
             self.storage_folder = storage_folder
         else:
-            self.storage_folder = os.path.join(os.path.expanduser('~'), 'retro_transcription_storage')
+            self.storage_folder = os.environ.get(
+                'AUDIO_STORAGE_FOLDER', os.path.join(os.path.expanduser('~'), 'retro_transcription_storage')
+            )
         
         # Create storage folder if it doesn't exist
         if not os.path.exists(self.storage_folder):
             os.makedirs(self.storage_folder)
             
-        # Create metadata file if it doesn't exist
+        # Open the recording index, importing the legacy JSON metadata once
         self.metadata_file = os.path.join(self.storage_folder, 'recordings_metadata.json')
-        if not os.path.exists(self.metadata_file):
-            with open(self.metadata_file, 'w') as f:
-                json.dump([], f)
+        self.index = RecordingIndex(
+            os.path.join(self.storage_folder, 'recordings.db'),
+            legacy_json_path=self.metadata_file
+        )
+        
+        # Move recordings from the old flat layout into shards once
+        self.logger = logging.getLogger("AudioStorage")
+        if not os.path.exists(os.path.join(self.storage_folder, SHARD_MARKER)):
+            with self.index.setup_lock():
+                self.migrate_to_shards()
+    
+    def shard_folder(self, recording_id):
+        """
+        Get the folder a recording is stored in
+        
+        The folder is derived from the recording ID alone, so it can be
+        found without listing any directory.
+        
+        Args:
+            recording_id (str): ID of the recording
+        
+        Returns:
+            str: Path of the shard folder
+        """
+        digest = hashlib.sha1(recording_id.encode('utf-8')).hexdigest()
+        parts = [digest[level * 2:level * 2 + 2] for level in range(SHARD_LEVELS)]
+        return os.path.join(self.storage_folder, SHARD_ROOT, *parts)
+    
+    def migrate_to_shards(self):
+        """
+        Move recordings stored directly in the storage folder into shards
+        
+        Safe to re-run after an interruption: a file that was already moved
+        but whose index entry was not updated is picked up from its shard.
+        
+        Returns:
+            int: Number of recordings moved
+        """
+        moved = 0
+        
+        for recording in self.index.all():
+            path = recording.get('path')
+            if not path or os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.storage_folder):
+                continue
+            
+            shard = self.shard_folder(recording['id'])
+            dest_path = os.path.join(shard, os.path.basename(path))
+            
+            try:
+                if os.path.exists(path):
+                    os.makedirs(shard, exist_ok=True)
+                    os.rename(path, dest_path)
+                elif not os.path.exists(dest_path):
+                    continue
+                self.index.update(recording['id'], {'path': dest_path})
+                moved += 1
+            except OSError as e:
+                self.logger.error(f"Could not move {path} into its shard: {e}")
+                return moved
+        
+        with open(os.path.join(self.storage_folder, SHARD_MARKER), 'w') as f:
+            f.write(datetime.datetime.now().isoformat())
+        
+        if moved:
+            self.logger.info(f"Moved {moved} recordings into shards")
+        return moved
     
-    def save_recording(self, temp_file_path, metadata=None):
+    def save_recording(self, temp_file_path, metadata=None, move=False):
         """
         Save a recording permanently
         
+        The file is moved, reflinked or hardlinked into storage when it is on
+        the same filesystem, and only copied across devices.
+        
         Args:
             temp_file_path (str): Path to the temporary audio file
             metadata (dict, optional): Additional metadata about the recording
+            move (bool): Whether the temporary file may be moved into storage
         
         Returns:
-            dict: Information about the saved recording
+            dict: Information about the saved recording, including the bytes written
         """
         try:
             # Generate a unique ID for the recording
@@ -64,11 +215,13 @@ class AudioStorage:
             # Create filename
             filename = f"recording_{timestamp}_{recording_id}{ext}"
             
-            # Create destination path
-            dest_path = os.path.join(self.storage_folder, filename)
+            # Create destination path in the recording's shard
+            shard = self.shard_folder(recording_id)
+            os.makedirs(shard, exist_ok=True)
+            dest_path = os.path.join(shard, filename)
             
-            # Copy the file
-            shutil.copy2(temp_file_path, dest_path)
+            # Place the file without copying it where possible
+            save_method, bytes_written = place_file(temp_file_path, dest_path, move=move)
             
             # Prepare recording info
             recording_info = {
@@ -77,13 +230,17 @@ class AudioStorage:
                 'path': dest_path,
                 'timestamp': timestamp,
                 'date_created': datetime.datetime.now().isoformat(),
-                'size_bytes': os.path.getsize(dest_path)
+                'size_bytes': os.path.getsize(dest_path),
+                'codec': ext.lstrip('.').lower()
             }
             
             # Add additional metadata if provided
             if metadata:
                 recording_info.update(metadata)
             
+            # Probe duration and format once so nothing else has to decode the file
+            recording_info.update(probe_audio(dest_path))
+            
             # Update metadata file
             self._update_metadata(recording_info)
             
@@ -91,7 +248,9 @@ class AudioStorage:
                 'success': True,
                 'recording_id': recording_id,
                 'path': dest_path,
-                'info': recording_info
+                'info': recording_info,
+                'save_method': save_method,
+                'bytes_written': bytes_written
             }
             
         except Exception as e:
@@ -111,27 +270,28 @@ class AudioStorage:
             dict: Information about the recording
         """
         try:
-            # Get all recordings
-            recordings = self._get_all_metadata()
-            
-            # Find the recording with the given ID
-            for recording in recordings:
-                if recording.get('id') == recording_id:
-                    # Check if file exists
-                    if os.path.exists(recording.get('path')):
-                        return {
-                            'success': True,
-                            'recording': recording
-                        }
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'Recording file not found'
-                        }
+            # Look up the recording by primary key
+            recording = self.index.get(recording_id)
+            
+            if recording is None:
+                return {
+                    'success': False,
+                    'error': 'Recording not found'
+                }
+            
+            # Check if file exists, keeping the index's view in sync
+            # (a restored file is listed again)
+            file_exists = os.path.exists(recording.get('path'))
+            self.index.set_file_missing(recording_id, not file_exists)
+            if not file_exists:
+                return {
+                    'success': False,
+                    'error': 'Recording file not found'
+                }
             
             return {
-                'success': False,
-                'error': 'Recording not found'
+                'success': True,
+                'recording': recording
             }
             
         except Exception as e:
@@ -140,25 +300,42 @@ class AudioStorage:
                 'error': str(e)
             }
     
-    def get_all_recordings(self):
+    def get_all_recordings(self, sort='date', order='desc', limit=None, cursor=None,
+                           filters=None, fields=None):
         """
-        Get all saved recordings
+        Get saved recordings, optionally one page at a time
+        
+        Recordings whose files are known to be missing are left out. File
+        existence is tracked by the index rather than checked per item.
+        
+        Args:
+            sort (str): Sort key (date, size or duration)
+            order (str): asc or desc
+            limit (int, optional): Page size, all recordings if not given
+            cursor (str, optional): Cursor returned with the previous page
+            filters (dict, optional): Filters such as date_from or min_size
+            fields (list, optional): Recording fields to include in the result
         
         Returns:
-            dict: List of all recordings
+            dict: List of recordings and the cursor of the next page
         """
         try:
-            recordings = self._get_all_metadata()
+            recordings, next_cursor = self.index.query(
+                sort=sort,
+                order=order,
+                limit=limit if limit is not None else self.index.count(),
+                cursor=cursor,
+                filters=filters
+            )
             
-            # Filter out recordings whose files no longer exist
-            valid_recordings = []
-            for recording in recordings:
-                if os.path.exists(recording.get('path')):
-                    valid_recordings.append(recording)
+            # Project the requested fields
+            if fields:
+                recordings = [{field: recording.get(field) for field in fields} for recording in recordings]
             
             return {
                 'success': True,
-                'recordings': valid_recordings
+                'recordings': recordings,
+                'next_cursor': next_cursor
             }
             
         except Exception as e:
@@ -178,30 +355,121 @@ class AudioStorage:
             dict: Result of the deletion
         """
         try:
-            # Get all recordings
-            recordings = self._get_all_metadata()
-            
-            # Find the recording with the given ID
-            for i, recording in enumerate(recordings):
-                if recording.get('id') == recording_id:
-                    # Delete the file
-                    if os.path.exists(recording.get('path')):
-                        os.remove(recording.get('path'))
-                    
-                    # Remove from metadata
-                    recordings.pop(i)
-                    
-                    # Update metadata file
-                    with open(self.metadata_file, 'w') as f:
-                        json.dump(recordings, f)
-                    
-                    return {
-                        'success': True
-                    }
+            # Look up the recording by primary key
+            recording = self.index.get(recording_id)
+            
+            if recording is None:
+                return {
+                    'success': False,
+                    'error': 'Recording not found'
+                }
+            
+            # Delete the file
+            if os.path.exists(recording.get('path')):
+                os.remove(recording.get('path'))
+            
+            # Remove from the index
+            self.index.remove(recording_id)
+            
+            return {
+                'success': True
+            }
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def probe_recording(self, recording_id):
+        """
+        Probe a stored recording and save its duration and format details
+        
+        Used for recordings saved before probing was added and after a
+        recording's file is replaced.
+        
+        Args:
+            recording_id (str): ID of the recording
+        
+        Returns:
+            dict: Updated recording metadata, or None if not found
+        """
+        recording = self.index.get(recording_id)
+        if recording is None:
+            return None
+        if not os.path.exists(recording.get('path')):
+            self.index.set_file_missing(recording_id, True)
+            return None
+        
+        self.index.set_file_missing(recording_id, False)
+        return self.index.update(recording_id, probe_audio(recording['path']))
+    
+    def save_transcript(self, recording_id, segments, up_sots=None):
+        """
+        Store the transcript of a recording for searching
+        
+        Args:
+            recording_id (str): ID of the recording
+            segments (list): Transcript segments
+            up_sots (list, optional): Segments selected as up-sots
+        
+        Returns:
+            dict: Number of segments stored
+        """
+        try:
+            if self.index.get(recording_id) is None:
+                return {
+                    'success': False,
+                    'error': 'Recording not found'
+                }
+            
+            count = self.index.set_segments(recording_id, segments, up_sots)
+            self.index.update(recording_id, {'segment_count': count})
             
+            return {
+                'success': True,
+                'segment_count': count
+            }
+            
+        except Exception as e:
             return {
                 'success': False,
-                'error': 'Recording not found'
+                'error': str(e)
+            }
+    
+    def search_transcripts(self, query, limit=100, up_sots_only=False):
+        """
+        Search the stored transcripts of all recordings
+        
+        Args:
+            query (str): Words to search for
+            limit (int): Maximum number of matching segments
+            up_sots_only (bool): Only search segments selected as up-sots
+        
+        Returns:
+            dict: Matching recordings, each with its matching segments
+        """
+        try:
+            results = []
+            by_recording = {}
+            
+            # Group matching segments by recording, keeping the ranking order
+            for segment in self.index.search_segments(query, limit=limit, up_sots_only=up_sots_only):
+                recording_id = segment.pop('recording_id')
+                if recording_id not in by_recording:
+                    recording = self.index.get(recording_id) or {}
+                    by_recording[recording_id] = {
+                        'recording_id': recording_id,
+                        'filename': recording.get('filename'),
+                        'matches': []
+                    }
+                    results.append(by_recording[recording_id])
+                segment['up_sot'] = bool(segment['up_sot'])
+                by_recording[recording_id]['matches'].append(segment)
+            
+            return {
+                'success': True,
+                'results': results
             }
             
         except Exception as e:
@@ -210,33 +478,56 @@ class AudioStorage:
                 'error': str(e)
             }
     
-    def _update_metadata(self, recording_info):
+    def delete_recordings(self, recording_ids):
         """
-        Update metadata file with new recording info
+        Delete several recordings
+        
+        Index entries are removed in a single transaction, then the files
+        are deleted.
         
         Args:
-            recording_info (dict): Information about the recording
+            recording_ids (list): IDs of the recordings to delete
+        
+        Returns:
+            dict: Per-recording result keyed by ID
         """
-        # Get current metadata
-        recordings = self._get_all_metadata()
+        try:
+            removed = self.index.remove_many(recording_ids)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         
-        # Add new recording info
-        recordings.append(recording_info)
+        results = {recording_id: {'success': False, 'error': 'Recording not found'} for recording_id in recording_ids}
+        for recording in removed:
+            try:
+                if os.path.exists(recording.get('path')):
+                    os.remove(recording.get('path'))
+                results[recording['id']] = {'success': True}
+            except OSError as e:
+                results[recording['id']] = {'success': True, 'warning': f'File not removed: {e}'}
         
-        # Write updated metadata
-        with open(self.metadata_file, 'w') as f:
-            json.dump(recordings, f)
+        return {
+            'success': True,
+            'deleted': len(removed),
+            'results': results
+        }
+    
+    def _update_metadata(self, recording_info):
+        """
+        Add new recording info to the index
+        
+        Args:
+            recording_info (dict): Information about the recording
+        """
+        self.index.add(recording_info)
     
     def _get_all_metadata(self):
         """
-        Get all metadata from the metadata file
+        Get all metadata from the index
         
         Returns:
             list: List of recording metadata
         """
-        try:
-            with open(self.metadata_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # If file doesn't exist or is invalid, return empty list
-            return []
+        return self.index.all()
@@ -0,0 +1,367 @@
+"""
+Audio Transcoder Module for the Retro Transcription Web Tool
+Compresses stored recordings in the background and decodes them on demand
+"""
+
+import os
+import time
+import logging
+import datetime
+import threading
+from queue import Queue, Empty
+from contextlib import contextmanager
+from pydub import AudioSegment
+
+from src.models.transcription.audio_probe import probe_audio
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Target codecs: pydub/ffmpeg export settings and how the result is served
+CODECS = {
+    "flac": {
+        "format": "flac",
+        "extension": ".flac",
+        "mimetype": "audio/flac",
+        "export": {}
+    },
+    "opus": {
+        "format": "opus",
+        "extension": ".opus",
+        "mimetype": "audio/ogg",
+        "export": {"codec": "libopus", "bitrate": "48k"}
+    }
+}
+
+# Probed audio codecs of uncompressed recordings start with this (pcm_s16le, pcm_f32le...)
+UNCOMPRESSED_CODEC_PREFIX = "pcm_"
+
+# Allowed difference between the source and re-decoded duration
+DURATION_TOLERANCE_MS = 100
+
+
+class AudioTranscoder:
+    """
+    Background transcoder for saved recordings
+
+    A single worker thread takes recordings off a queue, encodes them to
+    the target codec next to the original, checks that the result decodes
+    to the same duration, then points the index at the new file and
+    removes the original. Recordings are queued when they are saved and
+    by a periodic sweep for anything still uncompressed.
+
+    Work is serialised across processes with a file lock in the storage
+    folder, so several gunicorn workers never encode the same recording.
+    """
+
+    def __init__(self, audio_storage, codec=None, interval=None):
+        """
+        Initialize the transcoder
+
+        Args:
+            audio_storage (AudioStorage): Storage whose recordings are transcoded
+            codec (str, optional): Target codec (flac or opus)
+            interval (float, optional): Seconds between sweeps for uncompressed recordings
+        """
+        self.storage = audio_storage
+        self.codec = codec or os.environ.get("TRANSCODE_CODEC", "flac")
+        if self.codec not in CODECS:
+            raise ValueError(f"Unsupported codec: {self.codec}")
+        self.interval = interval if interval is not None else float(os.environ.get("TRANSCODE_INTERVAL", 300))
+
+        # Decoded copies for clients that ask for WAV
+        self.decoded_folder = os.path.join(self.storage.storage_folder, 'decoded')
+        if not os.path.exists(self.decoded_folder):
+            os.makedirs(self.decoded_folder)
+
+        self._queue = Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.logger = logging.getLogger("AudioTranscoder")
+
+        self.stats = {
+            "recordings_transcoded": 0,
+            "recordings_failed": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "audio_seconds": 0.0,
+            "encode_seconds": 0.0,
+            "decode_seconds": 0.0,
+            "on_demand_decodes": 0,
+            "on_demand_decode_seconds": 0.0
+        }
+
+    def start(self):
+        """
+        Start the background transcoding thread
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="audio-transcoder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background transcoding thread
+        """
+        self._stop.set()
+
+    def schedule(self, recording_id):
+        """
+        Queue a recording for transcoding
+
+        Args:
+            recording_id (str): ID of the recording
+        """
+        with self._lock:
+            if recording_id in self._queued:
+                return
+            self._queued.add(recording_id)
+        self._queue.put(recording_id)
+
+    def schedule_pending(self):
+        """
+        Queue every recording that is still stored uncompressed
+
+        Recordings saved before format probing was added are probed on
+        the way.
+
+        Returns:
+            int: Number of recordings queued
+        """
+        queued = 0
+        for recording in self.storage.index.all():
+            if "sample_rate" not in recording:
+                recording = self.storage.probe_recording(recording["id"]) or recording
+            if self.needs_transcode(recording):
+                self.schedule(recording["id"])
+                queued += 1
+        return queued
+
+    @staticmethod
+    def needs_transcode(recording):
+        """
+        Check whether a recording is stored as uncompressed PCM
+
+        Decided from the codec probed from the file rather than its name:
+        browsers record webm/opus, which is often saved as .wav and would
+        only grow when re-encoded.
+        """
+        if recording.get("codec") in CODECS or recording.get("transcode_error"):
+            return False
+        return (recording.get("audio_codec") or "").startswith(UNCOMPRESSED_CODEC_PREFIX)
+
+    def transcode(self, recording_id):
+        """
+        Transcode one recording to the target codec
+
+        Args:
+            recording_id (str): ID of the recording
+
+        Returns:
+            dict: Result with the sizes before and after
+        """
+        recording = self.storage.index.get(recording_id)
+        if recording is None:
+            return {"success": False, "error": "Recording not found"}
+        if not self.needs_transcode(recording):
+            return {"success": True, "skipped": True}
+
+        settings = CODECS[self.codec]
+        source_path = recording["path"]
+        base_path = os.path.splitext(source_path)[0]
+        dest_path = base_path + settings["extension"]
+        part_path = f"{dest_path}.{os.getpid()}.part"
+
+        try:
+            # Encode
+            started = time.perf_counter()
+            audio = AudioSegment.from_file(source_path)
+            audio.export(part_path, format=settings["format"], **settings["export"])
+            encode_seconds = time.perf_counter() - started
+
+            # Verify the encoded file decodes to the same length
+            started = time.perf_counter()
+            decoded = AudioSegment.from_file(part_path)
+            decode_seconds = time.perf_counter() - started
+            if abs(len(decoded) - len(audio)) > DURATION_TOLERANCE_MS:
+                raise ValueError(f"Decoded duration {len(decoded)} ms does not match {len(audio)} ms")
+
+            os.replace(part_path, dest_path)
+        except Exception as e:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            # Remember the failure so the sweep does not retry it forever
+            self.storage.index.update(recording_id, {"transcode_error": str(e)})
+            with self._lock:
+                self.stats["recordings_failed"] += 1
+            return {"success": False, "error": str(e)}
+
+        size_before = os.path.getsize(source_path)
+        size_after = os.path.getsize(dest_path)
+        fields = {
+            "path": dest_path,
+            "filename": os.path.basename(dest_path),
+            "codec": self.codec,
+            "original_codec": recording.get("codec", "wav"),
+            "original_size_bytes": size_before,
+            "size_bytes": size_after,
+            "transcoded_at": datetime.datetime.now().isoformat()
+        }
+        # The encoder may resample (Opus is always 48 kHz)
+        fields.update(probe_audio(dest_path))
+        updated = self.storage.index.update(recording_id, fields)
+
+        if updated is None:
+            # Deleted while we were encoding
+            os.remove(dest_path)
+            return {"success": False, "error": "Recording not found"}
+
+        os.remove(source_path)
+
+        with self._lock:
+            self.stats["recordings_transcoded"] += 1
+            self.stats["bytes_before"] += size_before
+            self.stats["bytes_after"] += size_after
+            self.stats["audio_seconds"] += len(audio) / 1000
+            self.stats["encode_seconds"] += encode_seconds
+            self.stats["decode_seconds"] += decode_seconds
+
+        return {
+            "success": True,
+            "codec": self.codec,
+            "size_before": size_before,
+            "size_after": size_after
+        }
+
+    def decoded_path(self, recording):
+        """
+        Get a WAV copy of a recording, decoding compressed files on demand
+
+        Decoded copies are kept in the decoded folder and reused while the
+        stored file is unchanged. Only PCM audio in a .wav file is sent as
+        it is; the probed codec decides, since browser webm/opus is often
+        saved under a .wav name.
+
+        Args:
+            recording (dict): Recording metadata
+
+        Returns:
+            str: Path to a WAV file with the recording's audio
+        """
+        source_path = recording["path"]
+        audio_codec = recording.get("audio_codec")
+        if audio_codec is None:
+            audio_codec = probe_audio(source_path).get("audio_codec")
+        if (os.path.splitext(source_path)[1].lower() == ".wav"
+                and (audio_codec or "").startswith(UNCOMPRESSED_CODEC_PREFIX)):
+            return source_path
+
+        stat = os.stat(source_path)
+        wav_path = os.path.join(self.decoded_folder, f"{recording['id']}_{stat.st_mtime_ns}.wav")
+        if os.path.exists(wav_path):
+            os.utime(wav_path)
+            return wav_path
+
+        part_path = f"{wav_path}.{os.getpid()}.part"
+        started = time.perf_counter()
+        try:
+            AudioSegment.from_file(source_path).export(part_path, format="wav")
+            os.replace(part_path, wav_path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        with self._lock:
+            self.stats["on_demand_decodes"] += 1
+            self.stats["on_demand_decode_seconds"] += time.perf_counter() - started
+
+        return wav_path
+
+    def get_stats(self):
+        """
+        Get space reclaimed and codec overhead
+
+        Returns:
+            dict: Transcoding statistics
+        """
+        with self._lock:
+            stats = dict(self.stats)
+
+        stats["codec"] = self.codec
+        stats["queued"] = self._queue.qsize()
+        stats["bytes_reclaimed"] = stats["bytes_before"] - stats["bytes_after"]
+        stats["compression_ratio"] = (
+            round(stats["bytes_after"] / stats["bytes_before"], 3) if stats["bytes_before"] else None
+        )
+        # Seconds of CPU per second of audio
+        stats["encode_overhead"] = (
+            round(stats["encode_seconds"] / stats["audio_seconds"], 4) if stats["audio_seconds"] else None
+        )
+        stats["decode_overhead"] = (
+            round(stats["decode_seconds"] / stats["audio_seconds"], 4) if stats["audio_seconds"] else None
+        )
+
+        # Totals over the whole library, including earlier runs and other workers
+        library = {"recordings": 0, "compressed": 0, "bytes_stored": 0, "bytes_reclaimed": 0}
+        for recording in self.storage.index.all():
+            library["recordings"] += 1
+            library["bytes_stored"] += recording.get("size_bytes") or 0
+            if recording.get("original_size_bytes"):
+                library["compressed"] += 1
+                library["bytes_reclaimed"] += recording["original_size_bytes"] - (recording.get("size_bytes") or 0)
+        stats["library"] = library
+
+        return stats
+
+    def mimetype_for(self, recording):
+        """
+        Get the content type of a stored recording
+        """
+        settings = CODECS.get(recording.get("codec"))
+        return settings["mimetype"] if settings else None
+
+    def _run(self):
+        next_sweep = 0
+        while not self._stop.is_set():
+            if time.time() >= next_sweep:
+                try:
+                    self.schedule_pending()
+                except Exception as e:
+                    self.logger.error(f"Transcode sweep failed: {e}")
+                next_sweep = time.time() + self.interval
+
+            try:
+                recording_id = self._queue.get(timeout=1)
+            except Empty:
+                continue
+
+            try:
+                with self._process_lock():
+                    result = self.transcode(recording_id)
+                if not result["success"]:
+                    self.logger.error(f"Transcoding {recording_id} failed: {result['error']}")
+            except Exception as e:
+                self.logger.error(f"Transcoding {recording_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(recording_id)
+
+    @contextmanager
+    def _process_lock(self):
+        """
+        Hold the transcoding lock shared by every process using this storage
+        """
+        with open(os.path.join(self.storage.storage_folder, 'transcode.lock'), 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
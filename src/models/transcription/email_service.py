@@ -51,7 +51,7 @@ class EmailService:
         self.logger = logging.getLogger("EmailService")
     
     def send_edl(self, recipient_email, edl_file_path, subject=None, body=None, 
-                cc=None, bcc=None, additional_attachments=None):
+                cc=None, bcc=None, additional_attachments=None, attachment_names=None):
         """
         Send EDL file via email
         
@@ -63,6 +63,7 @@ class EmailService:
             cc (list, optional): List of CC recipients
             bcc (list, optional): List of BCC recipients
             additional_attachments (list, optional): List of additional file paths to attach
+            attachment_names (dict, optional): Display filename per attachment path
         
         Returns:
             dict: Result of the email sending operation
@@ -83,6 +84,8 @@ class EmailService:
             self.logger.error(f"EDL file not found: {edl_file_path}")
             return {"success": False, "error": "EDL file not found"}
         
+        attachment_names = attachment_names or {}
+        
         try:
             # Create message
             msg = MIMEMultipart()
@@ -101,20 +104,22 @@ class EmailService:
             msg.attach(MIMEText(body, 'plain'))
             
             # Add EDL attachment
+            edl_name = attachment_names.get(edl_file_path, os.path.basename(edl_file_path))
             with open(edl_file_path, 'rb') as file:
-                attachment = MIMEApplication(file.read(), Name=os.path.basename(edl_file_path))
+                attachment = MIMEApplication(file.read(), Name=edl_name)
             
-            attachment['Content-Disposition'] = f'attachment; filename="{os.path.basename(edl_file_path)}"'
+            attachment['Content-Disposition'] = f'attachment; filename="{edl_name}"'
             msg.attach(attachment)
             
             # Add additional attachments if provided
             if additional_attachments:
                 for file_path in additional_attachments:
                     if os.path.exists(file_path):
+                        file_name = attachment_names.get(file_path, os.path.basename(file_path))
                         with open(file_path, 'rb') as file:
-                            attachment = MIMEApplication(file.read(), Name=os.path.basename(file_path))
+                            attachment = MIMEApplication(file.read(), Name=file_name)
                         
-                        attachment['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
+                        attachment['Content-Disposition'] = f'attachment; filename="{file_name}"'
                         msg.attach(attachment)
             
             # Send email
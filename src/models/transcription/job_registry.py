@@ -0,0 +1,232 @@
+"""
+Job Registry Module for the Retro Transcription Web Tool
+Runs multi-item jobs on a shared worker pool and tracks per-item progress
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Seconds a finished job stays queryable
+FINISHED_JOB_TTL = 3600
+
+# Seconds a writer waits for another process to release the database
+BUSY_TIMEOUT_SECONDS = 30
+
+
+class JobRegistry:
+    """
+    Shared pool for long-running batch work
+
+    A job is a list of items processed by the same function. Items run
+    concurrently on one pool shared by every job, so a large batch cannot
+    start more work than the pool allows. Each item's status, result or
+    error is recorded as it finishes.
+
+    Items run in the process that submitted the job, but job and item
+    status is kept in a SQLite database, so any worker process sharing
+    it can report a job's progress.
+    """
+
+    def __init__(self, max_workers=None, db_path=None):
+        """
+        Initialize the registry
+
+        Args:
+            max_workers (int, optional): Number of items processed at once across all jobs
+            db_path (str, optional): Path to the SQLite database holding job status
+        """
+        if max_workers is None:
+            max_workers = int(os.environ.get("JOB_WORKERS", 2))
+        self.db_path = db_path or os.environ.get(
+            "JOB_DB_PATH", os.path.join(tempfile.gettempdir(), 'retro_transcription_jobs.db')
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.logger = logging.getLogger("JobRegistry")
+
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created TEXT NOT NULL,
+                finished TEXT,
+                finished_at REAL,
+                total INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, item_id)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at)")
+
+    def _connect(self):
+        """
+        Get the connection for the current thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=BUSY_TIMEOUT_SECONDS)
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_SECONDS * 1000}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, kind, item_ids, handler, on_complete=None):
+        """
+        Start a job
+
+        Args:
+            kind (str): Job type, reported with its status
+            item_ids (list): Items to process
+            handler (callable): Called with each item ID; returns a result dict
+                or raises to mark the item failed
+            on_complete (callable, optional): Called with the job ID once every item is done
+
+        Returns:
+            str: ID of the new job
+        """
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        item_ids = list(dict.fromkeys(item_ids))
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._prune(conn)
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, created, finished, finished_at, total) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, "running" if item_ids else "completed", now,
+                 None if item_ids else now, None if item_ids else time.time(), len(item_ids))
+            )
+            conn.executemany(
+                "INSERT INTO job_items (job_id, item_id, position, data) VALUES (?, ?, ?, ?)",
+                [(job_id, item_id, position, json.dumps({"status": "queued"}))
+                 for position, item_id in enumerate(item_ids)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if on_complete and item_ids:
+            with self._lock:
+                self._callbacks[job_id] = on_complete
+
+        for item_id in item_ids:
+            self.executor.submit(self._run_item, job_id, item_id, handler)
+
+        if not item_ids and on_complete:
+            on_complete(job_id)
+
+        return job_id
+
+    def get(self, job_id, include_items=True):
+        """
+        Get the progress of a job
+
+        Args:
+            job_id (str): ID of the job
+            include_items (bool): Include the per-item status
+
+        Returns:
+            dict: Job status, or None if unknown
+        """
+        conn = self._connect()
+        # One read transaction, so the counts and items agree
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, status, created, finished, total, completed, failed FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            status = dict(zip(("id", "kind", "status", "created", "finished", "total", "completed", "failed"), row))
+            status["progress"] = (
+                (status["completed"] + status["failed"]) / status["total"] if status["total"] else 1.0
+            )
+            if include_items:
+                rows = conn.execute(
+                    "SELECT item_id, data FROM job_items WHERE job_id = ? ORDER BY position", (job_id,)
+                )
+                status["items"] = {item_id: json.loads(data) for item_id, data in rows.fetchall()}
+            return status
+        finally:
+            conn.execute("COMMIT")
+
+    def _set_item(self, conn, job_id, item_id, item):
+        conn.execute(
+            "UPDATE job_items SET data = ? WHERE job_id = ? AND item_id = ?",
+            (json.dumps(item, default=str), job_id, item_id)
+        )
+
+    def _run_item(self, job_id, item_id, handler):
+        self._set_item(self._connect(), job_id, item_id, {"status": "running"})
+
+        started = time.perf_counter()
+        try:
+            result = handler(item_id)
+            item = {"status": "completed", "result": result}
+        except Exception as e:
+            item = {"status": "failed", "error": str(e)}
+        item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._set_item(conn, job_id, item_id, item)
+            counter = "completed" if item["status"] == "completed" else "failed"
+            conn.execute(f"UPDATE jobs SET {counter} = {counter} + 1 WHERE id = ?", (job_id,))
+            finished = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN failed = 0 THEN 'completed' ELSE 'completed_with_errors' END, "
+                "finished = ?, finished_at = ? WHERE id = ? AND completed + failed = total",
+                (datetime.now().isoformat(), time.time(), job_id)
+            ).rowcount > 0
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if not finished:
+            return
+        with self._lock:
+            on_complete = self._callbacks.pop(job_id, None)
+        if on_complete:
+            try:
+                on_complete(job_id)
+            except Exception as e:
+                self.logger.error(f"Job completion callback failed: {e}")
+
+    def _prune(self, conn):
+        # Called inside a write transaction
+        cutoff = time.time() - FINISHED_JOB_TTL
+        conn.execute(
+            "DELETE FROM job_items WHERE job_id IN (SELECT id FROM jobs WHERE finished_at < ?)", (cutoff,)
+        )
+        conn.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
@@ -0,0 +1,194 @@
+"""
+Output Bundle Module for the Retro Transcription Web Tool
+Builds ZIP bundles of generated outputs as a stream of chunks
+"""
+
+import os
+import time
+import hashlib
+import zipfile
+
+# Bytes read from a source file per step
+READ_CHUNK_SIZE = 64 * 1024
+
+# Already-compressed or raw audio gains little from deflate
+STORED_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".opus", ".m4a", ".webm", ".pdf", ".zip"}
+
+
+class BundleEntry:
+    """
+    A single file in a bundle, read either from disk or from a chunk generator
+    """
+
+    def __init__(self, arcname, path=None, chunks=None, identity=None):
+        """
+        Initialize the entry
+
+        Args:
+            arcname (str): Name of the file inside the ZIP
+            path (str, optional): File to copy into the bundle
+            chunks (callable, optional): Returns an iterator of bytes for generated entries
+            identity (str, optional): Stable description of generated content, used in the bundle key
+        """
+        self.arcname = arcname
+        self.path = path
+        self.chunks = chunks
+        self.identity = identity
+
+    def key_parts(self):
+        """
+        Describe the entry for cache keys without reading its content
+        """
+        if self.path:
+            stat = os.stat(self.path)
+            return [self.arcname, self.path, stat.st_size, stat.st_mtime_ns]
+        return [self.arcname, self.identity]
+
+    def iter_content(self):
+        if self.path:
+            with open(self.path, 'rb') as f:
+                while True:
+                    data = f.read(READ_CHUNK_SIZE)
+                    if not data:
+                        break
+                    yield data
+        else:
+            yield from self.chunks()
+
+
+class _ChunkSink:
+    """
+    Write-only, non-seekable file object that collects ZIP output for draining
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def bundle_key(entries):
+    """
+    Hash the inputs of a bundle
+
+    Args:
+        entries (list): List of BundleEntry
+
+    Returns:
+        str: Hex digest identifying the bundle content
+    """
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(repr(entry.key_parts()).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def iter_zip(entries):
+    """
+    Stream a ZIP archive of the given entries
+
+    Only one read chunk plus the deflate state is held in memory at a time,
+    whatever the size of the source files.
+
+    Args:
+        entries (list): List of BundleEntry
+
+    Yields:
+        bytes: Consecutive chunks of the ZIP file
+    """
+    sink = _ChunkSink()
+
+    # Date the members by their newest source file, so rebuilding the same
+    # bundle gives the same bytes and a resumed download can pick up from
+    # a stream that was never stored
+    mtimes = [os.path.getmtime(entry.path) for entry in entries if entry.path]
+    date_time = time.localtime(max(mtimes) if mtimes else time.time())[:6]
+
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.arcname, date_time=date_time)
+            if os.path.splitext(entry.arcname)[1].lower() in STORED_EXTENSIONS:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+
+            # Large files need ZIP64 headers up front
+            force_zip64 = bool(entry.path) and os.path.getsize(entry.path) > zipfile.ZIP64_LIMIT
+
+            with archive.open(info, 'w', force_zip64=force_zip64) as member:
+                for data in entry.iter_content():
+                    member.write(data)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+    # Central directory
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def iter_zip_to_cache(entries, cache, key):
+    """
+    Stream a ZIP archive while keeping a copy in the output cache
+
+    The copy lets later requests (including Range/resume requests) be
+    served from disk. An interrupted stream leaves nothing in the cache.
+
+    Args:
+        entries (list): List of BundleEntry
+        cache (OutputCache): Cache to store the finished bundle in
+        key (str): Cache key of the bundle
+
+    Yields:
+        bytes: Consecutive chunks of the ZIP file
+    """
+    part_path = cache.temp_path(key, "zip")
+    completed = False
+
+    try:
+        with open(part_path, 'wb') as f:
+            for chunk in iter_zip(entries):
+                f.write(chunk)
+                yield chunk
+        completed = True
+        cache.put(key, "zip", part_path)
+    finally:
+        if not completed and os.path.exists(part_path):
+            os.remove(part_path)
+
+
+def build_zip(entries, cache, key):
+    """
+    Write a ZIP archive into the output cache without sending it
+
+    Args:
+        entries (list): List of BundleEntry
+        cache (OutputCache): Cache to store the bundle in
+        key (str): Cache key of the bundle
+
+    Returns:
+        str: Path of the cached bundle
+    """
+    for _ in iter_zip_to_cache(entries, cache, key):
+        pass
+    return cache.path_for(key, "zip")
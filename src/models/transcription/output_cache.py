@@ -0,0 +1,261 @@
+"""
+Output Cache Module for the Retro Transcription Web Tool
+Caches rendered output artifacts by a hash of their inputs
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Age after which an unfinished render is considered abandoned
+STALE_PART_SECONDS = 3600
+
+# Seconds a new artifact is safe from eviction, so a session can record it
+# after it is rendered
+NEW_ENTRY_GRACE_SECONDS = 300
+
+# Segment fields that affect rendered output
+SEGMENT_KEY_FIELDS = ("timecode", "text", "start_ms", "end_ms", "duration_ms")
+
+
+def segments_digest(segments, source_file):
+    """
+    Hash the up-sots and source name that an export is rendered from
+
+    Args:
+        segments (list): List of transcript segments
+        source_file (str): Path or name of the source audio/video file
+
+    Returns:
+        str: Hex digest of the render inputs
+    """
+    digest = hashlib.sha256()
+    digest.update(os.path.basename(source_file or "").encode('utf-8'))
+    for segment in segments:
+        fields = [segment.get(field) for field in SEGMENT_KEY_FIELDS]
+        digest.update(json.dumps(fields, separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Size-bounded cache of rendered output files keyed by content hash
+
+    Files that a reference provider reports in use (outputs listed by live
+    sessions) are never evicted, nor are files rendered in the last few
+    minutes that a session may not have recorded yet. An artifact larger
+    than the whole budget does not push anything out; it is the first to
+    go at the next eviction instead.
+    """
+
+    def __init__(self, cache_folder, max_bytes=None, reference_providers=None):
+        """
+        Initialize the output cache
+
+        Args:
+            cache_folder (str): Folder to store cached artifacts
+            max_bytes (int, optional): Total size budget before evicting
+            reference_providers (list, optional): Callables returning paths that must be kept
+        """
+        self.cache_folder = cache_folder
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("OUTPUT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        self.max_bytes = max_bytes
+        self.reference_providers = list(reference_providers or [])
+
+        # Create cache folder if it doesn't exist
+        if not os.path.exists(self.cache_folder):
+            os.makedirs(self.cache_folder)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (path, size), least recently used first
+        self._total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        self._load_existing()
+
+    def make_key(self, content_digest, fmt, options=None):
+        """
+        Build the cache key for one format of an export
+
+        Args:
+            content_digest (str): Digest from segments_digest
+            fmt (str): Output format
+            options (dict, optional): Render options
+
+        Returns:
+            str: Cache key
+        """
+        payload = json.dumps([content_digest, fmt, options or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def path_for(self, key, extension):
+        """
+        Get the path a cached artifact is stored at
+        """
+        return os.path.join(self.cache_folder, f"{key}.{extension}")
+
+    def temp_path(self, key, extension):
+        """
+        Get a unique path to render an artifact into before it is cached
+        """
+        return os.path.join(self.cache_folder, f"{key}.{extension}.{uuid.uuid4().hex}.part")
+
+    def get(self, key, extension):
+        """
+        Look up a cached artifact
+
+        Args:
+            key (str): Cache key
+            extension (str): File extension of the artifact
+
+        Returns:
+            str: Path of the cached file, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and os.path.exists(entry[0]):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+
+            if entry:
+                # File was removed behind our back
+                self._forget(key)
+
+            # Another worker may have rendered it
+            path = self.path_for(key, extension)
+            if os.path.exists(path):
+                self._add(key, path)
+                self.stats["hits"] += 1
+                return path
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, extension, rendered_path):
+        """
+        Move a freshly rendered file into the cache
+
+        Args:
+            key (str): Cache key
+            extension (str): File extension of the artifact
+            rendered_path (str): Path the artifact was rendered to
+
+        Returns:
+            str: Path of the cached file
+        """
+        path = self.path_for(key, extension)
+        os.replace(rendered_path, path)
+
+        with self._lock:
+            self._forget(key)
+            self._add(key, path)
+            if self._entries[key][1] > self.max_bytes:
+                # Too big to ever fit: leave everything else alone and make it the first to go
+                self._entries.move_to_end(key, last=False)
+            else:
+                self._evict(keep=key)
+
+        return path
+
+    def add_reference_provider(self, provider):
+        """
+        Register a callable returning paths that must not be evicted
+        """
+        with self._lock:
+            self.reference_providers.append(provider)
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Hit/miss counts, entry count and total size
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["total_bytes"] = self._total_bytes
+            stats["max_bytes"] = self.max_bytes
+            return stats
+
+    def _add(self, key, path):
+        size = os.path.getsize(path)
+        self._entries[key] = (path, size)
+        self._total_bytes += size
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[1]
+
+    def _evict(self, keep=None):
+        """
+        Remove least recently used artifacts until the cache fits its budget
+        """
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        referenced = self._referenced_paths()
+        if referenced is None:
+            return
+        recent = time.time() - NEW_ENTRY_GRACE_SECONDS
+        for key in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+
+            path, _ = self._entries[key]
+            try:
+                if os.path.realpath(path) in referenced or os.path.getmtime(path) > recent:
+                    continue
+            except OSError:
+                pass
+            self._forget(key)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.stats["evictions"] += 1
+
+    def _referenced_paths(self):
+        referenced = set()
+        for provider in self.reference_providers:
+            try:
+                referenced.update(os.path.realpath(path) for path in provider() if path)
+            except Exception as e:
+                # Evicting a file in use breaks downloads; keep everything this round
+                logging.getLogger("OutputCache").error(f"Reference provider failed: {e}")
+                return None
+        return referenced
+
+    def _load_existing(self):
+        """
+        Index artifacts left in the cache folder, oldest first
+        """
+        existing = []
+        for entry in os.scandir(self.cache_folder):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                # Leftover from an interrupted render, unless another worker is still writing it
+                try:
+                    if time.time() - entry.stat().st_mtime > STALE_PART_SECONDS:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+                continue
+            key = entry.name.split(".", 1)[0]
+            existing.append((entry.stat().st_mtime, key, entry.path))
+
+        for _, key, path in sorted(existing):
+            self._add(key, path)
+
+        # Eviction waits for the first put, once reference providers are registered
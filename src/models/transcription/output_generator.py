@@ -1,28 +1,38 @@
 """
 Output Generator Module for the Retro Transcription Web Tool
-Handles generation of TXT, PDF, and EDL output files
+Handles generation of TXT, PDF, EDL, SRT, WebVTT and JSON output files
 """
 
 import os
 import json
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from fpdf import FPDF
 import tempfile
 
+from src.models.transcription.output_cache import OutputCache, segments_digest
+from src.models.transcription.output_writers import WRITERS, make_cue
+
 class OutputGenerator:
     """
-    Handles generation of TXT, PDF, and EDL output files
+    Handles generation of TXT, PDF, EDL, SRT, WebVTT and JSON output files
     for the Retro Transcription Web Tool.
     """
     
-    def __init__(self, output_folder=None):
+    # Formats rendered when no explicit selection is made
+    DEFAULT_FORMATS = ("txt", "pdf", "edl")
+    
+    def __init__(self, output_folder=None, max_workers=None, cache_max_bytes=None, bundle_cache_max_bytes=None):
         """
         Initialize the output generator
         
         Args:
             output_folder (str, optional): Folder to store output files
+            max_workers (int, optional): Number of threads used to render formats concurrently
+            cache_max_bytes (int, optional): Size budget of the rendered artifact cache
+            bundle_cache_max_bytes (int, optional): Size budget of bundles that include audio
         """
         # Set output folder
         if output_folder:
@@ -33,14 +43,146 @@ class OutputGenerator:
         # Create output folder if it doesn't exist
         if not os.path.exists(self.output_folder):
             os.makedirs(self.output_folder)
+        
+        # Shared pool for concurrent and background rendering
+        if max_workers is None:
+            max_workers = int(os.environ.get("OUTPUT_WORKERS", 4))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="output")
+        self._lock = threading.Lock()
+        
+        # Rendered artifacts keyed by a hash of their inputs
+        self.cache = OutputCache(os.path.join(self.output_folder, 'cache'), cache_max_bytes)
+        
+        # Bundles with audio are recording-sized; they get their own budget
+        # so they never push rendered transcripts out
+        if bundle_cache_max_bytes is None:
+            bundle_cache_max_bytes = int(os.environ.get("OUTPUT_BUNDLE_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+        self.bundle_cache = OutputCache(os.path.join(self.output_folder, 'bundles'), bundle_cache_max_bytes)
     
-    def generate_txt_output(self, segments, filename=None):
+    def render(self, segments, source_file, formats, base_filename, options=None, paths=None):
         """
-        Generate a TXT file from transcript segments
+        Render several formats in a single pass over the segments
+        
+        Timing is resolved once per segment and the resulting cue is fed to
+        every registered writer, so adding a format does not add a pass.
         
         Args:
             segments (list): List of transcript segments
+            source_file (str): Path or name of the source audio/video file
+            formats (list): Format names to render
+            base_filename (str): Base filename for all outputs
+            options (dict, optional): Render options passed to every writer
+            paths (dict, optional): Output path per format, defaults to the output folder
+        
+        Returns:
+            dict: Per-format results with file path, filename and elapsed_ms
+        """
+        results = {}
+        active = {}
+        
+        # Open one writer and file per format
+        for fmt in formats:
+            writer_class = WRITERS.get(fmt)
+            if writer_class is None:
+                results[fmt] = {"success": False, "error": f"Unsupported format: {fmt}", "elapsed_ms": 0}
+                continue
+            
+            filename = f"{base_filename}.{writer_class.extension}"
+            if paths and fmt in paths:
+                output_path = paths[fmt]
+            else:
+                output_path = os.path.join(self.output_folder, filename)
+            writer = writer_class(source_file or "", len(segments), options)
+            active[fmt] = {"writer": writer, "path": output_path, "filename": filename,
+                           "file": None, "elapsed": 0.0}
+        
+        def feed(fmt, method, *args):
+            # Run one writer step, timing it and dropping the format on failure
+            state = active[fmt]
+            start = time.perf_counter()
+            try:
+                if state["file"] is None:
+                    state["file"] = open(state["path"], 'wb')
+                chunk = getattr(state["writer"], method)(*args)
+                if chunk:
+                    state["file"].write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            except Exception as e:
+                results[fmt] = {"success": False, "error": str(e), "elapsed_ms": 0}
+                if state["file"] is not None:
+                    state["file"].close()
+                if os.path.exists(state["path"]):
+                    os.remove(state["path"])
+                del active[fmt]
+                return
+            state["elapsed"] += time.perf_counter() - start
+        
+        for fmt in list(active):
+            feed(fmt, "begin")
+        
+        for index, segment in enumerate(segments):
+            cue = make_cue(index, segment)
+            for fmt in list(active):
+                feed(fmt, "write", cue)
+        
+        for fmt in list(active):
+            feed(fmt, "end")
+        
+        for fmt, state in active.items():
+            state["file"].close()
+            results[fmt] = {
+                "success": True,
+                "file_path": state["path"],
+                "filename": state["filename"],
+                "elapsed_ms": round(state["elapsed"] * 1000, 2)
+            }
+        
+        return results
+    
+    def iter_output(self, fmt, segments, source_file=None, options=None, chunk_size=64 * 1024):
+        """
+        Render a streamable format without touching the disk
+        
+        Args:
+            fmt (str): Output format, must be a streamable writer
+            segments (list): List of transcript segments
+            source_file (str, optional): Path or name of the source audio/video file
+            options (dict, optional): Format specific render options
+            chunk_size (int): Approximate number of bytes per yielded chunk
+        
+        Yields:
+            bytes: Consecutive chunks of the rendered file
+        """
+        writer_class = WRITERS.get(fmt)
+        if writer_class is None or not writer_class.streamable:
+            raise ValueError(f"Format cannot be streamed: {fmt}")
+        
+        writer = writer_class(source_file or "", len(segments), options)
+        buffer = [writer.begin()]
+        buffered = len(buffer[0])
+        
+        for index, segment in enumerate(segments):
+            chunk = writer.write(make_cue(index, segment))
+            buffer.append(chunk)
+            buffered += len(chunk)
+            
+            if buffered >= chunk_size:
+                yield "".join(buffer).encode('utf-8')
+                buffer = []
+                buffered = 0
+        
+        buffer.append(writer.end())
+        yield "".join(buffer).encode('utf-8')
+    
+    def generate_output(self, fmt, segments, source_file=None, filename=None, options=None):
+        """
+        Generate a single output file
+        
+        Args:
+            fmt (str): Output format (see output_writers.WRITERS)
+            segments (list): List of transcript segments
+            source_file (str, optional): Path or name of the source audio/video file
             filename (str, optional): Output filename (without extension)
+            options (dict, optional): Format specific render options
         
         Returns:
             dict: Result with file path and success status
@@ -51,20 +193,9 @@ class OutputGenerator:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"transcript_{timestamp}"
             
-            output_path = os.path.join(self.output_folder, f"{filename}.txt")
-            
-            with open(output_path, 'w') as f:
-                f.write("TRANSCRIPT WITH TIMECODES\n")
-                f.write("=======================\n\n")
-                
-                for segment in segments:
-                    f.write(f"[{segment['timecode']}] {segment['text']}\n\n")
-            
-            return {
-                "success": True,
-                "file_path": output_path,
-                "filename": os.path.basename(output_path)
-            }
+            result = self.render(segments, source_file, [fmt], filename, options)[fmt]
+            result.pop("elapsed_ms", None)
+            return result
             
         except Exception as e:
             return {
@@ -72,6 +203,19 @@ class OutputGenerator:
                 "error": str(e)
             }
     
+    def generate_txt_output(self, segments, filename=None):
+        """
+        Generate a TXT file from transcript segments
+        
+        Args:
+            segments (list): List of transcript segments
+            filename (str, optional): Output filename (without extension)
+        
+        Returns:
+            dict: Result with file path and success status
+        """
+        return self.generate_output("txt", segments, filename=filename)
+    
     def generate_pdf_output(self, segments, filename=None, include_metadata=True):
         """
         Generate a PDF file from transcript segments
@@ -84,61 +228,8 @@ class OutputGenerator:
         Returns:
             dict: Result with file path and success status
         """
-        try:
-            # Generate default filename if not provided
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"transcript_{timestamp}"
-            
-            output_path = os.path.join(self.output_folder, f"{filename}.pdf")
-            
-            # Create PDF
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Set up fonts
-            pdf.set_font("Arial", 'B', 16)
-            
-            # Add title
-            pdf.cell(0, 10, "TRANSCRIPT WITH TIMECODES", ln=True, align='C')
-            pdf.ln(5)
-            
-            # Add metadata if requested
-            if include_metadata:
-                pdf.set_font("Arial", 'I', 10)
-                pdf.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True)
-                pdf.cell(0, 10, f"Total Segments: {len(segments)}", ln=True)
-                pdf.ln(5)
-            
-            # Add segments
-            pdf.set_font("Arial", size=12)
-            
-            for segment in segments:
-                # Timecode in bold
-                pdf.set_font("Arial", 'B', 12)
-                pdf.cell(0, 10, f"[{segment['timecode']}]", ln=True)
-                
-                # Segment text
-                pdf.set_font("Arial", size=12)
-                
-                # Handle long text with multi_cell
-                pdf.multi_cell(0, 10, segment['text'])
-                pdf.ln(5)
-            
-            # Save PDF
-            pdf.output(output_path)
-            
-            return {
-                "success": True,
-                "file_path": output_path,
-                "filename": os.path.basename(output_path)
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
+        return self.generate_output("pdf", segments, filename=filename,
+                                    options={"include_metadata": include_metadata})
     
     def generate_edl_output(self, segments, source_file, filename=None):
         """
@@ -152,90 +243,80 @@ class OutputGenerator:
         Returns:
             dict: Result with file path and success status
         """
+        # Generate default filename if not provided
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"edl_{timestamp}"
+        
+        return self.generate_output("edl", segments, source_file, filename)
+    
+    def _render_group(self, formats, segments, source_file, base_filename, options, keys):
+        """
+        Render a group of formats into the artifact cache, converting
+        failures into per-format errors
+        """
+        paths = {fmt: self.cache.temp_path(keys[fmt], WRITERS[fmt].extension) for fmt in formats}
         try:
-            # Generate default filename if not provided
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"edl_{timestamp}"
-            
-            output_path = os.path.join(self.output_folder, f"{filename}.edl")
-            
-            with open(output_path, 'w') as f:
-                # EDL header
-                f.write("TITLE: Auto-generated EDL from Retro Transcription Tool\n")
-                f.write("FCM: NON-DROP FRAME\n\n")
-                
-                for i, segment in enumerate(segments):
-                    # Convert timecode to EDL format (HH:MM:SS:FF)
-                    # Extract hours, minutes, seconds from timecode
-                    tc_parts = segment['timecode'].split(':')
-                    hours = int(tc_parts[0])
-                    minutes = int(tc_parts[1])
-                    seconds = int(tc_parts[2])
-                    
-                    # Calculate duration in seconds
-                    duration_sec = segment['duration_ms'] / 1000 if 'duration_ms' in segment else 5.0
-                    
-                    # Calculate end time
-                    end_seconds = seconds + duration_sec
-                    end_minutes = minutes
-                    end_hours = hours
-                    
-                    if end_seconds >= 60:
-                        end_minutes += int(end_seconds / 60)
-                        end_seconds %= 60
-                    
-                    if end_minutes >= 60:
-                        end_hours += int(end_minutes / 60)
-                        end_minutes %= 60
-                    
-                    # Convert to frames (assuming 30fps)
-                    start_frames = 0
-                    end_frames = int((end_seconds % 1) * 30)
-                    
-                    # Format for EDL
-                    start_tc = f"{hours:02d}:{minutes:02d}:{int(seconds):02d}:{start_frames:02d}"
-                    end_tc = f"{end_hours:02d}:{end_minutes:02d}:{int(end_seconds):02d}:{end_frames:02d}"
-                    
-                    # Write EDL entry
-                    f.write(f"{i+1:03d}  AV  C        {start_tc} {end_tc} {start_tc} {end_tc}\n")
-                    f.write(f"* FROM CLIP NAME: {os.path.basename(source_file)}\n")
-                    
-                    # Truncate text if too long
-                    comment_text = segment['text']
-                    if len(comment_text) > 50:
-                        comment_text = comment_text[:47] + "..."
-                    
-                    f.write(f"* COMMENT: {comment_text}\n\n")
-            
-            return {
-                "success": True,
-                "file_path": output_path,
-                "filename": os.path.basename(output_path)
-            }
-            
+            group_results = self.render(segments, source_file, formats, base_filename, options, paths)
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            group_results = {fmt: {"success": False, "error": str(e), "elapsed_ms": 0} for fmt in formats}
+        
+        for fmt, result in group_results.items():
+            if result["success"]:
+                result["file_path"] = self.cache.put(keys[fmt], WRITERS[fmt].extension, result["file_path"])
+            elif os.path.exists(paths[fmt]):
+                os.remove(paths[fmt])
+        
+        return group_results
+    
+    def _collect_result(self, results, fmt, result):
+        """
+        Merge a single format result into the combined results
+        
+        Args:
+            results (dict): Combined results from generate_all_outputs
+            fmt (str): Output format
+            result (dict): Per-format result returned by render
+        """
+        with self._lock:
+            results["timings_ms"][fmt] = result["elapsed_ms"]
+            
+            if result["success"]:
+                results["files"][fmt] = {
+                    "path": result["file_path"],
+                    "filename": result["filename"]
+                }
+            else:
+                results["success"] = False
+                results[f"{fmt}_error"] = result["error"]
     
-    def generate_all_outputs(self, segments, source_file, formats=None, base_filename=None):
+    def generate_all_outputs(self, segments, source_file, formats=None, base_filename=None,
+                             background=False, on_complete=None, options=None):
         """
         Generate all selected output formats
         
+        Fast writers share one pass over the segments and slow writers (PDF)
+        share another; both passes run concurrently on the shared pool. When
+        background is True only the fast pass is waited for and slow formats
+        are reported through on_complete as they finish. Formats already in
+        the artifact cache for the same inputs are returned without rendering.
+        
         Args:
             segments (list): List of transcript segments
             source_file (str): Path or name of the source audio/video file
-            formats (dict, optional): Dictionary of format selections (txt, pdf, edl)
+            formats (dict, optional): Dictionary of format selections (txt, pdf, edl, srt, vtt, json)
             base_filename (str, optional): Base filename for all outputs
+            background (bool): Return as soon as the fast formats are ready
+            on_complete (callable, optional): Called as on_complete(fmt, result)
+                for every format rendered in the background
+            options (dict, optional): Render options passed to every writer
         
         Returns:
-            dict: Dictionary of generated file paths and success status
+            dict: Dictionary of generated file paths, timings and success status
         """
         # Default formats if not specified
         if formats is None:
-            formats = {"txt": True, "pdf": True, "edl": True}
+            formats = {fmt: True for fmt in self.DEFAULT_FORMATS}
         
         # Generate base filename if not provided
         if not base_filename:
@@ -245,41 +326,68 @@ class OutputGenerator:
         # Initialize results
         results = {
             "success": True,
-            "files": {}
+            "files": {},
+            "pending": [],
+            "timings_ms": {}
         }
         
-        # Generate each selected format
-        if formats.get("txt", True):
-            txt_result = self.generate_txt_output(segments, base_filename)
-            if txt_result["success"]:
-                results["files"]["txt"] = {
-                    "path": txt_result["file_path"],
-                    "filename": txt_result["filename"]
-                }
-            else:
-                results["success"] = False
-                results["txt_error"] = txt_result["error"]
-        
-        if formats.get("pdf", True):
-            pdf_result = self.generate_pdf_output(segments, base_filename)
-            if pdf_result["success"]:
-                results["files"]["pdf"] = {
-                    "path": pdf_result["file_path"],
-                    "filename": pdf_result["filename"]
-                }
-            else:
-                results["success"] = False
-                results["pdf_error"] = pdf_result["error"]
-        
-        if formats.get("edl", True):
-            edl_result = self.generate_edl_output(segments, source_file, base_filename)
-            if edl_result["success"]:
-                results["files"]["edl"] = {
-                    "path": edl_result["file_path"],
-                    "filename": edl_result["filename"]
+        # Legacy formats are on unless deselected, new formats are opt-in
+        selected = [fmt for fmt in WRITERS if formats.get(fmt, fmt in self.DEFAULT_FORMATS)]
+        
+        # Serve unchanged exports from the artifact cache
+        digest = segments_digest(segments, source_file)
+        keys = {}
+        for fmt in selected:
+            extension = WRITERS[fmt].extension
+            keys[fmt] = self.cache.make_key(digest, fmt, options)
+            cached_path = self.cache.get(keys[fmt], extension)
+            if cached_path:
+                results["files"][fmt] = {
+                    "path": cached_path,
+                    "filename": f"{base_filename}.{extension}",
+                    "cached": True
                 }
-            else:
-                results["success"] = False
-                results["edl_error"] = edl_result["error"]
+                results["timings_ms"][fmt] = 0
+        
+        selected = [fmt for fmt in selected if fmt not in results["files"]]
+        fast = [fmt for fmt in selected if not WRITERS[fmt].slow]
+        slow = [fmt for fmt in selected if WRITERS[fmt].slow]
+        
+        # One pass per group, both running on the pool
+        if slow:
+            slow_future = self.executor.submit(
+                self._render_group, slow, segments, source_file, base_filename, options, keys
+            )
+        if fast:
+            fast_future = self.executor.submit(
+                self._render_group, fast, segments, source_file, base_filename, options, keys
+            )
+        
+        if fast:
+            for fmt, result in fast_future.result().items():
+                self._collect_result(results, fmt, result)
+        
+        if not slow:
+            return results
+        
+        if not background:
+            for fmt, result in slow_future.result().items():
+                self._collect_result(results, fmt, result)
+            return results
+        
+        # Report the slow formats as they finish
+        results["pending"].extend(slow)
+        
+        def _done(future):
+            try:
+                group_results = future.result()
+            except Exception as e:
+                group_results = {fmt: {"success": False, "error": str(e), "elapsed_ms": 0} for fmt in slow}
+            
+            if on_complete:
+                for fmt, result in group_results.items():
+                    on_complete(fmt, result)
+        
+        slow_future.add_done_callback(_done)
         
         return results
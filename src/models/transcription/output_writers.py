@@ -0,0 +1,451 @@
+"""
+Output Writers Module for the Retro Transcription Web Tool
+Defines the pluggable format writers fed by the output renderer
+"""
+
+import os
+import re
+import json
+from collections import namedtuple
+from datetime import datetime
+from fpdf import FPDF
+
+# Default duration for segments that carry no timing information
+DEFAULT_CUE_DURATION_MS = 5000
+
+# A single up-sot with its timing resolved once for every writer
+Cue = namedtuple("Cue", ["index", "start_ms", "end_ms", "timecode", "text"])
+
+# Characters stripped from text before PDF layout
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f]")
+
+# Registered writers keyed by format name
+WRITERS = {}
+
+
+def register_writer(fmt):
+    """
+    Register a writer class for an output format
+
+    Args:
+        fmt (str): Format name used in format selections and download URLs
+
+    Returns:
+        callable: Class decorator
+    """
+    def decorator(writer_class):
+        writer_class.format_name = fmt
+        WRITERS[fmt] = writer_class
+        return writer_class
+
+    return decorator
+
+
+def split_ms(ms):
+    """
+    Split milliseconds into hours, minutes, seconds and milliseconds
+
+    Args:
+        ms (int): Time in milliseconds
+
+    Returns:
+        tuple: (hours, minutes, seconds, milliseconds)
+    """
+    hours, rem = divmod(int(ms), 3600000)
+    minutes, rem = divmod(rem, 60000)
+    seconds, millis = divmod(rem, 1000)
+    return hours, minutes, seconds, millis
+
+
+def format_hms(ms):
+    """
+    Format milliseconds as HH:MM:SS
+    """
+    hours, minutes, seconds, _ = split_ms(ms)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_edl_timecode(ms, fps=30):
+    """
+    Format milliseconds as an EDL timecode (HH:MM:SS:FF)
+    """
+    hours, minutes, seconds, millis = split_ms(ms)
+    frames = millis * fps // 1000
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}:{frames:02d}"
+
+
+def format_srt_timestamp(ms):
+    """
+    Format milliseconds as an SRT timestamp (HH:MM:SS,mmm)
+    """
+    hours, minutes, seconds, millis = split_ms(ms)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def format_vtt_timestamp(ms):
+    """
+    Format milliseconds as a WebVTT timestamp (HH:MM:SS.mmm)
+    """
+    hours, minutes, seconds, millis = split_ms(ms)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+
+
+def parse_timecode_ms(timecode):
+    """
+    Parse an HH:MM:SS or MM:SS timecode into milliseconds
+
+    Args:
+        timecode (str): Timecode string
+
+    Returns:
+        int: Time in milliseconds (0 if the timecode is invalid)
+    """
+    total = 0
+    for part in str(timecode).split(":"):
+        if not part.isdigit():
+            return 0
+        total = total * 60 + int(part)
+    return total * 1000
+
+
+def make_cue(index, segment):
+    """
+    Resolve the timing of a transcript segment
+
+    Segments produced by the audio processor carry start_ms/end_ms; the
+    timecode string is only parsed for segments that don't. The cue keeps
+    the segment's timecode text as it was written (MM:SS stays MM:SS) for
+    the text formats; SRT, VTT and EDL format start_ms/end_ms themselves.
+
+    Args:
+        index (int): Position of the segment in the rendered list
+        segment (dict): Transcript segment
+
+    Returns:
+        Cue: Segment with integer timing
+    """
+    start_ms = segment.get("start_ms")
+    if start_ms is None:
+        start_ms = parse_timecode_ms(segment.get("timecode", "0"))
+    start_ms = int(start_ms)
+
+    end_ms = segment.get("end_ms")
+    if end_ms is None:
+        end_ms = start_ms + int(segment.get("duration_ms", DEFAULT_CUE_DURATION_MS))
+
+    timecode = segment.get("timecode") or format_hms(start_ms)
+    return Cue(index, start_ms, int(end_ms), timecode, segment.get("text", ""))
+
+
+class OutputWriter:
+    """
+    Base class for output format writers
+
+    The renderer calls begin() once, write() for every cue and end() once.
+    Each call returns the next chunk of the file (str or bytes).
+    """
+
+    format_name = None
+    extension = None
+    mimetype = "text/plain"
+
+    # Slow writers are rendered off-request in background mode
+    slow = False
+
+    # Streamable writers produce their file incrementally and can be sent
+    # to the client as they render
+    streamable = True
+
+    def __init__(self, source_name="", segment_count=0, options=None):
+        """
+        Initialize the writer
+
+        Args:
+            source_name (str): Name of the source audio/video file
+            segment_count (int): Number of cues that will be written
+            options (dict, optional): Format specific render options
+        """
+        self.source_name = source_name
+        self.segment_count = segment_count
+        self.options = options or {}
+
+    def begin(self):
+        return ""
+
+    def write(self, cue):
+        return ""
+
+    def end(self):
+        return ""
+
+
+@register_writer("txt")
+class TxtWriter(OutputWriter):
+    """
+    Plain text transcript with timecodes
+    """
+
+    extension = "txt"
+
+    def begin(self):
+        return "TRANSCRIPT WITH TIMECODES\n=======================\n\n"
+
+    def write(self, cue):
+        return f"[{cue.timecode}] {cue.text}\n\n"
+
+
+class TranscriptPDF(FPDF):
+    """
+    FPDF page template for transcripts
+
+    Every page gets the same running header and a page-numbered footer.
+    """
+
+    FONT_FAMILY = "Helvetica"
+
+    def header(self):
+        self.set_font(self.FONT_FAMILY, 'I', 8)
+        self.cell(0, 6, "Retro Transcription Tool", align='R')
+        self.ln(8)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font(self.FONT_FAMILY, 'I', 8)
+        self.cell(0, 10, f"Page {self.page_no()}", align='C')
+
+
+@register_writer("pdf")
+class PdfWriter(OutputWriter):
+    """
+    PDF transcript with timecodes
+
+    Text is laid out here rather than with multi_cell: words are measured
+    once (widths are cached per word) and each wrapped line is placed with
+    a single text() call, so the cost per segment stays flat for long
+    transcripts.
+    """
+
+    extension = "pdf"
+    mimetype = "application/pdf"
+    slow = True
+    streamable = False
+
+    FONT_SIZE = 12
+    LINE_HEIGHT = 6
+    SEGMENT_GAP = 4
+
+    def begin(self):
+        self.pdf = TranscriptPDF()
+        self.pdf.set_auto_page_break(False)
+        self.pdf.add_page()
+
+        # Add title
+        self.pdf.set_font(TranscriptPDF.FONT_FAMILY, 'B', 16)
+        self.pdf.cell(0, 10, "TRANSCRIPT WITH TIMECODES", new_x="LMARGIN", new_y="NEXT", align='C')
+        self.pdf.ln(5)
+
+        # Add metadata if requested
+        if self.options.get("include_metadata", True):
+            self.pdf.set_font(TranscriptPDF.FONT_FAMILY, 'I', 10)
+            self.pdf.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", new_x="LMARGIN", new_y="NEXT")
+            self.pdf.cell(0, 10, f"Total Segments: {self.segment_count}", new_x="LMARGIN", new_y="NEXT")
+            self.pdf.ln(5)
+
+        # Font setup and page geometry for the body, done once
+        self.style = ''
+        self.pdf.set_font(TranscriptPDF.FONT_FAMILY, self.style, self.FONT_SIZE)
+        self.left = self.pdf.l_margin
+        self.max_width = self.pdf.epw
+        self.bottom = self.pdf.h - 20
+        self.baseline = self.pdf.font_size * 0.8
+        self.space_width = self.pdf.get_string_width(" ")
+        self.word_widths = {}
+        self.y = self.pdf.get_y()
+
+        return b""
+
+    def write(self, cue):
+        lines = self._wrap(self._clean(cue.text))
+
+        # Keep the timecode on the same page as the start of its text
+        if self.y + 2 * self.LINE_HEIGHT > self.bottom:
+            self._new_page()
+
+        # Timecode in bold
+        self._set_style('B')
+        self._line(f"[{cue.timecode}]")
+
+        # Segment text
+        self._set_style('')
+        for line in lines:
+            self._line(line)
+
+        self.y += self.SEGMENT_GAP
+        return b""
+
+    def end(self):
+        return bytes(self.pdf.output())
+
+    def _set_style(self, style):
+        if style != self.style:
+            self.style = style
+            self.pdf.set_font(TranscriptPDF.FONT_FAMILY, style, self.FONT_SIZE)
+
+    def _new_page(self):
+        self.pdf.add_page()
+        self.pdf.set_font(TranscriptPDF.FONT_FAMILY, self.style, self.FONT_SIZE)
+        self.y = self.pdf.get_y()
+
+    def _line(self, text):
+        if self.y + self.LINE_HEIGHT > self.bottom:
+            self._new_page()
+        if text:
+            self.pdf.text(self.left, self.y + self.baseline, text)
+        self.y += self.LINE_HEIGHT
+
+    def _word_width(self, word):
+        width = self.word_widths.get(word)
+        if width is None:
+            width = self.pdf.get_string_width(word)
+            self.word_widths[word] = width
+        return width
+
+    def _wrap(self, text):
+        """
+        Greedy word wrap to the page width using the regular body font
+
+        Args:
+            text (str): Segment text
+
+        Returns:
+            list: Lines of text
+        """
+        lines = []
+        current = []
+        width = 0.0
+
+        for word in text.split():
+            word_width = self._word_width(word)
+
+            # Hard-split words wider than a full line
+            while word_width > self.max_width and len(word) > 1:
+                cut = max(1, int(len(word) * self.max_width / word_width))
+                if current:
+                    lines.append(" ".join(current))
+                    current = []
+                    width = 0.0
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = self._word_width(word)
+
+            extra = word_width if not current else self.space_width + word_width
+            if current and width + extra > self.max_width:
+                lines.append(" ".join(current))
+                current = [word]
+                width = word_width
+            else:
+                current.append(word)
+                width += extra
+
+        if current:
+            lines.append(" ".join(current))
+
+        return lines
+
+    @staticmethod
+    def _clean(text):
+        # Core fonts only cover latin-1
+        text = _CONTROL_CHARS.sub(" ", text)
+        return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+@register_writer("edl")
+class EdlWriter(OutputWriter):
+    """
+    CMX 3600 style EDL for Premiere Pro
+    """
+
+    extension = "edl"
+
+    def begin(self):
+        self.clip_name = os.path.basename(self.source_name)
+        self.fps = int(self.options.get("fps", 30))
+        return "TITLE: Auto-generated EDL from Retro Transcription Tool\nFCM: NON-DROP FRAME\n\n"
+
+    def write(self, cue):
+        start_tc = format_edl_timecode(cue.start_ms, self.fps)
+        end_tc = format_edl_timecode(cue.end_ms, self.fps)
+
+        # Truncate text if too long
+        comment_text = cue.text
+        if len(comment_text) > 50:
+            comment_text = comment_text[:47] + "..."
+
+        return (
+            f"{cue.index + 1:03d}  AV  C        {start_tc} {end_tc} {start_tc} {end_tc}\n"
+            f"* FROM CLIP NAME: {self.clip_name}\n"
+            f"* COMMENT: {comment_text}\n\n"
+        )
+
+
+@register_writer("srt")
+class SrtWriter(OutputWriter):
+    """
+    SubRip subtitles
+    """
+
+    extension = "srt"
+    mimetype = "application/x-subrip"
+
+    def write(self, cue):
+        return (
+            f"{cue.index + 1}\n"
+            f"{format_srt_timestamp(cue.start_ms)} --> {format_srt_timestamp(cue.end_ms)}\n"
+            f"{cue.text}\n\n"
+        )
+
+
+@register_writer("vtt")
+class VttWriter(OutputWriter):
+    """
+    WebVTT subtitles
+    """
+
+    extension = "vtt"
+    mimetype = "text/vtt"
+
+    def begin(self):
+        return "WEBVTT\n\n"
+
+    def write(self, cue):
+        return (
+            f"{format_vtt_timestamp(cue.start_ms)} --> {format_vtt_timestamp(cue.end_ms)}\n"
+            f"{cue.text}\n\n"
+        )
+
+
+@register_writer("json")
+class JsonWriter(OutputWriter):
+    """
+    JSON list of up-sots with millisecond timing
+    """
+
+    extension = "json"
+    mimetype = "application/json"
+
+    def begin(self):
+        return '{"source": %s, "segments": [' % json.dumps(os.path.basename(self.source_name))
+
+    def write(self, cue):
+        entry = json.dumps({
+            "index": cue.index,
+            "timecode": cue.timecode,
+            "start_ms": cue.start_ms,
+            "end_ms": cue.end_ms,
+            "duration_ms": cue.end_ms - cue.start_ms,
+            "text": cue.text
+        })
+        return entry if cue.index == 0 else "," + entry
+
+    def end(self):
+        return "]}\n"
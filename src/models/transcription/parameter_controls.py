@@ -7,6 +7,133 @@ import os
 import json
 from datetime import datetime
 
+def _clean_up_sots_count(value, default):
+    try:
+        # Clamp to valid range
+        return max(0, min(30, int(value)))
+    except (ValueError, TypeError):
+        return default
+
+
+def _clean_sensitivity(value, default):
+    try:
+        # Clamp to valid range
+        return max(0.0, min(1.0, float(value)))
+    except (ValueError, TypeError):
+        return default
+
+
+def _clean_timecode(value, default):
+    # Simple validation for HH:MM:SS format
+    if isinstance(value, str) and len(value) == 8:
+        parts = value.split(":")
+        if len(parts) == 3 and all(part.isdigit() and len(part) == 2 for part in parts):
+            return value
+    return default
+
+
+class Parameters:
+    """
+    Immutable, validated set of transcription and up-sot parameters
+
+    A new value is created per request or session instead of sharing one
+    mutable object, so concurrent users cannot overwrite each other's
+    settings. Values are hashable and compare by content, which makes
+    them usable as cache keys.
+    """
+
+    __slots__ = ("up_sots_count", "sensitivity", "sort_by_relevance", "timecode", "_hash")
+
+    FIELDS = ("up_sots_count", "sensitivity", "sort_by_relevance", "timecode")
+
+    def __init__(self, up_sots_count=10, sensitivity=0.5, sort_by_relevance=False, timecode="00:00:00"):
+        """
+        Create a parameter set, clamping values to their valid ranges
+
+        Args:
+            up_sots_count (int): Number of up-sots to generate (0-30)
+            sensitivity (float): Sensitivity for segmentation (0.0-1.0)
+            sort_by_relevance (bool): Sort by relevance to script
+            timecode (str): Current timecode in HH:MM:SS format
+        """
+        set_field = object.__setattr__
+        set_field(self, "up_sots_count", _clean_up_sots_count(up_sots_count, 10))
+        set_field(self, "sensitivity", _clean_sensitivity(sensitivity, 0.5))
+        set_field(self, "sort_by_relevance", bool(sort_by_relevance))
+        set_field(self, "timecode", _clean_timecode(timecode, "00:00:00"))
+        set_field(self, "_hash", hash((self.up_sots_count, self.sensitivity, self.sort_by_relevance, self.timecode)))
+
+    @classmethod
+    def from_dict(cls, params):
+        """
+        Create a parameter set from a dict such as a stored session's parameters
+
+        Args:
+            params (dict): Parameter values; missing keys use the defaults
+
+        Returns:
+            Parameters: New parameter set
+        """
+        params = params or {}
+        return cls(**{field: params[field] for field in cls.FIELDS if field in params})
+
+    def updated(self, params):
+        """
+        Get a copy with some values changed
+
+        Invalid values keep the current value, as ParameterControls did.
+
+        Args:
+            params (dict): Parameter values to change
+
+        Returns:
+            Parameters: New parameter set
+        """
+        return Parameters(
+            up_sots_count=_clean_up_sots_count(params.get("up_sots_count", self.up_sots_count), self.up_sots_count),
+            sensitivity=_clean_sensitivity(params.get("sensitivity", self.sensitivity), self.sensitivity),
+            sort_by_relevance=params.get("sort_by_relevance", self.sort_by_relevance),
+            timecode=_clean_timecode(params.get("timecode", self.timecode), self.timecode)
+        )
+
+    def to_dict(self):
+        """
+        Get the parameter values as a dict
+
+        Returns:
+            dict: Parameter values
+        """
+        return {
+            "up_sots_count": self.up_sots_count,
+            "sensitivity": self.sensitivity,
+            "sort_by_relevance": self.sort_by_relevance,
+            "timecode": self.timecode
+        }
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Parameters are immutable; use updated()")
+
+    def __delattr__(self, name):
+        raise AttributeError("Parameters are immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Parameters):
+            return NotImplemented
+        return (self.up_sots_count, self.sensitivity, self.sort_by_relevance, self.timecode) == (
+            other.up_sots_count, other.sensitivity, other.sort_by_relevance, other.timecode
+        )
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return (f"Parameters(up_sots_count={self.up_sots_count}, sensitivity={self.sensitivity}, "
+                f"sort_by_relevance={self.sort_by_relevance}, timecode={self.timecode!r})")
+
+    def __reduce__(self):
+        return (Parameters, (self.up_sots_count, self.sensitivity, self.sort_by_relevance, self.timecode))
+
+
 class ParameterControls:
     """
     Handles parameter settings for transcription and up-sot generation
@@ -69,16 +196,9 @@ class ParameterControls:
         Returns:
             int: Updated up-sots count
         """
-        # Validate count
-        try:
-            count_int = int(count)
-            # Clamp to valid range
-            count_int = max(0, min(30, count_int))
-            self.parameters["up_sots_count"] = count_int
-            return count_int
-        except (ValueError, TypeError):
-            # Return current value if invalid
-            return self.parameters["up_sots_count"]
+        # Validate count, keeping the current value if invalid
+        self.parameters["up_sots_count"] = _clean_up_sots_count(count, self.parameters["up_sots_count"])
+        return self.parameters["up_sots_count"]
     
     def set_sensitivity(self, sensitivity):
         """
@@ -90,16 +210,9 @@ class ParameterControls:
         Returns:
             float: Updated sensitivity value
         """
-        # Validate sensitivity
-        try:
-            sens_float = float(sensitivity)
-            # Clamp to valid range
-            sens_float = max(0.0, min(1.0, sens_float))
-            self.parameters["sensitivity"] = sens_float
-            return sens_float
-        except (ValueError, TypeError):
-            # Return current value if invalid
-            return self.parameters["sensitivity"]
+        # Validate sensitivity, keeping the current value if invalid
+        self.parameters["sensitivity"] = _clean_sensitivity(sensitivity, self.parameters["sensitivity"])
+        return self.parameters["sensitivity"]
     
     def set_sort_by_relevance(self, sort_by_relevance):
         """
@@ -125,15 +238,8 @@ class ParameterControls:
         Returns:
             str: Updated timecode
         """
-        # Validate timecode format
-        if isinstance(timecode, str) and len(timecode) == 8:
-            # Simple validation for HH:MM:SS format
-            parts = timecode.split(":")
-            if len(parts) == 3 and all(part.isdigit() and len(part) == 2 for part in parts):
-                self.parameters["timecode"] = timecode
-                return timecode
-        
-        # Return current value if invalid
+        # Validate timecode format, keeping the current value if invalid
+        self.parameters["timecode"] = _clean_timecode(timecode, self.parameters["timecode"])
         return self.parameters["timecode"]
     
     def reset_timecode(self):
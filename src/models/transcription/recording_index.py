@@ -0,0 +1,595 @@
+"""
+Recording Index Module for the Retro Transcription Web Tool
+SQLite index of saved recordings used by the audio storage
+"""
+
+import os
+import re
+import json
+import base64
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Seconds a writer waits for another process to release the database
+BUSY_TIMEOUT_SECONDS = 30
+
+# Schema changes, applied in order and tracked with PRAGMA user_version
+SCHEMA_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS recordings (
+            id TEXT PRIMARY KEY,
+            filename TEXT,
+            path TEXT,
+            date_created TEXT,
+            size_bytes INTEGER,
+            data TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_recordings_date ON recordings (date_created, id)",
+        "CREATE INDEX IF NOT EXISTS idx_recordings_size ON recordings (size_bytes, id)"
+    ],
+    [
+        # Listing support: duration column, tracked file existence and
+        # sort indexes on the exact expressions used by query()
+        "ALTER TABLE recordings ADD COLUMN duration_ms INTEGER",
+        "ALTER TABLE recordings ADD COLUMN file_missing INTEGER NOT NULL DEFAULT 0",
+        "DROP INDEX IF EXISTS idx_recordings_date",
+        "DROP INDEX IF EXISTS idx_recordings_size",
+        "CREATE INDEX idx_recordings_date ON recordings (COALESCE(date_created, ''), id)",
+        "CREATE INDEX idx_recordings_size ON recordings (COALESCE(size_bytes, -1), id)",
+        "CREATE INDEX idx_recordings_duration ON recordings (COALESCE(duration_ms, -1), id)"
+    ],
+    [
+        # Transcript segments of each recording, searchable through
+        # segments_fts when SQLite has FTS5
+        """
+        CREATE TABLE recording_segments (
+            id INTEGER PRIMARY KEY,
+            recording_id TEXT NOT NULL,
+            start_ms INTEGER,
+            end_ms INTEGER,
+            up_sot INTEGER NOT NULL DEFAULT 0,
+            text TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_segments_recording ON recording_segments (recording_id, start_ms)"
+    ]
+]
+
+# External-content FTS5 index over recording_segments, kept in sync by triggers
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE segments_fts USING fts5(text, content='recording_segments', content_rowid='id')",
+    """
+    CREATE TRIGGER segments_fts_insert AFTER INSERT ON recording_segments BEGIN
+        INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER segments_fts_delete AFTER DELETE ON recording_segments BEGIN
+        INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    "INSERT INTO segments_fts (segments_fts) VALUES ('rebuild')"
+]
+
+# Recording fields mirrored into indexed columns
+INDEXED_FIELDS = ("filename", "path", "date_created", "size_bytes", "duration_ms")
+
+# Sort keys accepted by query(), matching the expression indexes above
+SORT_EXPRESSIONS = {
+    "date": "COALESCE(date_created, '')",
+    "size": "COALESCE(size_bytes, -1)",
+    "duration": "COALESCE(duration_ms, -1)"
+}
+
+# Filters accepted by query(): name -> (column, operator)
+FILTER_CONDITIONS = {
+    "date_from": ("date_created", ">="),
+    "date_to": ("date_created", "<="),
+    "min_size": ("size_bytes", ">="),
+    "max_size": ("size_bytes", "<="),
+    "min_duration": ("duration_ms", ">="),
+    "max_duration": ("duration_ms", "<=")
+}
+
+_COLUMNS = ("id",) + INDEXED_FIELDS + ("data",)
+_INSERT_SQL = "INTO recordings ({}) VALUES ({})".format(", ".join(_COLUMNS), ", ".join("?" for _ in _COLUMNS))
+_UPDATE_SQL = "UPDATE recordings SET {} WHERE id = ?".format(", ".join(f"{column} = ?" for column in _COLUMNS[1:]))
+
+
+def encode_cursor(sort_value, recording_id):
+    """
+    Encode a listing position as an opaque cursor string
+    """
+    raw = json.dumps([sort_value, recording_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        sort_value, recording_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return sort_value, recording_id
+
+
+class RecordingIndex:
+    """
+    Stores recording metadata in SQLite (WAL mode)
+
+    Each recording is one row keyed by its ID. The full metadata dict is
+    kept as JSON in the data column, and the fields used for lookups and
+    sorting are mirrored into indexed columns.
+
+    The index is safe to share between gunicorn workers: SQLite serialises
+    writers across processes, every read-modify-write runs in an IMMEDIATE
+    transaction, and one-time setup (schema migrations, legacy import)
+    runs under an inter-process file lock.
+    """
+
+    def __init__(self, db_path, legacy_json_path=None):
+        """
+        Initialize the recording index
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            legacy_json_path (str, optional): recordings_metadata.json to import once
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self.logger = logging.getLogger("RecordingIndex")
+
+        with self.setup_lock():
+            self._migrate_schema()
+            self.full_text = self._setup_full_text()
+
+            if legacy_json_path and os.path.exists(legacy_json_path):
+                self.import_json(legacy_json_path)
+
+    @contextmanager
+    def setup_lock(self):
+        """
+        Hold an exclusive lock shared by every process using this index
+
+        Used for one-time maintenance such as migrations, so that only one
+        worker performs it while the others wait and then see the result.
+        """
+        with open(self.db_path + ".lock", 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _connect(self):
+        """
+        Get the connection for the current thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=BUSY_TIMEOUT_SECONDS)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_SECONDS * 1000}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_schema(self):
+        conn = self._connect()
+
+        for number, statements in enumerate(SCHEMA_MIGRATIONS, start=1):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-read inside the write transaction in case another process migrated
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= number:
+                    conn.execute("COMMIT")
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _setup_full_text(self):
+        """
+        Create the FTS5 segment index if this SQLite build supports it
+
+        Returns:
+            bool: Whether full-text search is available
+        """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'segments_fts'").fetchone():
+            return True
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in FTS_SCHEMA:
+                conn.execute(statement)
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.OperationalError as e:
+            conn.execute("ROLLBACK")
+            self.logger.warning(f"FTS5 not available, transcript search will use LIKE: {e}")
+            return False
+
+    @staticmethod
+    def _row_values(recording_info):
+        return [recording_info.get("id")] + [recording_info.get(field) for field in INDEXED_FIELDS] + [
+            json.dumps(recording_info)
+        ]
+
+    def add(self, recording_info):
+        """
+        Add a recording
+
+        Args:
+            recording_info (dict): Recording metadata including its id
+        """
+        self._connect().execute("INSERT OR REPLACE " + _INSERT_SQL, self._row_values(recording_info))
+
+    def get(self, recording_id):
+        """
+        Get a recording by ID
+
+        Args:
+            recording_id (str): ID of the recording
+
+        Returns:
+            dict: Recording metadata, or None if not found
+        """
+        row = self._connect().execute(
+            "SELECT data FROM recordings WHERE id = ?", (recording_id,)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def update(self, recording_id, fields):
+        """
+        Merge fields into a recording's metadata
+
+        Args:
+            recording_id (str): ID of the recording
+            fields (dict): Fields to set
+
+        Returns:
+            dict: Updated metadata, or None if not found
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM recordings WHERE id = ?", (recording_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+
+            recording_info = json.loads(row["data"])
+            recording_info.update(fields)
+            conn.execute(_UPDATE_SQL, self._row_values(recording_info)[1:] + [recording_id])
+            conn.execute("COMMIT")
+            return recording_info
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, recording_id):
+        """
+        Remove a recording
+
+        Args:
+            recording_id (str): ID of the recording
+
+        Returns:
+            bool: Whether a recording was removed
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute("DELETE FROM recordings WHERE id = ?", (recording_id,))
+            conn.execute("DELETE FROM recording_segments WHERE recording_id = ?", (recording_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount > 0
+
+    def remove_many(self, recording_ids):
+        """
+        Remove several recordings in one transaction
+
+        Args:
+            recording_ids (list): IDs of the recordings
+
+        Returns:
+            list: Metadata of the recordings that were removed
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = []
+            for recording_id in recording_ids:
+                row = conn.execute("SELECT data FROM recordings WHERE id = ?", (recording_id,)).fetchone()
+                if row is None:
+                    continue
+                conn.execute("DELETE FROM recordings WHERE id = ?", (recording_id,))
+                conn.execute("DELETE FROM recording_segments WHERE recording_id = ?", (recording_id,))
+                removed.append(json.loads(row["data"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def all(self):
+        """
+        Get every recording, oldest first
+
+        Returns:
+            list: Recording metadata dicts
+        """
+        rows = self._connect().execute("SELECT data FROM recordings ORDER BY date_created, id")
+        return [json.loads(row["data"]) for row in rows]
+
+    def set_file_missing(self, recording_id, missing):
+        """
+        Record whether a recording's audio file is missing on disk
+
+        Only writes when the flag changes, so it can be called on every read.
+
+        Args:
+            recording_id (str): ID of the recording
+            missing (bool): Whether the file is missing
+        """
+        conn = self._connect()
+        value = 1 if missing else 0
+        row = conn.execute("SELECT file_missing FROM recordings WHERE id = ?", (recording_id,)).fetchone()
+        if row is not None and row["file_missing"] != value:
+            conn.execute("UPDATE recordings SET file_missing = ? WHERE id = ?", (value, recording_id))
+
+    @staticmethod
+    def _filter_clause(filters):
+        """
+        Build the WHERE conditions for listing filters
+
+        Raises:
+            ValueError: If a filter name is unknown
+        """
+        where = ["file_missing = 0"]
+        params = []
+
+        for name, value in (filters or {}).items():
+            if name not in FILTER_CONDITIONS:
+                raise ValueError(f"Invalid filter: {name}")
+            column, operator = FILTER_CONDITIONS[name]
+            where.append(f"{column} {operator} ?")
+            params.append(value)
+
+        return where, params
+
+    def select_ids(self, filters=None):
+        """
+        Get the IDs of every recording matching listing filters
+
+        Args:
+            filters (dict, optional): Filters from FILTER_CONDITIONS
+
+        Returns:
+            list: Recording IDs, oldest first
+        """
+        where, params = self._filter_clause(filters)
+        rows = self._connect().execute(
+            f"SELECT id FROM recordings WHERE {' AND '.join(where)} ORDER BY COALESCE(date_created, ''), id",
+            params
+        )
+        return [row["id"] for row in rows]
+
+    def query(self, sort="date", order="desc", limit=50, cursor=None, filters=None):
+        """
+        Get one page of recordings using keyset pagination
+
+        Pages are read straight off the sort index, so the cost of a page
+        does not depend on how many recordings come before it.
+
+        Args:
+            sort (str): Sort key (date, size or duration)
+            order (str): asc or desc
+            limit (int): Maximum number of recordings to return
+            cursor (str, optional): Cursor returned with the previous page
+            filters (dict, optional): Filters from FILTER_CONDITIONS
+
+        Returns:
+            tuple: (list of recording metadata, next cursor or None)
+
+        Raises:
+            ValueError: If the sort key, order, filter or cursor is invalid
+        """
+        if sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Invalid sort key: {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid sort order: {order}")
+
+        expression = SORT_EXPRESSIONS[sort]
+        where, params = self._filter_clause(filters)
+
+        if cursor:
+            sort_value, recording_id = decode_cursor(cursor)
+            comparison = "<" if order == "desc" else ">"
+            where.append(f"({expression}, id) {comparison} (?, ?)")
+            params.extend([sort_value, recording_id])
+
+        direction = "DESC" if order == "desc" else "ASC"
+        rows = self._connect().execute(
+            f"SELECT data, {expression} AS sort_value, id FROM recordings "
+            f"WHERE {' AND '.join(where)} "
+            f"ORDER BY {expression} {direction}, id {direction} LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["sort_value"], rows[-1]["id"])
+
+        return [json.loads(row["data"]) for row in rows], next_cursor
+
+    def set_segments(self, recording_id, segments, up_sots=None):
+        """
+        Replace the stored transcript of a recording
+
+        Args:
+            recording_id (str): ID of the recording
+            segments (list): Transcript segments with text and start_ms/end_ms
+            up_sots (list, optional): Segments selected as up-sots
+
+        Returns:
+            int: Number of segments stored
+        """
+        up_sot_starts = {segment.get("start_ms") for segment in (up_sots or [])}
+        rows = [
+            (
+                recording_id,
+                segment.get("start_ms"),
+                segment.get("end_ms"),
+                1 if segment.get("start_ms") in up_sot_starts else 0,
+                segment.get("text", "")
+            )
+            for segment in segments
+            if segment.get("text")
+        ]
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM recording_segments WHERE recording_id = ?", (recording_id,))
+            conn.executemany(
+                "INSERT INTO recording_segments (recording_id, start_ms, end_ms, up_sot, text) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def get_segments(self, recording_id):
+        """
+        Get the stored transcript of a recording
+
+        Args:
+            recording_id (str): ID of the recording
+
+        Returns:
+            list: Segments with start_ms, end_ms, up_sot and text, in time order
+        """
+        rows = self._connect().execute(
+            "SELECT start_ms, end_ms, up_sot, text FROM recording_segments "
+            "WHERE recording_id = ? ORDER BY start_ms, id",
+            (recording_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def search_segments(self, text, limit=100, up_sots_only=False):
+        """
+        Find transcript segments containing every word of a query
+
+        Uses the FTS5 index (best matches first) when available, otherwise
+        a LIKE scan in recording order.
+
+        Args:
+            text (str): Search text
+            limit (int): Maximum number of segments to return
+            up_sots_only (bool): Only match segments selected as up-sots
+
+        Returns:
+            list: Matching segments as dicts with recording_id, start_ms, end_ms, up_sot and text
+        """
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+
+        extra = " AND s.up_sot = 1" if up_sots_only else ""
+
+        if self.full_text:
+            # Quote every word so query syntax in user input is taken literally
+            match = " ".join('"{}"'.format(word) for word in words)
+            rows = self._connect().execute(
+                "SELECT s.recording_id, s.start_ms, s.end_ms, s.up_sot, s.text "
+                "FROM segments_fts JOIN recording_segments s ON s.id = segments_fts.rowid "
+                f"WHERE segments_fts MATCH ?{extra} ORDER BY segments_fts.rank LIMIT ?",
+                (match, limit)
+            )
+        else:
+            conditions = " AND ".join("s.text LIKE ? ESCAPE '\\'" for _ in words)
+            patterns = ["%" + re.sub(r"([%_\\])", r"\\\1", word) + "%" for word in words]
+            rows = self._connect().execute(
+                "SELECT s.recording_id, s.start_ms, s.end_ms, s.up_sot, s.text FROM recording_segments s "
+                f"WHERE {conditions}{extra} ORDER BY s.recording_id, s.start_ms LIMIT ?",
+                patterns + [limit]
+            )
+
+        return [dict(row) for row in rows]
+
+    def count(self):
+        """
+        Get the number of recordings
+        """
+        return self._connect().execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def import_json(self, json_path):
+        """
+        Import recordings from the legacy JSON metadata file
+
+        The file is renamed to <name>.migrated once its entries are in the
+        index so the import runs only once. An unreadable file (for example
+        one truncated by a crash mid-write) is set aside as <name>.corrupt
+        instead of being treated as an empty library.
+
+        Args:
+            json_path (str): Path to recordings_metadata.json
+
+        Returns:
+            int: Number of recordings imported
+        """
+        try:
+            with open(json_path, 'r') as f:
+                recordings = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Could not parse {json_path}, keeping it as .corrupt: {e}")
+            os.replace(json_path, json_path + ".corrupt")
+            return 0
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            imported = 0
+            for recording_info in recordings:
+                if not recording_info.get("id"):
+                    continue
+                cursor = conn.execute("INSERT OR IGNORE " + _INSERT_SQL, self._row_values(recording_info))
+                imported += cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        os.replace(json_path, json_path + ".migrated")
+        return imported
@@ -9,6 +9,7 @@ import json
 import difflib
 from datetime import datetime
 import tempfile
+import numpy as np
 
 class ScriptMatcher:
     """
@@ -201,6 +202,29 @@ class ScriptMatcher:
         
         return scored_segments
     
+    def score_segment_table(self, table):
+        """
+        Score the segments of a SegmentTable against the reference script
+        
+        Unlike score_transcript_segments, no segment is copied: the scores
+        go into a float array on a table that shares the other columns.
+        
+        Args:
+            table (SegmentTable): Transcript segments
+        
+        Returns:
+            SegmentTable: Table with relevance scores and matched sentences
+        """
+        scores = np.empty(len(table))
+        matched = [None] * len(table)
+        
+        for i in range(len(table)):
+            match_result = self.match_transcript_segment(table.text(i))
+            scores[i] = match_result["relevance_score"]
+            matched[i] = match_result["matched_sentences"]
+        
+        return table.with_scores(scores, matched)
+    
     def sort_segments_by_relevance(self, segments):
         """
         Sort transcript segments by relevance to the reference script
@@ -0,0 +1,261 @@
+"""
+Segment Table Module for the Retro Transcription Web Tool
+Columnar storage of transcript segments for filtering and ranking
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from src.models.transcription.output_writers import format_hms, parse_timecode_ms
+
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+
+# Tables kept by SegmentTableCache unless SEGMENT_TABLE_CACHE_SIZE is set
+DEFAULT_CACHE_SIZE = 64
+
+
+class SegmentTable:
+    """
+    Transcript segments stored column by column
+
+    Timing lives in int64 arrays, all segment text in one string addressed
+    by an offsets array, and relevance scores in a float64 array (NaN for
+    unscored segments). Filtering and ordering are array operations; dicts
+    are only built by to_dicts() when segments leave the process as JSON.
+    """
+
+    __slots__ = ("start_ms", "end_ms", "duration_ms", "scores", "_text", "_offsets", "_matched")
+
+    def __init__(self, start_ms, end_ms, duration_ms, text, offsets, scores=None, matched=None):
+        """
+        Initialize the table from its columns
+
+        Args:
+            start_ms (ndarray): Segment start times
+            end_ms (ndarray): Segment end times
+            duration_ms (ndarray): Segment durations
+            text (str): Text of every segment, concatenated
+            offsets (ndarray): Start of each segment's text in text, plus the end
+            scores (ndarray, optional): Relevance scores, NaN where unscored
+            matched (list, optional): Matched script sentences per segment
+        """
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.duration_ms = duration_ms
+        self._text = text
+        self._offsets = offsets
+        self.scores = scores if scores is not None else np.full(len(start_ms), np.nan)
+        self._matched = matched
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        Build a table from segment dicts
+
+        Args:
+            segments (list): Segments with text and start_ms/end_ms/duration_ms
+                (or just a timecode), optionally relevance_score and matched_sentences
+
+        Returns:
+            SegmentTable: Table holding the same segments
+        """
+        count = len(segments)
+        starts = [segment.get("start_ms") for segment in segments]
+        ends = [segment.get("end_ms") for segment in segments]
+        durations = [segment.get("duration_ms") for segment in segments]
+
+        # Fill in timing for segments that only carry part of it
+        if None in starts or None in ends or None in durations:
+            for i, segment in enumerate(segments):
+                if starts[i] is None:
+                    starts[i] = parse_timecode_ms(segment.get("timecode", "0"))
+                if ends[i] is None:
+                    ends[i] = starts[i] + (durations[i] or 0)
+                if durations[i] is None:
+                    durations[i] = ends[i] - starts[i]
+
+        scores = np.array(
+            [segment.get("relevance_score", np.nan) for segment in segments], dtype=np.float64
+        ) if count else np.empty(0)
+
+        matched = None
+        if any("matched_sentences" in segment for segment in segments):
+            matched = [segment.get("matched_sentences") for segment in segments]
+
+        texts = [segment.get("text", "") for segment in segments]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+
+        return cls(
+            np.array(starts, dtype=np.int64),
+            np.array(ends, dtype=np.int64),
+            np.array(durations, dtype=np.int64),
+            "".join(texts),
+            offsets,
+            scores,
+            matched
+        )
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    def text(self, i):
+        """
+        Get the text of one segment
+        """
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+    def with_scores(self, scores, matched=None):
+        """
+        Get a table sharing this one's columns with new relevance scores
+
+        Args:
+            scores (ndarray): Relevance score per segment, NaN where unscored
+            matched (list, optional): Matched script sentences per segment
+
+        Returns:
+            SegmentTable: Scored table
+        """
+        return SegmentTable(self.start_ms, self.end_ms, self.duration_ms, self._text, self._offsets,
+                            scores, matched if matched is not None else self._matched)
+
+    def jaccard_scores(self, words, indices=None):
+        """
+        Score segments by Jaccard similarity of their words with a word set
+
+        Args:
+            words (set): Lowercase reference words
+            indices (ndarray, optional): Segments to score, all if omitted
+
+        Returns:
+            ndarray: Scores, NaN for segments that were not scored
+        """
+        scores = np.full(len(self), np.nan)
+        if indices is None:
+            indices = np.arange(len(self))
+
+        for i in indices.tolist():
+            segment_words = set(_WORD_PATTERN.findall(self.text(i).lower()))
+            if words and segment_words:
+                scores[i] = len(words & segment_words) / len(words | segment_words)
+            else:
+                scores[i] = 0.0
+        return scores
+
+    def rank(self, min_duration_ms=0, by_score=False, limit=0):
+        """
+        Filter by duration and order segments
+
+        Args:
+            min_duration_ms (float): Minimum segment duration
+            by_score (bool): Order by descending score instead of start time
+            limit (int): Maximum number of segments (0 for all)
+
+        Returns:
+            ndarray: Indices of the selected segments in order
+        """
+        candidates = np.flatnonzero(self.duration_ms >= min_duration_ms)
+        keys = -self.scores[candidates] if by_score else self.start_ms[candidates]
+
+        if limit > 0 and limit < len(candidates):
+            # Only the top segments need a full sort. Ties are broken by
+            # position so the result matches a stable sort of every candidate.
+            cutoff = np.partition(keys, limit - 1)[limit - 1]
+            candidates = candidates[keys <= cutoff]
+            keys = keys[keys <= cutoff]
+
+        order = candidates[np.argsort(keys, kind="stable")]
+        return order[:limit] if limit > 0 else order
+
+    def to_dicts(self, indices=None):
+        """
+        Build segment dicts for JSON responses and storage
+
+        Args:
+            indices (ndarray, optional): Segments to include, in order; all if omitted
+
+        Returns:
+            list: Segment dicts in the original format
+        """
+        if indices is None:
+            indices = range(len(self))
+
+        starts = self.start_ms
+        result = []
+        for i in np.asarray(indices).tolist():
+            segment = {
+                "timecode": format_hms(starts[i]),
+                "text": self.text(i),
+                "start_ms": int(starts[i]),
+                "end_ms": int(self.end_ms[i]),
+                "duration_ms": int(self.duration_ms[i])
+            }
+            if not np.isnan(self.scores[i]):
+                segment["relevance_score"] = float(self.scores[i])
+            if self._matched is not None and self._matched[i] is not None:
+                segment["matched_sentences"] = self._matched[i]
+            result.append(segment)
+        return result
+
+    def nbytes(self):
+        """
+        Approximate memory used by the table
+        """
+        arrays = (self.start_ms, self.end_ms, self.duration_ms, self.scores, self._offsets)
+        return sum(array.nbytes for array in arrays) + len(self._text.encode("utf-8"))
+
+
+class SegmentTableCache:
+    """
+    Tables built from stored transcripts, kept for reuse
+
+    Building a table costs more than one ranking of the segment dicts, so
+    it only pays off when the same transcript is ranked again, as it is
+    whenever a session's parameters or script change. Tables are never
+    modified once built and may be shared between threads. The least
+    recently used table is dropped once max_tables are kept.
+    """
+
+    def __init__(self, max_tables=None):
+        """
+        Initialize the cache
+
+        Args:
+            max_tables (int, optional): Maximum number of tables kept
+        """
+        self.max_tables = max_tables or int(os.environ.get("SEGMENT_TABLE_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cached table
+
+        Args:
+            key (hashable): Identifies the transcript, including its version
+
+        Returns:
+            SegmentTable: The table, or None if it is not cached
+        """
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+            return table
+
+    def put(self, key, table):
+        """
+        Cache a table
+
+        Args:
+            key (hashable): Identifies the transcript, including its version
+            table (SegmentTable): Table built from the transcript
+        """
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
@@ -0,0 +1,398 @@
+"""
+Session Store Module for the Retro Transcription Web Tool
+Keeps transcription sessions in a bounded local cache or a shared database
+"""
+
+import os
+import copy
+import json
+import time
+import zlib
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Seconds a session lives after it was last saved
+DEFAULT_SESSION_TTL = 24 * 3600
+
+# Sessions kept by the in-process store before the least recently used is dropped
+DEFAULT_MAX_SESSIONS = 1000
+
+# Seconds a writer waits for another process to release the database
+BUSY_TIMEOUT_SECONDS = 30
+
+# Seconds between sweeps for expired rows in the shared store
+PURGE_INTERVAL_SECONDS = 60
+
+
+# Keys the store adds to every session to track what changed in which version
+VERSION_KEY = '_version'
+CHANGES_KEY = '_changes'
+
+
+def session_files(session):
+    """
+    List the files a session refers to
+
+    Args:
+        session (dict): Session data
+
+    Returns:
+        list: Paths of the session audio and generated outputs
+    """
+    files = [session.get('audio_file')]
+    files.extend(file_info.get('path') for file_info in session.get('outputs', {}).values())
+    return [path for path in files if path]
+
+
+def tracked_lists(session):
+    """
+    Get the session lists whose items are versioned one by one
+
+    Args:
+        session (dict): Session data
+
+    Returns:
+        dict: List name to items
+    """
+    transcription = session.get('transcription')
+    return {
+        'up_sots': session.get('up_sots') or [],
+        'segments': (transcription.get('segments') if isinstance(transcription, dict) else None) or []
+    }
+
+
+def _digest(value):
+    return zlib.crc32(json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def stamp_version(session, previous):
+    """
+    Give a session the next version and record what changed in it
+
+    Each top-level field and each item of the tracked lists keeps the
+    version it last changed in, detected by comparing content digests
+    with the previously stored session. Removed fields are kept as
+    tombstones so clients polling for changes can drop them.
+
+    Args:
+        session (dict): Session about to be stored, updated in place
+        previous (dict): Currently stored session, or None
+    """
+    previous = previous or {}
+    version = previous.get(VERSION_KEY, 0) + 1
+    old_changes = previous.get(CHANGES_KEY) or {'fields': {}, 'items': {}}
+
+    fields = {}
+    for key, value in session.items():
+        if key in (VERSION_KEY, CHANGES_KEY):
+            continue
+        if key == 'transcription' and isinstance(value, dict):
+            # Segments are versioned per item
+            value = {name: item for name, item in value.items() if name != 'segments'}
+        digest = _digest(value)
+        old = old_changes['fields'].get(key)
+        fields[key] = old if old and old[0] == digest else [digest, version]
+    for key, old in old_changes['fields'].items():
+        if key not in fields:
+            fields[key] = old if old[0] is None else [None, version]
+
+    items = {}
+    for name, values in tracked_lists(session).items():
+        old_items = old_changes['items'].get(name) or {'digest': None, 'stamps': []}
+        list_digest = _digest(values)
+        if list_digest == old_items['digest']:
+            # Unchanged list: skip the per-item digests
+            items[name] = old_items
+            continue
+
+        stamps = []
+        for i, value in enumerate(values):
+            digest = _digest(value)
+            old = old_items['stamps'][i] if i < len(old_items['stamps']) else None
+            stamps.append(old if old and old[0] == digest else [digest, version])
+        items[name] = {'digest': list_digest, 'stamps': stamps}
+
+    session[VERSION_KEY] = version
+    session[CHANGES_KEY] = {'fields': fields, 'items': items}
+
+
+class SessionStore:
+    """
+    Interface for session storage
+
+    get() returns a session dict that the caller owns: changes are only
+    kept once they are passed back to save(). Changes that may race with
+    other requests or background work go through update(), which applies
+    a function to the current session atomically. Every save and update
+    bumps the session's version (see stamp_version()).
+    """
+
+    def get(self, session_id):
+        """
+        Get a session
+
+        Args:
+            session_id (str): ID of the session
+
+        Returns:
+            dict: Session data, or None if unknown or expired
+        """
+        raise NotImplementedError
+
+    def save(self, session_id, session):
+        """
+        Store a session, replacing any previous version
+
+        Args:
+            session_id (str): ID of the session
+            session (dict): Session data
+        """
+        raise NotImplementedError
+
+    def update(self, session_id, mutate):
+        """
+        Apply a change to a session atomically
+
+        Args:
+            session_id (str): ID of the session
+            mutate (callable): Called with the current session dict to modify it in place
+
+        Returns:
+            dict: The updated session, or None if unknown or expired
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        """
+        Remove a session
+
+        Args:
+            session_id (str): ID of the session
+        """
+        raise NotImplementedError
+
+    def referenced_files(self):
+        """
+        List the files referenced by every live session
+        """
+        raise NotImplementedError
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions kept in this process, bounded by count and age
+
+    Sessions are evicted least recently used first once max_sessions is
+    reached, and expire ttl seconds after they were last saved. Sessions
+    are copied on the way in and out, so a caller's changes are only
+    kept once saved, as with the shared store.
+    """
+
+    def __init__(self, max_sessions=None, ttl=None):
+        """
+        Initialize the store
+
+        Args:
+            max_sessions (int, optional): Maximum number of sessions kept
+            ttl (float, optional): Seconds a session lives after its last save
+        """
+        self.max_sessions = max_sessions or int(os.environ.get("SESSION_MAX", DEFAULT_MAX_SESSIONS))
+        self.ttl = ttl or float(os.environ.get("SESSION_TTL", DEFAULT_SESSION_TTL))
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _live(self, session_id):
+        # Called with the lock held
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+
+    def _store(self, session_id, session):
+        # Called with the lock held, with a stamped dict no caller holds
+        self._sessions[session_id] = (time.time() + self.ttl, session)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._live(session_id)
+            return copy.deepcopy(session) if session is not None else None
+
+    def save(self, session_id, session):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            # The caller's dict gets the new version too
+            stamp_version(session, entry[1] if entry else None)
+            self._store(session_id, copy.deepcopy(session))
+
+    def update(self, session_id, mutate):
+        with self._lock:
+            current = self._live(session_id)
+            if current is None:
+                return None
+            session = copy.deepcopy(current)
+            mutate(session)
+            stamp_version(session, current)
+            self._store(session_id, session)
+            return copy.deepcopy(session)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def referenced_files(self):
+        now = time.time()
+        with self._lock:
+            sessions = [session for expires, session in self._sessions.values() if expires >= now]
+        for session in sessions:
+            yield from session_files(session)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions shared by every worker process through SQLite (WAL mode)
+
+    Each session is stored as compact JSON compressed with zlib, next to
+    the list of files it refers to so the storage collector can read
+    references without decoding sessions. Rows expire ttl seconds after
+    their last save and are purged periodically.
+    """
+
+    def __init__(self, db_path=None, ttl=None):
+        """
+        Initialize the store
+
+        Args:
+            db_path (str, optional): Path to the SQLite database file
+            ttl (float, optional): Seconds a session lives after its last save
+        """
+        self.db_path = db_path or os.environ.get(
+            "SESSION_DB_PATH", os.path.join(tempfile.gettempdir(), 'retro_transcription_sessions.db')
+        )
+        self.ttl = ttl or float(os.environ.get("SESSION_TTL", DEFAULT_SESSION_TTL))
+        self._local = threading.local()
+        self._last_purge = 0
+
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                files TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+            """
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires)")
+
+    def _connect(self):
+        """
+        Get the connection for the current thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=BUSY_TIMEOUT_SECONDS)
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_SECONDS * 1000}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode(session):
+        return zlib.compress(json.dumps(session, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _decode(data):
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    def _write(self, conn, session_id, session):
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, files, expires) VALUES (?, ?, ?, ?)",
+            (session_id, self._encode(session), json.dumps(session_files(session)), time.time() + self.ttl)
+        )
+
+    def get(self, session_id):
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE id = ? AND expires >= ?", (session_id, time.time())
+        ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def save(self, session_id, session):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            stamp_version(session, self._decode(row[0]) if row else None)
+            self._write(conn, session_id, session)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._purge_expired()
+
+    def update(self, session_id, mutate):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires >= ?", (session_id, time.time())
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+
+            session = self._decode(row[0])
+            previous = {VERSION_KEY: session.get(VERSION_KEY, 0), CHANGES_KEY: session.get(CHANGES_KEY)}
+            mutate(session)
+            stamp_version(session, previous)
+            self._write(conn, session_id, session)
+            conn.execute("COMMIT")
+            return session
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, session_id):
+        self._connect().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def referenced_files(self):
+        rows = self._connect().execute("SELECT files FROM sessions WHERE expires >= ?", (time.time(),))
+        for row in rows.fetchall():
+            yield from json.loads(row[0])
+
+    def _purge_expired(self):
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        self._connect().execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+
+def create_session_store():
+    """
+    Create the session store selected by the SESSION_STORE environment variable
+
+    Use "sqlite" (the default) when running several worker processes, or
+    "memory" for a single process.
+
+    Returns:
+        SessionStore: The configured store
+    """
+    backend = os.environ.get("SESSION_STORE", "sqlite").lower()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session store: {backend}")
@@ -0,0 +1,273 @@
+"""
+Storage Garbage Collector Module for the Retro Transcription Web Tool
+Expires temporary uploads, outputs and scripts in small incremental sweeps
+"""
+
+import os
+import time
+import logging
+import threading
+
+
+class StorageCollector:
+    """
+    Background collector for the temporary working folders
+
+    Each tick examines at most io_budget directory entries, resuming the
+    scan where the previous tick stopped. Files older than the folder TTL
+    that are not referenced by a live session or library entry are
+    removed. After a full pass over a folder, the oldest unreferenced
+    files are removed until the folder fits its size quota.
+    """
+
+    def __init__(self, reference_providers=None, interval=None, io_budget=None):
+        """
+        Initialize the collector
+
+        Args:
+            reference_providers (list, optional): Callables returning paths that must be kept
+            interval (float, optional): Seconds between ticks
+            io_budget (int, optional): Maximum stats/deletes per tick
+        """
+        self.interval = interval if interval is not None else float(os.environ.get("STORAGE_GC_INTERVAL", 60))
+        self.io_budget = io_budget if io_budget is not None else int(os.environ.get("STORAGE_GC_IO_BUDGET", 200))
+        self.reference_providers = list(reference_providers or [])
+
+        self.folders = []
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.logger = logging.getLogger("StorageCollector")
+
+    def add_folder(self, name, path, ttl_seconds=None, max_bytes=None):
+        """
+        Register a folder to collect
+
+        Args:
+            name (str): Name used in statistics
+            path (str): Folder path
+            ttl_seconds (float, optional): Age after which unreferenced files expire
+            max_bytes (int, optional): Size quota for the folder (0 for none)
+        """
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get("STORAGE_GC_TTL", 24 * 3600))
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("STORAGE_GC_MAX_BYTES", 1024 * 1024 * 1024))
+
+        with self._lock:
+            self.folders.append({
+                "name": name,
+                "path": path,
+                "ttl": ttl_seconds,
+                "max_bytes": max_bytes,
+                "pending_dirs": [],
+                "scan": None,
+                "survivors": [],
+                "referenced": None,
+                "quota_queue": [],
+                "pass_files": 0,
+                "pass_bytes": 0,
+                "stats": {
+                    "passes": 0,
+                    "files_removed": 0,
+                    "bytes_removed": 0,
+                    "files_removed_quota": 0,
+                    "bytes_removed_quota": 0,
+                    "last_pass_bytes": 0,
+                    "last_pass_files": 0,
+                    "last_pass_finished": None
+                }
+            })
+
+    def add_reference_provider(self, provider):
+        """
+        Register a callable returning paths that must not be collected
+        """
+        with self._lock:
+            self.reference_providers.append(provider)
+
+    def start(self):
+        """
+        Start the background collection thread
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="storage-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background collection thread
+        """
+        self._stop.set()
+
+    def tick(self):
+        """
+        Run one bounded step of collection
+
+        Returns:
+            int: Number of I/O operations spent
+        """
+        with self._lock:
+            if not self.folders:
+                return 0
+
+            budget = self.io_budget
+            # Visit folders round-robin so one large folder can't starve the rest
+            for _ in range(len(self.folders)):
+                if budget <= 0:
+                    break
+                folder = self.folders[self._cursor]
+                self._cursor = (self._cursor + 1) % len(self.folders)
+                budget -= self._step(folder, budget)
+
+            return self.io_budget - budget
+
+    def collect_all(self):
+        """
+        Run ticks until every folder has completed a pass
+        """
+        target = {folder["name"]: folder["stats"]["passes"] + 1 for folder in self.folders}
+        while any(folder["stats"]["passes"] < target[folder["name"]] or folder["quota_queue"]
+                  for folder in self.folders):
+            self.tick()
+
+    def get_stats(self):
+        """
+        Get reclaimed space per folder
+
+        Returns:
+            dict: Statistics keyed by folder name
+        """
+        with self._lock:
+            return {folder["name"]: dict(folder["stats"], ttl=folder["ttl"], max_bytes=folder["max_bytes"])
+                    for folder in self.folders}
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                self.logger.error(f"Storage collection failed: {e}")
+
+    def _referenced_paths(self):
+        referenced = set()
+        for provider in self.reference_providers:
+            try:
+                for path in provider():
+                    if path:
+                        referenced.add(os.path.realpath(path))
+            except Exception as e:
+                self.logger.error(f"Reference provider failed: {e}")
+        return referenced
+
+    def _step(self, folder, budget):
+        """
+        Advance one folder by at most budget operations
+
+        Returns:
+            int: Operations spent
+        """
+        spent = 0
+
+        # Finish quota removals left from the previous pass first. Sessions
+        # may have started using a queued file since the pass ended, so
+        # references and modification times are checked again.
+        referenced = self._referenced_paths() if folder["quota_queue"] else None
+        while folder["quota_queue"] and spent < budget:
+            path, size, mtime = folder["quota_queue"].pop()
+            spent += 1
+            if os.path.realpath(path) in referenced:
+                continue
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    continue
+            except OSError:
+                continue
+            if self._remove(path):
+                folder["stats"]["files_removed_quota"] += 1
+                folder["stats"]["bytes_removed_quota"] += size
+
+        if folder["scan"] is None and not folder["pending_dirs"]:
+            # Start a new pass
+            if not os.path.isdir(folder["path"]):
+                folder["stats"]["passes"] += 1
+                return spent
+            folder["pending_dirs"] = [folder["path"]]
+            folder["survivors"] = []
+            folder["referenced"] = self._referenced_paths()
+            folder["pass_files"] = 0
+            folder["pass_bytes"] = 0
+
+        now = time.time()
+        while spent < budget:
+            if folder["scan"] is None:
+                if not folder["pending_dirs"]:
+                    self._finish_pass(folder)
+                    break
+                try:
+                    folder["scan"] = os.scandir(folder["pending_dirs"].pop())
+                except OSError:
+                    continue
+
+            entry = next(folder["scan"], None)
+            if entry is None:
+                folder["scan"].close()
+                folder["scan"] = None
+                continue
+
+            spent += 1
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    folder["pending_dirs"].append(entry.path)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if os.path.realpath(entry.path) in folder["referenced"]:
+                continue
+
+            if now - stat.st_mtime > folder["ttl"]:
+                if self._remove(entry.path):
+                    folder["stats"]["files_removed"] += 1
+                    folder["stats"]["bytes_removed"] += stat.st_size
+                    folder["pass_files"] += 1
+                    folder["pass_bytes"] += stat.st_size
+            else:
+                folder["survivors"].append((stat.st_mtime, stat.st_size, entry.path))
+
+        return spent
+
+    def _finish_pass(self, folder):
+        """
+        Queue the oldest unreferenced survivors for removal if over quota
+        """
+        # Report the completed pass, not the one in progress
+        folder["stats"]["passes"] += 1
+        folder["stats"]["last_pass_files"] = folder["pass_files"]
+        folder["stats"]["last_pass_bytes"] = folder["pass_bytes"]
+        folder["stats"]["last_pass_finished"] = time.time()
+
+        total = sum(size for _, size, _ in folder["survivors"])
+        if folder["max_bytes"] and total > folder["max_bytes"]:
+            # Newest first, so pop() yields the oldest
+            queue = []
+            for mtime, size, path in sorted(folder["survivors"]):
+                if total <= folder["max_bytes"]:
+                    break
+                queue.append((path, size, mtime))
+                total -= size
+            folder["quota_queue"] = list(reversed(queue))
+
+        folder["survivors"] = []
+        folder["referenced"] = None
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,198 @@
+"""
+Transcript Parser Module for the Retro Transcription Web Tool
+Splits pasted timecoded transcripts into segments in a single pass
+"""
+
+import re
+
+# An MM:SS or HH:MM:SS timecode standing on its own before the segment text,
+# with its fields captured for the conversion to milliseconds
+TIMECODE_PATTERN = re.compile(r'(?:(?<=\s)|^)((\d{2}):(\d{2})(?::(\d{2}))?)(?=\s)')
+
+# The same timecode after the whitespace that precedes it. The engine scans
+# for this much faster than for the lookbehind, so a whole string is matched
+# with a space put in front of it.
+_SPACED_TIMECODE_PATTERN = re.compile(r'\s((\d{2}):(\d{2})(?::(\d{2}))?)(?=\s)')
+
+# Longest timecode plus the whitespace that must follow it
+_MAX_TOKEN_LENGTH = len("00:00:00 ")
+
+
+def _timecode_ms(match):
+    timecode, first, second, third = match.groups()
+    total = int(first) * 60 + int(second)
+    if third is not None:
+        total = total * 60 + int(third)
+    return total * 1000
+
+
+def _collapse_whitespace(text):
+    text = text.strip()
+    # Every whitespace character but the space is unprintable, so text that
+    # passes both checks is already collapsed and need not be split
+    if "  " in text or not text.isprintable():
+        text = " ".join(text.split())
+    return text
+
+
+def _segment(timecode, start_ms, text, end_ms):
+    segment = {
+        'timecode': timecode,
+        'text': text,
+        'start_ms': start_ms,
+        'relevance': 1.0
+    }
+    if end_ms is not None:
+        segment['duration_ms'] = max(end_ms - start_ms, 0)
+        segment['duration'] = segment['duration_ms'] / 1000
+    return segment
+
+
+class TranscriptParser:
+    """
+    Incremental tokenizer for timecoded transcripts
+
+    Text is fed in chunks of any size. Every timecode starts a segment that
+    runs up to the next timecode, so a segment is complete, and its
+    duration known, as soon as the following timecode has been read. Each
+    character is scanned once; only the text of the segment still being
+    read is buffered, so memory does not grow with the transcript.
+
+    Text before the first timecode is ignored, whitespace inside a segment
+    is collapsed to single spaces and segments without text are dropped.
+    """
+
+    def __init__(self):
+        """
+        Initialize the parser
+        """
+        self._current = None
+        self._pieces = []
+        self._tail = ""
+        self._text_from = 0
+        self.segments_parsed = 0
+
+    def feed(self, chunk):
+        """
+        Add transcript text
+
+        Args:
+            chunk (str): Next part of the transcript
+
+        Returns:
+            list: Segments completed by this chunk
+        """
+        # The end of the previous chunk is scanned again in case a timecode
+        # was split across chunks; one extra character gives the word boundary.
+        window = self._tail + chunk
+        scan_from = max(len(self._tail) - _MAX_TOKEN_LENGTH, self._text_from)
+        completed = []
+
+        for match in TIMECODE_PATTERN.finditer(window, scan_from):
+            start_ms = _timecode_ms(match)
+            if self._current is not None:
+                self._pieces.append(window[self._text_from:match.start()])
+                self._emit(completed, "".join(self._pieces), start_ms)
+            self._current = (match.group(1), start_ms)
+            self._pieces = []
+            self._text_from = match.end()
+
+        # Keep the open segment's text apart from the tail, which is all
+        # that is carried into the next window
+        tail_start = max(len(window) - _MAX_TOKEN_LENGTH - 1, 0)
+        if self._current is not None and self._text_from < tail_start:
+            self._pieces.append(window[self._text_from:tail_start])
+        self._text_from = max(self._text_from - tail_start, 0)
+        self._tail = window[tail_start:]
+
+        return completed
+
+    def close(self):
+        """
+        Finish parsing
+
+        Returns:
+            list: The last segment, whose duration is unknown, if it has text
+        """
+        completed = []
+        if self._current is not None:
+            self._pieces.append(self._tail[self._text_from:])
+            self._emit(completed, "".join(self._pieces), None)
+        self._current = None
+        self._pieces = []
+        self._tail = ""
+        self._text_from = 0
+        return completed
+
+    def _emit(self, completed, text, end_ms):
+        text = _collapse_whitespace(text)
+        if not text:
+            return
+
+        timecode, start_ms = self._current
+        completed.append(_segment(timecode, start_ms, text, end_ms))
+        self.segments_parsed += 1
+
+
+def parse_transcript(chunks):
+    """
+    Parse a timecoded transcript
+
+    Args:
+        chunks (iterable): Transcript text, as one string or an iterable of strings
+
+    Yields:
+        dict: Segments with timecode, text, start_ms and (except for the last)
+            duration_ms and duration in seconds
+    """
+    if isinstance(chunks, str):
+        yield from _parse_text(chunks)
+        return
+
+    parser = TranscriptParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def _parse_text(text):
+    """
+    Parse a transcript held in one string
+
+    A single finditer runs over the whole text and segment text is sliced
+    straight out of it, without the window and tail TranscriptParser keeps
+    for chunked input. The segments are the same as TranscriptParser's; the
+    helpers it calls are inlined here, where /extract spends its time.
+    """
+    text = " " + text
+    timecode = start_ms = None
+    text_from = 0
+
+    for match in _SPACED_TIMECODE_PATTERN.finditer(text):
+        next_timecode, first, second, third = match.groups()
+        next_ms = int(first) * 60 + int(second)
+        if third is not None:
+            next_ms = next_ms * 60 + int(third)
+        next_ms *= 1000
+
+        if timecode is not None:
+            segment_text = text[text_from:match.start()].strip()
+            if "  " in segment_text or not segment_text.isprintable():
+                segment_text = " ".join(segment_text.split())
+            if segment_text:
+                duration_ms = next_ms - start_ms if next_ms > start_ms else 0
+                yield {
+                    'timecode': timecode,
+                    'text': segment_text,
+                    'start_ms': start_ms,
+                    'relevance': 1.0,
+                    'duration_ms': duration_ms,
+                    'duration': duration_ms / 1000
+                }
+        timecode, start_ms = next_timecode, next_ms
+        text_from = match.end()
+
+    if timecode is not None:
+        segment_text = _collapse_whitespace(text[text_from:])
+        if segment_text:
+            yield _segment(timecode, start_ms, segment_text, None)
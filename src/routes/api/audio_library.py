@@ -2,11 +2,17 @@
 Routes for audio library management
 """
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import os
 import json
+from datetime import datetime
 from src.models.transcription.audio_storage import AudioStorage
 from src.models.transcription.audio_processor import AudioProcessor
+from src.models.transcription.audio_transcoder import AudioTranscoder
+from src.models.transcription.output_writers import WRITERS
+from src.models.transcription.output_bundle import BundleEntry, iter_zip
+from src.routes.api.transcription import storage_collector, sessions, job_registry, output_generator
+from src.routes.api.file_responses import send_file_conditional
 
 # Create blueprint
 audio_library_bp = Blueprint('audio_library', __name__, url_prefix='/api/audio-library')
@@ -15,6 +21,12 @@ audio_library_bp = Blueprint('audio_library', __name__, url_prefix='/api/audio-l
 audio_storage = AudioStorage()
 audio_processor = AudioProcessor()
 
+# Compress saved recordings in the background
+audio_transcoder = AudioTranscoder(audio_storage)
+storage_collector.add_folder('decoded', audio_transcoder.decoded_folder, ttl_seconds=3600)
+if os.environ.get('TRANSCODE_ENABLED', 'True').lower() == 'true':
+    audio_transcoder.start()
+
 @audio_library_bp.route('/save-recording', methods=['POST'])
 def save_recording():
     """
@@ -34,10 +46,17 @@ def save_recording():
         # Get metadata from request
         metadata = data.get('metadata', {})
         
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({
+                'success': False,
+                'error': 'Session not found'
+            }), 404
+        
         # Get temporary file path from session
-        temp_file_path = os.path.join(audio_processor.upload_folder, f"{session_id}.wav")
+        temp_file_path = session.get('audio_file')
         
-        if not os.path.exists(temp_file_path):
+        if not temp_file_path or not os.path.exists(temp_file_path):
             return jsonify({
                 'success': False,
                 'error': 'Recording not found'
@@ -46,6 +65,17 @@ def save_recording():
         # Save recording permanently
         result = audio_storage.save_recording(temp_file_path, metadata)
         
+        if result['success']:
+            # Keep the session's transcript with the recording for searching
+            if session.get('transcription'):
+                audio_storage.save_transcript(
+                    result['recording_id'],
+                    session['transcription']['segments'],
+                    session.get('up_sots')
+                )
+            
+            audio_transcoder.schedule(result['recording_id'])
+        
         return jsonify(result)
         
     except Exception as e:
@@ -76,12 +106,50 @@ def get_recording(recording_id):
 @audio_library_bp.route('/get-all-recordings', methods=['GET'])
 def get_all_recordings():
     """
-    Get all saved recordings
+    Get saved recordings one page at a time
+    
+    Query parameters:
+        limit: Page size (default 100, max 1000)
+        cursor: next_cursor from the previous page
+        sort: date, size or duration
+        order: asc or desc
+        fields: Comma separated recording fields to return
+        date_from, date_to, min_size, max_size, min_duration, max_duration: Filters
     """
     try:
-        result = audio_storage.get_all_recordings()
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        
+        filters = {}
+        for name in ('date_from', 'date_to'):
+            if request.args.get(name):
+                filters[name] = request.args[name]
+        for name in ('min_size', 'max_size', 'min_duration', 'max_duration'):
+            if request.args.get(name):
+                filters[name] = int(request.args[name])
+        
+        fields = None
+        if request.args.get('fields'):
+            fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        
+        result = audio_storage.get_all_recordings(
+            sort=request.args.get('sort', 'date'),
+            order=request.args.get('order', 'desc'),
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            filters=filters,
+            fields=fields
+        )
+        
+        if not result['success']:
+            return jsonify(result), 400
+        
         return jsonify(result)
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -111,6 +179,11 @@ def delete_recording(recording_id):
 def download_recording(recording_id):
     """
     Download a recording
+    
+    Supports conditional requests and byte ranges so that players can seek
+    without re-downloading. Pass ?inline=1 to play rather than save.
+    Recordings are sent in their stored codec; pass ?format=wav to get a
+    decoded WAV instead.
     """
     try:
         result = audio_storage.get_recording(recording_id)
@@ -127,7 +200,19 @@ def download_recording(recording_id):
                 'error': 'Recording file not found'
             }), 404
         
-        return send_file(file_path, as_attachment=True, download_name=recording['filename'])
+        as_attachment = request.args.get('inline', 'false').lower() not in ('1', 'true')
+        
+        if request.args.get('format') == 'wav':
+            wav_path = audio_transcoder.decoded_path(recording)
+            download_name = os.path.splitext(recording['filename'])[0] + '.wav'
+            return send_file_conditional(wav_path, download_name=download_name, as_attachment=as_attachment)
+        
+        return send_file_conditional(
+            file_path,
+            download_name=recording['filename'],
+            mimetype=audio_transcoder.mimetype_for(recording),
+            as_attachment=as_attachment
+        )
         
     except Exception as e:
         return jsonify({
@@ -135,6 +220,35 @@ def download_recording(recording_id):
             'error': str(e)
         }), 500
 
+def _transcribe_recording(recording_id, file_path, parameters):
+    """
+    Transcribe a saved recording, pick its up-sots and store the transcript
+    """
+    transcription_result = audio_processor.transcribe_audio(file_path)
+    
+    if not transcription_result['success']:
+        return transcription_result, None
+    
+    # Process up-sots based on parameters
+    max_count = parameters.get('max_count', 10)
+    sensitivity = parameters.get('sensitivity', 0.5)
+    sort_by_relevance = parameters.get('sort_by_relevance', False)
+    reference_script = parameters.get('reference_script', None)
+    
+    segments = transcription_result['segments']
+    up_sots = audio_processor.get_up_sots(
+        segments, 
+        max_count=max_count, 
+        sensitivity=sensitivity,
+        sort_by_relevance=sort_by_relevance,
+        reference_script=reference_script
+    )
+    
+    # Replace the stored transcript used by search
+    audio_storage.save_transcript(recording_id, segments, up_sots)
+    
+    return transcription_result, up_sots
+
 @audio_library_bp.route('/retranscribe/<recording_id>', methods=['POST'])
 def retranscribe(recording_id):
     """
@@ -160,27 +274,11 @@ def retranscribe(recording_id):
         data = request.get_json()
         parameters = data.get('parameters', {})
         
-        # Transcribe audio
-        transcription_result = audio_processor.transcribe_audio(file_path)
+        transcription_result, up_sots = _transcribe_recording(recording_id, file_path, parameters)
         
         if not transcription_result['success']:
             return jsonify(transcription_result), 500
         
-        # Process up-sots based on parameters
-        max_count = parameters.get('max_count', 10)
-        sensitivity = parameters.get('sensitivity', 0.5)
-        sort_by_relevance = parameters.get('sort_by_relevance', False)
-        reference_script = parameters.get('reference_script', None)
-        
-        segments = transcription_result['segments']
-        up_sots = audio_processor.get_up_sots(
-            segments, 
-            max_count=max_count, 
-            sensitivity=sensitivity,
-            sort_by_relevance=sort_by_relevance,
-            reference_script=reference_script
-        )
-        
         return jsonify({
             'success': True,
             'transcription': transcription_result,
@@ -192,3 +290,224 @@ def retranscribe(recording_id):
             'success': False,
             'error': str(e)
         }), 500
+
+@audio_library_bp.route('/transcode-stats', methods=['GET'])
+def transcode_stats():
+    """
+    Report space reclaimed by transcoding and the encode/decode overhead
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'stats': audio_transcoder.get_stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@audio_library_bp.route('/search', methods=['GET'])
+def search_transcripts():
+    """
+    Search transcripts across the library
+    
+    Query parameters:
+        q: Words that must all appear in a segment
+        limit: Maximum number of matching segments (default 100, max 1000)
+        up_sots: Set to 1 to only search up-sots
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        
+        if not query:
+            return jsonify({
+                'success': False,
+                'error': 'No search query provided'
+            }), 400
+        
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        up_sots_only = request.args.get('up_sots', 'false').lower() in ('1', 'true')
+        
+        result = audio_storage.search_transcripts(query, limit=limit, up_sots_only=up_sots_only)
+        
+        if not result['success']:
+            return jsonify(result), 500
+        
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _batch_recording_ids(data):
+    """
+    Get the recordings a batch request applies to
+    
+    The request gives either an explicit list of IDs or listing filters
+    (date_from, date_to, min_size, max_size, min_duration, max_duration).
+    
+    Raises:
+        ValueError: If neither is given or a filter is invalid
+    """
+    if data.get('ids'):
+        if not isinstance(data['ids'], list):
+            raise ValueError('ids must be a list')
+        # Keep order, drop duplicates
+        return list(dict.fromkeys(str(recording_id) for recording_id in data['ids']))
+    
+    if data.get('filters'):
+        return audio_storage.index.select_ids(data['filters'])
+    
+    raise ValueError('Provide ids or filters')
+
+@audio_library_bp.route('/batch/delete', methods=['POST'])
+def batch_delete():
+    """
+    Delete several recordings in one transaction
+    
+    Body: {"ids": [...]} or {"filters": {...}}
+    """
+    try:
+        recording_ids = _batch_recording_ids(request.get_json() or {})
+        
+        result = audio_storage.delete_recordings(recording_ids)
+        
+        if not result['success']:
+            return jsonify(result), 500
+        
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@audio_library_bp.route('/batch/retranscribe', methods=['POST'])
+def batch_retranscribe():
+    """
+    Re-transcribe several recordings on the shared job pool
+    
+    Body: {"ids": [...]} or {"filters": {...}}, plus optional "parameters"
+    as for /retranscribe. Returns a job ID; poll
+    /api/transcription/jobs/<job_id> for per-recording progress.
+    """
+    try:
+        data = request.get_json() or {}
+        recording_ids = _batch_recording_ids(data)
+        parameters = data.get('parameters', {})
+        
+        def retranscribe_item(recording_id):
+            recording = audio_storage.index.get(recording_id)
+            if recording is None:
+                raise ValueError('Recording not found')
+            if not os.path.exists(recording['path']):
+                raise ValueError('Recording file not found')
+            
+            transcription_result, up_sots = _transcribe_recording(recording_id, recording['path'], parameters)
+            if not transcription_result['success']:
+                raise RuntimeError(transcription_result.get('error', 'Transcription failed'))
+            
+            return {
+                'segments_count': len(transcription_result['segments']),
+                'up_sots_count': len(up_sots)
+            }
+        
+        job_id = job_registry.submit('retranscribe', recording_ids, retranscribe_item)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'total': len(recording_ids),
+            'status_url': f'/api/transcription/jobs/{job_id}'
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@audio_library_bp.route('/batch/export', methods=['POST'])
+def batch_export():
+    """
+    Export several recordings as one streamed ZIP
+    
+    Body: {"ids": [...]} or {"filters": {...}}, plus optional "formats"
+    (transcript formats rendered from the stored transcripts, default txt)
+    and "include_audio" (default true). Each recording gets its own folder
+    in the archive.
+    """
+    try:
+        data = request.get_json() or {}
+        recording_ids = _batch_recording_ids(data)
+        formats = data.get('formats', ['txt'])
+        include_audio = data.get('include_audio', True)
+        
+        for fmt in formats:
+            writer_class = WRITERS.get(fmt)
+            if writer_class is None or not writer_class.streamable:
+                return jsonify({
+                    'success': False,
+                    'error': f'Unsupported export format: {fmt}'
+                }), 400
+        
+        entries = []
+        for recording_id in recording_ids:
+            recording = audio_storage.index.get(recording_id)
+            if recording is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Recording not found: {recording_id}'
+                }), 404
+            
+            folder = recording_id
+            base_name = os.path.splitext(recording['filename'])[0]
+            
+            if include_audio and os.path.exists(recording['path']):
+                entries.append(BundleEntry(f"{folder}/{recording['filename']}", path=recording['path']))
+            
+            for fmt in formats:
+                entries.append(BundleEntry(
+                    f"{folder}/{base_name}.{WRITERS[fmt].extension}",
+                    chunks=lambda fmt=fmt, recording=recording: output_generator.iter_output(
+                        fmt, audio_storage.index.get_segments(recording['id']), recording['filename']
+                    )
+                ))
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return Response(
+            stream_with_context(iter_zip(entries)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="recordings_{timestamp}.zip"'}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,111 @@
+"""
+Response compression negotiated from Accept-Encoding
+"""
+
+import os
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip is offered without it
+    brotli = None
+
+# Responses smaller than this are sent as they are
+DEFAULT_MIN_SIZE = 1024
+
+# Levels for responses compressed per request. Past these, each step
+# costs far more time than it saves in bytes (gzip 6 took almost three
+# times as long as gzip 4 on a 270 KB transcript for 6% less output).
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 4
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml'
+}
+
+
+def is_compressible(mimetype):
+    """
+    Check whether a content type is worth compressing
+    """
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def compress(data, encoding):
+    """
+    Compress a response body
+
+    Args:
+        data (bytes): Body to compress
+        encoding (str): 'br' or 'gzip'
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    Pick the best content coding the client accepts
+
+    Args:
+        accept_encodings (Accept): Parsed Accept-Encoding header
+
+    Returns:
+        str: 'br', 'gzip' or None for identity
+    """
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    return accept_encodings.best_match(offered)
+
+
+def init_compression(app, min_size=None):
+    """
+    Compress buffered text and JSON responses for clients that accept it
+
+    Streamed and file responses (send_file, chunked outputs and archives)
+    are left alone. A strong ETag on a compressed response is made weak,
+    since the bytes differ from the identity representation.
+
+    Args:
+        app (Flask): Application to install the hook on
+        min_size (int, optional): Smallest body in bytes that is compressed
+    """
+    if min_size is None:
+        min_size = int(os.environ.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE))
+
+    @app.after_request
+    def compress_response(response):
+        if not is_compressible(response.mimetype):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    return compress_response
@@ -0,0 +1,85 @@
+"""
+Helpers for serving stored files with validators and byte ranges
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+# Content digests keyed by path, revalidated against size and mtime
+_digest_cache = OrderedDict()
+_digest_lock = threading.Lock()
+_DIGEST_CACHE_SIZE = 4096
+_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def file_etag(path):
+    """
+    Get a strong ETag for a file derived from its content
+
+    The digest is computed once per (size, mtime) of the file and cached,
+    so revalidating an unchanged file costs a single stat.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: SHA-256 hex digest of the file content
+    """
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+
+    with _digest_lock:
+        cached = _digest_cache.get(path)
+        if cached and cached[0] == signature:
+            _digest_cache.move_to_end(path)
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(_READ_CHUNK_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    etag = digest.hexdigest()
+
+    with _digest_lock:
+        _digest_cache[path] = (signature, etag)
+        _digest_cache.move_to_end(path)
+        while len(_digest_cache) > _DIGEST_CACHE_SIZE:
+            _digest_cache.popitem(last=False)
+
+    return etag
+
+
+def send_file_conditional(path, download_name=None, mimetype=None, as_attachment=True):
+    """
+    Send a file honouring If-None-Match, If-Modified-Since, Range and If-Range
+
+    Args:
+        path (str): Path to the file
+        download_name (str, optional): Filename presented to the client
+        mimetype (str, optional): Content type, guessed from the name if omitted
+        as_attachment (bool): Send with Content-Disposition: attachment
+
+    Returns:
+        Response: 200, 206, 304 or 416 response
+    """
+    try:
+        return send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name or os.path.basename(path),
+            conditional=True,
+            etag=file_etag(path),
+            last_modified=os.path.getmtime(path),
+            max_age=0
+        )
+    except RequestedRangeNotSatisfiable as e:
+        # Answer here, so routes catching Exception do not turn it into a 500
+        return e.get_response()
@@ -0,0 +1,65 @@
+"""
+JSON provider that serializes API responses with orjson when it is installed
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+
+    Output parses the same as Flask's default provider: keys are sorted,
+    dates are formatted as HTTP dates and other non-JSON types go through
+    the same default(). Non-ASCII text is written as UTF-8 rather than
+    escaped, and NaN becomes null instead of the invalid NaN literal.
+    Indented output (debug mode), other json.dumps options and anything
+    orjson cannot encode, such as integers over 64 bits, are handed to
+    the standard library. Without orjson installed this is the default
+    provider.
+    """
+
+    _OPTIONS = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+    )
+
+    def dumps(self, obj, **kwargs):
+        data = self._dumps_bytes(obj, dict(kwargs))
+        return data.decode('utf-8') if data is not None else super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        # Build the body as bytes, skipping the str round trip
+        if not ((self.compact is None and self._app.debug) or self.compact is False):
+            data = self._dumps_bytes(obj, {'separators': (',', ':')})
+            if data is not None:
+                return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+
+        return super().response(obj)
+
+    def _dumps_bytes(self, obj, kwargs):
+        """
+        Encode with orjson, or return None when the standard library must be used
+        """
+        # orjson only writes compact, key-sorted output
+        if orjson is None or tuple(kwargs.pop('separators', ())) != (',', ':'):
+            return None
+        if kwargs.pop('sort_keys', self.sort_keys) is not True or kwargs:
+            return None
+
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._OPTIONS)
+        except TypeError:
+            return None
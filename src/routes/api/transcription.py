@@ -2,32 +2,87 @@
 API routes for transcription functionality
 """
 
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 import os
 import json
 import time
 from datetime import datetime
 import tempfile
 import uuid
+import codecs
+import heapq
+from itertools import islice
 
 from src.models.transcription.audio_processor import AudioProcessor
 from src.models.transcription.output_generator import OutputGenerator
+from src.models.transcription.output_writers import WRITERS
+from src.models.transcription.segment_table import SegmentTable, SegmentTableCache
+from src.models.transcription.output_bundle import BundleEntry, bundle_key, iter_zip, iter_zip_to_cache, build_zip
+from src.models.transcription.output_cache import segments_digest
 from src.models.transcription.script_matcher import ScriptMatcher
-from src.models.transcription.parameter_controls import ParameterControls
+from src.models.transcription.transcript_parser import parse_transcript
+from src.models.transcription.parameter_controls import Parameters
 from src.models.transcription.email_service import EmailService
+from src.models.transcription.storage_gc import StorageCollector
+from src.models.transcription.job_registry import JobRegistry
+from src.models.transcription.session_store import create_session_store, VERSION_KEY, CHANGES_KEY
+from src.routes.api.file_responses import send_file_conditional
 
 # Create blueprint
 transcription_bp = Blueprint('transcription', __name__)
 
+# Bytes read at a time from text/plain transcript bodies
+TEXT_BODY_CHUNK_SIZE = 64 * 1024
+
 # Initialize components
 audio_processor = AudioProcessor()
 output_generator = OutputGenerator()
 script_matcher = ScriptMatcher()
-parameter_controls = ParameterControls()
 email_service = EmailService()
 
-# Session storage (in-memory for development)
-sessions = {}
+# Shared pool and progress tracking for batch work
+job_registry = JobRegistry()
+
+# Session storage, shared between worker processes unless SESSION_STORE=memory.
+# Sessions returned by sessions.get() are copies. Change a stored session
+# with sessions.update(), so requests and background work don't overwrite
+# each other's fields; sessions.save() is for new sessions.
+sessions = create_session_store()
+
+def _session_file_refs():
+    """
+    List the files referenced by live sessions
+    """
+    return sessions.referenced_files()
+
+# Session transcripts as segment tables, so each transcription is converted once
+segment_tables = SegmentTableCache()
+
+def _segment_table(session):
+    """
+    Get a session's transcript as a SegmentTable
+    
+    Tables are cached by the transcript_id that _transcribe_session() gives
+    each transcription; transcripts without one are converted every time.
+    """
+    transcript_id = session['transcription'].get('transcript_id')
+    table = segment_tables.get(transcript_id) if transcript_id else None
+    if table is None:
+        table = SegmentTable.from_segments(session['transcription']['segments'])
+        if transcript_id:
+            segment_tables.put(transcript_id, table)
+    return table
+
+# Keep cached outputs that live sessions still link to
+output_generator.cache.add_reference_provider(_session_file_refs)
+
+# Expire temporary files that no live session references
+storage_collector = StorageCollector(reference_providers=[_session_file_refs])
+storage_collector.add_folder('uploads', audio_processor.upload_folder)
+storage_collector.add_folder('outputs', output_generator.output_folder)
+storage_collector.add_folder('scripts', script_matcher.scripts_folder)
+if os.environ.get('STORAGE_GC_ENABLED', 'True').lower() == 'true':
+    storage_collector.start()
 
 @transcription_bp.route('/upload-audio', methods=['POST'])
 def upload_audio():
@@ -53,12 +108,12 @@ def upload_audio():
         file_path = audio_processor.save_audio_file(audio_data)
         
         # Store session data
-        sessions[session_id] = {
+        sessions.save(session_id, {
             'audio_file': file_path,
             'timestamp': datetime.now().isoformat(),
             'status': 'uploaded',
-            'parameters': parameter_controls.get_parameters()
-        }
+            'parameters': Parameters().to_dict()
+        })
         
         return jsonify({
             'success': True, 
@@ -88,12 +143,12 @@ def record_audio():
         file_path = audio_processor.save_audio_file(audio_data)
         
         # Store session data
-        sessions[session_id] = {
+        sessions.save(session_id, {
             'audio_file': file_path,
             'timestamp': datetime.now().isoformat(),
             'status': 'recorded',
-            'parameters': parameter_controls.get_parameters()
-        }
+            'parameters': Parameters().to_dict()
+        })
         
         return jsonify({
             'success': True, 
@@ -111,42 +166,29 @@ def transcribe(session_id):
     """
     try:
         # Check if session exists
-        if session_id not in sessions:
+        session = sessions.get(session_id)
+        if session is None:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        session = sessions[session_id]
-        
         # Check if audio file exists
         if 'audio_file' not in session or not os.path.exists(session['audio_file']):
             return jsonify({'success': False, 'error': 'Audio file not found'}), 404
         
         # Update parameters if provided
+        params = Parameters.from_dict(session.get('parameters'))
         if request.json and 'parameters' in request.json:
-            parameter_controls.set_parameters(request.json['parameters'])
-            session['parameters'] = parameter_controls.get_parameters()
+            params = params.updated(request.json['parameters'])
+            session['parameters'] = params.to_dict()
         
         # Transcribe audio
-        result = audio_processor.transcribe_audio(session['audio_file'])
+        result = _transcribe_session(session, params)
         
         if not result['success']:
             return jsonify({'success': False, 'error': result.get('error', 'Transcription failed')}), 500
         
-        # Store transcription results
-        session['transcription'] = result
-        session['status'] = 'transcribed'
-        
-        # Get up-sots based on parameters
-        params = session['parameters']
-        up_sots = audio_processor.get_up_sots(
-            result['segments'],
-            max_count=params['up_sots_count'],
-            sensitivity=params['sensitivity'],
-            sort_by_relevance=params['sort_by_relevance'],
-            reference_script=session.get('script', '')
-        )
-        
-        # Store up-sots
-        session['up_sots'] = up_sots
+        if _store_transcription(session_id, session) is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        up_sots = session['up_sots']
         
         return jsonify({
             'success': True,
@@ -160,62 +202,83 @@ def transcribe(session_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _transcribe_session(session, params):
+    """
+    Transcribe a session's audio and pick its up-sots
+    
+    The transcription and up-sots are stored in the session dict; the
+    caller stores them with _store_transcription(). Each transcription
+    gets a transcript_id, which keys its cached SegmentTable.
+    """
+    result = audio_processor.transcribe_audio(session['audio_file'])
+    
+    if result['success']:
+        result['transcript_id'] = uuid.uuid4().hex
+        session['transcription'] = result
+        session['status'] = 'transcribed'
+        table = SegmentTable.from_segments(result['segments'])
+        segment_tables.put(result['transcript_id'], table)
+        
+        # Get up-sots based on parameters
+        session['up_sots'] = audio_processor.get_up_sots(
+            table,
+            max_count=params.up_sots_count,
+            sensitivity=params.sensitivity,
+            sort_by_relevance=params.sort_by_relevance,
+            reference_script=session.get('script', '')
+        )
+    
+    return result
+
+# Session fields written by _transcribe_session()
+TRANSCRIPTION_FIELDS = ('parameters', 'transcription', 'status', 'up_sots')
+
+def _store_transcription(session_id, session):
+    """
+    Merge a transcription into the stored session
+    
+    Only the fields set by _transcribe_session() are written, so changes
+    made while transcribing (a script, output results) are kept. Returns
+    the stored session, or None if it has gone.
+    """
+    fields = {key: session[key] for key in TRANSCRIPTION_FIELDS if key in session}
+    return sessions.update(session_id, lambda current: current.update(fields))
+
 @transcription_bp.route('/extract', methods=['POST'])
 def extract_key_moments():
     """
     Extract key moments from transcript text
-    This endpoint is used by the frontend to process transcript text directly
+    This endpoint is used by the frontend to process transcript text directly.
+    The transcript is sent as JSON, or as a text/plain body with the options
+    in the query string, which is parsed as it is read.
     """
     try:
-        # Check if transcript is provided
-        if not request.json or 'transcript' not in request.json:
-            return jsonify({'success': False, 'error': 'No transcript provided'}), 400
-        
-        transcript = request.json['transcript']
-        
-        # Get parameters from request or use defaults
-        max_upsots = request.json.get('maxUpshots', 10)
-        sensitivity = request.json.get('sensitivity', 3)
-        sort_order = request.json.get('sortOrder', 'chronological')
-        
-        # Process the transcript to extract key moments
-        # This is a simplified version that extracts timecoded segments
-        segments = []
-        
-        # Extract timecodes and text using regex pattern
-        import re
-        pattern = r'(\d{2}:\d{2}:\d{2}|\d{2}:\d{2})\s+(.*?)(?=\s+\d{2}:\d{2}|\s*$)'
-        matches = re.finditer(pattern, transcript)
-        
-        for match in matches:
-            timecode = match.group(1)
-            text = match.group(2).strip()
-            
-            if text:
-                segments.append({
-                    'timecode': timecode,
-                    'text': text,
-                    'relevance': 1.0  # Default relevance score
-                })
-        
-        # Sort segments based on sort order
-        if sort_order == 'chronological':
-            # Already in chronological order
-            pass
-        elif sort_order == 'relevance':
+        if request.mimetype == 'text/plain':
+            options = request.args
+            max_upsots = options.get('maxUpshots', 10, type=int)
+            chunks = _read_text_body()
+        else:
+            # Check if transcript is provided
+            if not request.json or 'transcript' not in request.json:
+                return jsonify({'success': False, 'error': 'No transcript provided'}), 400
+            options = request.json
+            max_upsots = int(options.get('maxUpshots', 10))
+            chunks = options['transcript']
+        
+        sort_order = options.get('sortOrder', 'chronological')
+        segments = parse_transcript(chunks)
+        
+        # Keep only the segments that will be returned
+        if sort_order == 'relevance':
             # Sort by relevance (would normally use NLP for this)
             # For demo, just use length as a proxy for relevance
-            segments.sort(key=lambda x: len(x['text']), reverse=True)
+            segments = heapq.nlargest(max_upsots, segments, key=lambda x: len(x['text']))
         elif sort_order == 'duration':
-            # Sort by duration (would normally calculate this)
-            # For demo, just use random values
-            import random
-            for segment in segments:
-                segment['duration'] = random.uniform(1.0, 10.0)
-            segments.sort(key=lambda x: x.get('duration', 0), reverse=True)
-        
-        # Limit to max_upsots
-        segments = segments[:max_upsots]
+            # The last segment has no known duration and sorts after the rest
+            segments = heapq.nlargest(max_upsots, segments, key=lambda x: x.get('duration_ms', -1))
+        else:
+            # Chronological: the rest of the transcript is not needed
+            segments = list(islice(segments, max(max_upsots, 0)))
         
         return jsonify({
             'success': True,
@@ -223,40 +286,57 @@ def extract_key_moments():
             'count': len(segments)
         })
         
+    except ValueError:
+        return jsonify({'success': False, 'error': 'maxUpshots must be an integer'}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _read_text_body():
+    """
+    Read a UTF-8 request body in chunks
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        chunk = request.stream.read(TEXT_BODY_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
 @transcription_bp.route('/set-parameters/<session_id>', methods=['POST'])
 def set_parameters(session_id):
     """
     Set parameters for a session
     """
     try:
-        # Check if session exists
-        if session_id not in sessions:
-            return jsonify({'success': False, 'error': 'Session not found'}), 404
-        
         # Check if parameters are provided
-        if not request.json:
+        changes = request.get_json(silent=True)
+        if not changes:
             return jsonify({'success': False, 'error': 'No parameters provided'}), 400
         
-        # Update parameters
-        updated_params = parameter_controls.set_parameters(request.json)
-        sessions[session_id]['parameters'] = updated_params
+        # Update this session's parameters only, on top of the stored ones
+        def apply(current):
+            current['parameters'] = Parameters.from_dict(current.get('parameters')).updated(changes).to_dict()
+        
+        session = sessions.update(session_id, apply)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        updated_params = session['parameters']
+        params = Parameters.from_dict(updated_params)
         
         # Update up-sots if transcription exists
-        if 'transcription' in sessions[session_id] and sessions[session_id]['transcription'].get('success', False):
-            segments = sessions[session_id]['transcription']['segments']
+        if 'transcription' in session and session['transcription'].get('success', False):
+            segments = _segment_table(session)
             
             up_sots = audio_processor.get_up_sots(
                 segments,
-                max_count=updated_params['up_sots_count'],
-                sensitivity=updated_params['sensitivity'],
-                sort_by_relevance=updated_params['sort_by_relevance'],
-                reference_script=sessions[session_id].get('script', '')
+                max_count=params.up_sots_count,
+                sensitivity=params.sensitivity,
+                sort_by_relevance=params.sort_by_relevance,
+                reference_script=session.get('script', '')
             )
             
-            sessions[session_id]['up_sots'] = up_sots
+            sessions.update(session_id, lambda current: current.update(up_sots=up_sots))
             
             return jsonify({
                 'success': True,
@@ -279,7 +359,8 @@ def set_script(session_id):
     """
     try:
         # Check if session exists
-        if session_id not in sessions:
+        session = sessions.get(session_id)
+        if session is None:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
         # Check if script is provided
@@ -295,29 +376,31 @@ def set_script(session_id):
             return jsonify({'success': False, 'error': result.get('error', 'Failed to set script')}), 500
         
         # Store script in session
-        sessions[session_id]['script'] = script_text
+        session = sessions.update(session_id, lambda current: current.update(script=script_text))
+        if session is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
         
         # Update up-sots if transcription exists and sort by relevance is enabled
-        if ('transcription' in sessions[session_id] and 
-            sessions[session_id]['transcription'].get('success', False) and
-            sessions[session_id]['parameters']['sort_by_relevance']):
+        params = Parameters.from_dict(session.get('parameters'))
+        if ('transcription' in session and 
+            session['transcription'].get('success', False) and
+            params.sort_by_relevance):
             
-            segments = sessions[session_id]['transcription']['segments']
+            segments = _segment_table(session)
             
             # Score segments based on script
-            scored_segments = script_matcher.score_transcript_segments(segments)
+            scored_segments = script_matcher.score_segment_table(segments)
             
             # Get up-sots based on parameters
-            params = sessions[session_id]['parameters']
             up_sots = audio_processor.get_up_sots(
                 scored_segments,
-                max_count=params['up_sots_count'],
-                sensitivity=params['sensitivity'],
+                max_count=params.up_sots_count,
+                sensitivity=params.sensitivity,
                 sort_by_relevance=True,
                 reference_script=script_text
             )
             
-            sessions[session_id]['up_sots'] = up_sots
+            sessions.update(session_id, lambda current: current.update(up_sots=up_sots))
             
             return jsonify({
                 'success': True,
@@ -340,61 +423,164 @@ def generate_output(session_id):
     """
     try:
         # Check if session exists
-        if session_id not in sessions:
+        session = sessions.get(session_id)
+        if session is None:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        session = sessions[session_id]
+        options = request.get_json(silent=True) or {}
         
-        # Check if up-sots exist
-        if 'up_sots' not in session or not session['up_sots']:
-            return jsonify({'success': False, 'error': 'No up-sots available'}), 400
+        # Render the selected up-sots or the full transcript
+        scope = options.get('scope', 'up_sots')
+        if scope == 'full':
+            if 'transcription' not in session or not session['transcription'].get('success', False):
+                return jsonify({'success': False, 'error': 'No transcription available'}), 400
+            segments = session['transcription']['segments']
+        else:
+            # Check if up-sots exist
+            if 'up_sots' not in session or not session['up_sots']:
+                return jsonify({'success': False, 'error': 'No up-sots available'}), 400
+            segments = session['up_sots']
         
         # Get format selections
-        formats = request.json.get('formats', {'txt': True, 'pdf': True, 'edl': True})
+        formats = options.get('formats', {'txt': True, 'pdf': True, 'edl': True})
+        background = bool(options.get('background', False))
         
         # Generate timestamp for filenames
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_filename = f"transcript_{timestamp}"
         
+        # Reset outputs for this generation
+        reset = {
+            'outputs': {},
+            'output_errors': {},
+            'output_timings': {},
+            'output_generation': base_filename,
+            'pending_outputs': []
+        }
+        if sessions.update(session_id, lambda current: current.update(reset)) is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        def on_output_complete(fmt, result):
+            def record(current):
+                # Ignore results from an older generation
+                if current.get('output_generation') != base_filename:
+                    return
+                
+                current['output_timings'][fmt] = result.get('elapsed_ms')
+                if result['success']:
+                    current['outputs'][fmt] = {
+                        'path': result['file_path'],
+                        'filename': result['filename'],
+                        'scope': scope
+                    }
+                else:
+                    current['output_errors'][fmt] = result.get('error', 'Failed to generate output')
+                
+                if fmt in current.get('pending_outputs', []):
+                    current['pending_outputs'].remove(fmt)
+            
+            # Runs on a render thread, possibly after the request has returned
+            sessions.update(session_id, record)
+        
         # Generate outputs
         results = output_generator.generate_all_outputs(
-            session['up_sots'],
+            segments,
             session['audio_file'],
             formats=formats,
-            base_filename=base_filename
+            base_filename=base_filename,
+            background=background,
+            on_complete=on_output_complete
         )
         
         if not results['success']:
             return jsonify({'success': False, 'error': 'Failed to generate outputs'}), 500
         
-        # Store output files in session
-        session['outputs'] = results['files']
+        # Store output files in session, merging with background results
+        def merge(current):
+            if current.get('output_generation') != base_filename:
+                return
+            current['outputs'].update({fmt: dict(info, scope=scope) for fmt, info in results['files'].items()})
+            current['output_timings'].update(results['timings_ms'])
+            current['pending_outputs'] = [
+                fmt for fmt in results['pending']
+                if fmt not in current['outputs'] and fmt not in current['output_errors']
+            ]
+        
+        session = sessions.update(session_id, merge)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        # Prepare response with download URLs
-        download_urls = {}
-        for fmt, file_info in results['files'].items():
-            download_urls[fmt] = f"/api/transcription/download/{session_id}/{fmt}"
+        return jsonify({
+            'success': True,
+            'formats': list(session['outputs'].keys()),
+            'download_urls': _download_urls(session_id, session['outputs']),
+            'pending_formats': list(session['pending_outputs']),
+            'timings_ms': session['output_timings']
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@transcription_bp.route('/output-status/<session_id>', methods=['GET'])
+def output_status(session_id):
+    """
+    Get the status of output files for a session, including formats
+    that are still rendering in the background
+    """
+    try:
+        # Check if session exists
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        outputs = session.get('outputs', {})
         
         return jsonify({
             'success': True,
-            'formats': list(results['files'].keys()),
-            'download_urls': download_urls
+            'formats': list(outputs.keys()),
+            'download_urls': _download_urls(session_id, outputs),
+            'pending_formats': list(session.get('pending_outputs', [])),
+            'errors': session.get('output_errors', {}),
+            'timings_ms': session.get('output_timings', {})
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _download_urls(session_id, outputs):
+    """
+    Build download URLs for the output files of a session
+    """
+    return {fmt: f"/api/transcription/download/{session_id}/{fmt}" for fmt in outputs}
+
 @transcription_bp.route('/download/<session_id>/<format>', methods=['GET'])
 def download_output(session_id, format):
     """
     Download output file for a session
+    
+    Text formats are streamed straight from the session when ?stream=1 is
+    given or when no generated file exists for the format, including files
+    removed since they were generated. A generated output is streamed from
+    the segments it was rendered from (up-sots or the full transcript).
     """
     try:
         # Check if session exists
-        if session_id not in sessions:
+        session = sessions.get(session_id)
+        if session is None:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        session = sessions[session_id]
+        # Stream text formats without writing them to disk
+        writer_class = WRITERS.get(format)
+        stream_requested = request.args.get('stream', 'false').lower() in ('1', 'true')
+        generated = session.get('outputs', {}).get(format)
+        file_missing = generated is None or not os.path.exists(generated['path'])
+        if writer_class and writer_class.streamable and (stream_requested or file_missing):
+            segments = _output_segments(session, generated)
+            if segments:
+                return _stream_output(session, format, writer_class, segments)
+        
+        # Report formats that are still rendering in the background
+        if format in session.get('pending_outputs', []):
+            return jsonify({'success': False, 'pending': True, 'error': f'{format.upper()} output is still being generated'}), 202
         
         # Check if outputs exist
         if 'outputs' not in session or not session['outputs']:
@@ -411,16 +597,147 @@ def download_output(session_id, format):
         if not os.path.exists(file_path):
             return jsonify({'success': False, 'error': 'Output file not found'}), 404
         
-        # Send file
-        return send_file(
-            file_path,
-            as_attachment=True,
-            download_name=file_info['filename']
+        # Send file with validators and byte-range support
+        return send_file_conditional(file_path, download_name=file_info['filename'])
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _output_segments(session, generated=None):
+    """
+    Get the segments an output is rendered from
+    
+    Outputs generated with scope 'full' come from the full transcript,
+    everything else from the up-sots. Returns None if they are not available.
+    """
+    if generated and generated.get('scope') == 'full':
+        transcription = session.get('transcription') or {}
+        return transcription.get('segments') if transcription.get('success') else None
+    return session.get('up_sots') or None
+
+def _stream_output(session, fmt, writer_class, segments):
+    """
+    Build a chunked response that renders a text format as it is sent
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"transcript_{timestamp}.{writer_class.extension}"
+    
+    chunks = output_generator.iter_output(fmt, segments, session.get('audio_file'))
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=writer_class.mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@transcription_bp.route('/download-bundle/<session_id>', methods=['GET'])
+def download_bundle(session_id):
+    """
+    Download a ZIP bundle of the outputs for a session
+    
+    Query parameters:
+        formats: Comma separated formats (defaults to every generated format)
+        include_audio: Add the source audio to the bundle
+    
+    The first request streams the ZIP as it is built. Once complete it is
+    kept in the output cache, so repeat and Range/resume requests are
+    served from disk.
+    """
+    try:
+        # Check if session exists
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        outputs = session.get('outputs', {})
+        
+        if request.args.get('formats'):
+            formats = [fmt.strip() for fmt in request.args['formats'].split(',') if fmt.strip()]
+        else:
+            formats = list(outputs.keys())
+        
+        if not formats:
+            return jsonify({'success': False, 'error': 'No outputs available'}), 400
+        
+        # Wait for background formats to finish
+        pending = [fmt for fmt in formats if fmt in session.get('pending_outputs', [])]
+        if pending:
+            return jsonify({'success': False, 'pending': True, 'pending_formats': pending,
+                            'error': 'Some outputs are still being generated'}), 202
+        
+        # Collect entries: generated files first, text formats rendered on the fly
+        entries = []
+        base_filename = session.get('output_generation') or f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        for fmt in formats:
+            writer_class = WRITERS.get(fmt)
+            if writer_class is None:
+                return jsonify({'success': False, 'error': f'Unsupported format: {fmt}'}), 400
+            
+            arcname = f"{base_filename}.{writer_class.extension}"
+            segments = _output_segments(session, outputs.get(fmt)) if writer_class.streamable else None
+            if fmt in outputs and os.path.exists(outputs[fmt]['path']):
+                entries.append(BundleEntry(arcname, path=outputs[fmt]['path']))
+            elif segments:
+                entries.append(BundleEntry(
+                    arcname,
+                    chunks=lambda fmt=fmt, segments=segments: output_generator.iter_output(fmt, segments, session.get('audio_file')),
+                    identity=f"{fmt}:{segments_digest(segments, session.get('audio_file'))}"
+                ))
+            else:
+                return jsonify({'success': False, 'error': f'No {fmt.upper()} output available'}), 400
+        
+        include_audio = request.args.get('include_audio', 'false').lower() in ('1', 'true')
+        if include_audio:
+            audio_file = session.get('audio_file')
+            if not audio_file or not os.path.exists(audio_file):
+                return jsonify({'success': False, 'error': 'Audio file not found'}), 404
+            entries.append(BundleEntry(os.path.basename(audio_file), path=audio_file))
+        
+        # Bundles with audio are kept apart from rendered outputs, and only
+        # written to disk when a client resumes one
+        cache = output_generator.bundle_cache if include_audio else output_generator.cache
+        key = cache.make_key(bundle_key(entries), 'zip')
+        download_name = f"{base_filename}.zip"
+        
+        # Serve a finished bundle from disk, building it first for Range requests
+        cached_path = cache.get(key, 'zip')
+        if cached_path is None and request.range is not None:
+            cached_path = build_zip(entries, cache, key)
+        
+        if cached_path:
+            return send_file_conditional(cached_path, download_name=download_name, mimetype='application/zip')
+        
+        chunks = iter_zip(entries) if include_audio else iter_zip_to_cache(entries, cache, key)
+        return Response(
+            stream_with_context(chunks),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': f'attachment; filename="{download_name}"',
+                'Accept-Ranges': 'bytes'
+            }
         )
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@transcription_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Get the progress of a batch job
+    
+    Pass ?items=0 to leave out the per-item status.
+    """
+    try:
+        include_items = request.args.get('items', 'true').lower() not in ('0', 'false')
+        job = job_registry.get(job_id, include_items=include_items)
+        
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        
+        return jsonify({'success': True, 'job': job})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @transcription_bp.route('/send-email/<session_id>', methods=['POST'])
 def send_email(session_id):
     """
@@ -428,11 +745,10 @@ def send_email(session_id):
     """
     try:
         # Check if session exists
-        if session_id not in sessions:
+        session = sessions.get(session_id)
+        if session is None:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        session = sessions[session_id]
-        
         # Check if outputs exist
         if 'outputs' not in session or not session['outputs']:
             return jsonify({'success': False, 'error': 'No outputs available'}), 400
@@ -463,14 +779,15 @@ def send_email(session_id):
             edl_file_path=edl_file_path,
             subject=request.json.get('subject', 'EDL File from Retro Transcription Tool'),
             body=request.json.get('body', 'Please find attached the EDL file generated from your recording.'),
-            additional_attachments=additional_attachments
+            additional_attachments=additional_attachments,
+            attachment_names={info['path']: info['filename'] for info in session['outputs'].values()}
         )
         
         if not result['success']:
             return jsonify({'success': False, 'error': result.get('error', 'Failed to send email')}), 500
         
         # Store email result in session
-        session['email_sent'] = result
+        sessions.update(session_id, lambda current: current.update(email_sent=result))
         
         return jsonify({
             'success': True,
@@ -480,41 +797,143 @@ def send_email(session_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Session fields each session-info field is built from, for change tracking
+SESSION_INFO_SOURCES = {
+    'timestamp': 'timestamp',
+    'status': 'status',
+    'parameters': 'parameters',
+    'segments_count': 'transcription',
+    'full_transcript': 'transcription',
+    'segments': 'transcription',
+    'up_sots_count': 'up_sots',
+    'up_sots': 'up_sots',
+    'available_formats': 'outputs',
+    'pending_formats': 'pending_outputs'
+}
+
+# Fields only sent when asked for with ?fields=
+SESSION_INFO_OPTIONAL = {'segments'}
+
+def _session_info(session_id, session):
+    """
+    Build the client view of a session (no file paths)
+    """
+    info = {
+        'session_id': session_id,
+        'version': session.get(VERSION_KEY, 0),
+        'timestamp': session['timestamp'],
+        'status': session['status'],
+        'parameters': session['parameters']
+    }
+    
+    if 'transcription' in session and session['transcription'].get('success', False):
+        info['segments_count'] = len(session['transcription']['segments'])
+        info['full_transcript'] = session['transcription']['full_transcript']
+        info['segments'] = session['transcription']['segments']
+    
+    if 'up_sots' in session:
+        info['up_sots_count'] = len(session['up_sots'])
+        info['up_sots'] = session['up_sots']
+    
+    if 'outputs' in session:
+        info['available_formats'] = list(session['outputs'].keys())
+        info['pending_formats'] = list(session.get('pending_outputs', []))
+    
+    return info
+
+def _session_info_delta(info, session, since):
+    """
+    Reduce a session view to what changed after version since
+    
+    Lists are sent as the changed items with their index, next to the
+    new length so clients can drop items past the end.
+    """
+    changes = session.get(CHANGES_KEY) or {'fields': {}, 'items': {}}
+    field_versions = changes['fields']
+    
+    delta = {'session_id': info['session_id'], 'version': info['version'], 'since': since}
+    for field, source in SESSION_INFO_SOURCES.items():
+        if field not in info or field in ('segments', 'up_sots'):
+            continue
+        stamp = field_versions.get(source)
+        if stamp is None or stamp[1] > since:
+            delta[field] = info[field]
+    
+    for name, count_field in (('up_sots', 'up_sots_count'), ('segments', 'segments_count')):
+        if name not in info:
+            continue
+        stamps = (changes['items'].get(name) or {}).get('stamps', [])
+        delta[count_field] = len(info[name])
+        delta[f'{name}_changes'] = [
+            {'index': i, 'item': item}
+            for i, item in enumerate(info[name])
+            if i >= len(stamps) or stamps[i][1] > since
+        ]
+    
+    delta['removed_fields'] = [
+        field for field, source in SESSION_INFO_SOURCES.items()
+        if field not in info and source in field_versions
+        and field_versions[source][0] is None and field_versions[source][1] > since
+    ]
+    return delta
+
 @transcription_bp.route('/session-info/<session_id>', methods=['GET'])
 def session_info(session_id):
     """
     Get information about a session
+    
+    Query parameters:
+        fields: Comma separated fields to return (segments is only sent when listed)
+        since: Version the client already has; only fields, up-sots and
+            segments changed after it are returned
+    
+    Responses carry an ETag for the session version; If-None-Match with
+    the current one gets 304 Not Modified.
     """
     try:
         # Check if session exists
-        if session_id not in sessions:
+        session = sessions.get(session_id)
+        if session is None:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        session = sessions[session_id]
-        
-        # Prepare safe session info (exclude file paths)
-        safe_info = {
-            'session_id': session_id,
-            'timestamp': session['timestamp'],
-            'status': session['status'],
-            'parameters': session['parameters']
-        }
-        
-        if 'transcription' in session and session['transcription'].get('success', False):
-            safe_info['segments_count'] = len(session['transcription']['segments'])
-            safe_info['full_transcript'] = session['transcription']['full_transcript']
-        
-        if 'up_sots' in session:
-            safe_info['up_sots_count'] = len(session['up_sots'])
-            safe_info['up_sots'] = session['up_sots']
-        
-        if 'outputs' in session:
-            safe_info['available_formats'] = list(session['outputs'].keys())
-        
-        return jsonify({
+        since = request.args.get('since', type=int)
+        if 'since' in request.args and since is None:
+            return jsonify({'success': False, 'error': 'since must be an integer'}), 400
+        
+        version = session.get(VERSION_KEY, 0)
+        etag = f'{session_id}-{version}'
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        info = _session_info(session_id, session)
+        if since is not None:
+            info = _session_info_delta(info, session, since)
+        
+        # Prepare safe session info, optionally projected to the requested fields
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+        if fields:
+            keep = set(fields) | {'session_id', 'version', 'since'}
+            keep |= {f'{field}_changes' for field in fields}
+            removed = [field for field in info.get('removed_fields', []) if field in keep]
+            info = {key: value for key, value in info.items() if key in keep}
+            # Deltas still list which of the requested fields were removed
+            if since is not None:
+                info['removed_fields'] = removed
+        else:
+            for field in SESSION_INFO_OPTIONAL:
+                info.pop(field, None)
+                info.pop(f'{field}_changes', None)
+        
+        response = jsonify({
             'success': True,
-            'session_info': safe_info
+            'session_info': info
         })
+        # Clients revalidate on every poll
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -570,6 +989,108 @@ def process_audio():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@transcription_bp.route('/batch', methods=['POST'])
+def batch_transcribe():
+    """
+    Transcribe several recordings concurrently on the shared job pool
+    
+    Send audio files as multipart "audio" fields, IDs of sessions already
+    uploaded through /upload-audio or /record-audio as "session_ids", or
+    both. Optional "parameters" (JSON) apply to every recording. A JSON
+    body with "session_ids" and "parameters" is accepted too.
+    
+    Every file gets its own session. Returns a batch ID; poll
+    /api/transcription/jobs/<batch_id> for per-file progress and results.
+    """
+    try:
+        if request.files:
+            session_ids = request.form.getlist('session_ids')
+            overrides = json.loads(request.form.get('parameters') or '{}')
+        else:
+            data = request.get_json(silent=True) or {}
+            session_ids = data.get('session_ids', [])
+            overrides = data.get('parameters') or {}
+        
+        if not isinstance(session_ids, list) or not isinstance(overrides, dict):
+            return jsonify({'success': False, 'error': 'Invalid session_ids or parameters'}), 400
+        session_ids = list(dict.fromkeys(str(session_id) for session_id in session_ids))
+        
+        audio_files = [audio_file for audio_file in request.files.getlist('audio') if audio_file.filename]
+        if not audio_files and not session_ids:
+            return jsonify({'success': False, 'error': 'No audio files or session IDs provided'}), 400
+        
+        for session_id in session_ids:
+            if sessions.get(session_id) is None:
+                return jsonify({'success': False, 'error': f'Session not found: {session_id}'}), 404
+        
+        # One session per uploaded file
+        items = [{'session_id': session_id} for session_id in session_ids]
+        for audio_file in audio_files:
+            session_id = str(uuid.uuid4())
+            sessions.save(session_id, {
+                'audio_file': audio_processor.save_audio_file(audio_file.read(), f'{session_id}.wav'),
+                'filename': audio_file.filename,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'uploaded',
+                'parameters': Parameters().to_dict()
+            })
+            items.append({'session_id': session_id, 'filename': audio_file.filename})
+        
+        def transcribe_item(session_id):
+            session = sessions.get(session_id)
+            if session is None:
+                raise ValueError('Session not found')
+            if not os.path.exists(session.get('audio_file', '')):
+                raise ValueError('Audio file not found')
+            
+            params = Parameters.from_dict(session.get('parameters')).updated(overrides)
+            session['parameters'] = params.to_dict()
+            result = _transcribe_session(session, params)
+            
+            if not result['success']:
+                sessions.update(session_id, lambda current: current.update(status='failed'))
+                raise RuntimeError(result.get('error', 'Transcription failed'))
+            
+            # Merge, so changes made while transcribing (a script, say) are kept
+            _store_transcription(session_id, session)
+            
+            return {
+                'session_id': session_id,
+                'filename': session.get('filename'),
+                'segments_count': len(result['segments']),
+                'up_sots_count': len(session['up_sots'])
+            }
+        
+        batch_id = job_registry.submit('transcribe', [item['session_id'] for item in items], transcribe_item)
+        
+        return jsonify({
+            'success': True,
+            'batch_id': batch_id,
+            'total': len(items),
+            'sessions': items,
+            'status_url': f'/api/transcription/jobs/{batch_id}'
+        }), 202
+        
+    except json.JSONDecodeError:
+        return jsonify({'success': False, 'error': 'parameters must be valid JSON'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@transcription_bp.route('/storage-stats', methods=['GET'])
+def storage_stats():
+    """
+    Get space reclaimed by the storage collector and output cache usage
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'collector': storage_collector.get_stats(),
+            'output_cache': output_generator.cache.get_stats()
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @transcription_bp.route('/get-available-microphones', methods=['GET'])
 def get_available_microphones():
     """
@@ -0,0 +1,194 @@
+"""
+Static asset serving from an in-memory manifest with fingerprinted URLs
+"""
+
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+from flask import abort, current_app, request, send_file
+
+from src.routes.api.compression import brotli, is_compressible
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Hex digits of the content hash put in fingerprinted file names
+FINGERPRINT_LENGTH = 12
+
+# Files whose references to other assets are rewritten to fingerprinted URLs
+REWRITTEN_EXTENSIONS = {'.css', '.html'}
+
+# Precompressed variants are only kept when at least this much smaller
+MIN_COMPRESSION_SAVING = 0.1
+
+
+class StaticAssets:
+    """
+    Manifest of the static folder built once at startup
+
+    Every file is hashed and given a fingerprinted name
+    (css/new-styles.css becomes css/new-styles.<hash>.css), which is
+    served with a year-long immutable Cache-Control. Plain names are still
+    served, with no-cache and an ETag so they are revalidated. References
+    to /static/ in HTML and CSS are rewritten to the fingerprinted URLs, so
+    a changed image gets a new URL in the stylesheet that uses it.
+
+    Text assets are kept in memory with gzip and brotli variants made at
+    the highest levels, picked per request from Accept-Encoding. Requests
+    are answered from the manifest without touching the filesystem, except
+    for streaming binary files such as images. Files added after startup
+    are not served until the app restarts.
+    """
+
+    def __init__(self, static_folder, url_path='/static'):
+        """
+        Build the manifest
+
+        Args:
+            static_folder (str): Folder with the static files
+            url_path (str): URL prefix the files are served under
+        """
+        self.static_folder = static_folder
+        self.url_path = url_path.rstrip('/')
+        self._reference = re.compile(re.escape(self.url_path) + r'/([\w./-]+)')
+        self.assets = {}
+        self.fingerprinted = {}
+        self.build()
+
+    def build(self):
+        """
+        Scan the static folder and rebuild the manifest
+        """
+        files = []
+        for root, _, names in os.walk(self.static_folder):
+            for name in names:
+                path = os.path.join(root, name)
+                files.append(os.path.relpath(path, self.static_folder).replace(os.sep, '/'))
+
+        # Rewritten files go last, so the assets they refer to already have fingerprints
+        files.sort(key=lambda rel: (os.path.splitext(rel)[1] in REWRITTEN_EXTENSIONS, rel))
+
+        assets = {}
+        fingerprinted = {}
+        for rel in files:
+            entry = self._load(rel, assets)
+            assets[rel] = entry
+            fingerprinted[entry['fingerprinted']] = rel
+
+        self.assets = assets
+        self.fingerprinted = fingerprinted
+
+    def url(self, rel):
+        """
+        Get the fingerprinted URL of an asset
+
+        Args:
+            rel (str): Path relative to the static folder
+
+        Returns:
+            str: URL of the asset, or the plain URL if it is not in the manifest
+        """
+        entry = self.assets.get(rel)
+        return f"{self.url_path}/{entry['fingerprinted'] if entry else rel}"
+
+    def response(self, path):
+        """
+        Build the response for an asset
+
+        Args:
+            path (str): Plain or fingerprinted path relative to the static folder
+
+        Returns:
+            Response: The asset, or None if it is not in the manifest
+        """
+        rel = self.fingerprinted.get(path)
+        immutable = rel is not None and rel != path
+        entry = self.assets.get(rel or path)
+        if entry is None:
+            return None
+
+        encoding = request.accept_encodings.best_match(list(entry['variants'])) if entry['variants'] else None
+
+        if encoding:
+            response = current_app.response_class(entry['variants'][encoding], mimetype=entry['mimetype'])
+            response.headers['Content-Encoding'] = encoding
+            response.set_etag(f"{entry['etag']}-{encoding}")
+        elif entry['body'] is not None:
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            response.set_etag(entry['etag'])
+        else:
+            response = send_file(entry['path'], mimetype=entry['mimetype'], etag=entry['etag'],
+                                 conditional=True, max_age=IMMUTABLE_MAX_AGE if immutable else 0)
+
+        if entry['variants']:
+            response.vary.add('Accept-Encoding')
+
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+
+        # send_file() already answered conditional and range requests
+        if entry['body'] is not None:
+            response.make_conditional(request)
+        return response
+
+    def send_static(self, filename):
+        """
+        View for the app's /static/<filename> route
+        """
+        response = self.response(filename)
+        if response is None:
+            abort(404)
+        return response
+
+    def _load(self, rel, assets):
+        path = os.path.join(self.static_folder, rel)
+        base, ext = os.path.splitext(rel)
+        mimetype = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+
+        body = None
+        if ext in REWRITTEN_EXTENSIONS or is_compressible(mimetype):
+            with open(path, 'rb') as f:
+                body = f.read()
+            if ext in REWRITTEN_EXTENSIONS:
+                body = self._rewrite_references(body, assets)
+            digest = hashlib.sha256(body).hexdigest()
+        else:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            digest = digest.hexdigest()
+
+        variants = {}
+        if body is not None and is_compressible(mimetype):
+            candidates = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli:
+                candidates['br'] = brotli.compress(body, quality=11)
+            # Offer brotli first when it is available
+            for encoding in ('br', 'gzip'):
+                data = candidates.get(encoding)
+                if data is not None and len(data) <= len(body) * (1 - MIN_COMPRESSION_SAVING):
+                    variants[encoding] = data
+
+        return {
+            'path': path,
+            'body': body,
+            'mimetype': mimetype,
+            'etag': digest,
+            'fingerprinted': f"{base}.{digest[:FINGERPRINT_LENGTH]}{ext}",
+            'variants': variants
+        }
+
+    def _rewrite_references(self, body, assets):
+        def replace(match):
+            entry = assets.get(match.group(1))
+            return f"{self.url_path}/{entry['fingerprinted']}" if entry else match.group(0)
+
+        text = body.decode('utf-8')
+        return self._reference.sub(replace, text).encode('utf-8')
@@ -0,0 +1,38 @@
+"""
+Shared fixtures for the API tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep background workers off and state out of shared locations; the
+# routes read these when they are first imported
+_state_folder = tempfile.mkdtemp(prefix='retro_transcription_tests_')
+os.environ.setdefault('SESSION_STORE', 'memory')
+os.environ.setdefault('TRANSCODE_ENABLED', 'false')
+os.environ.setdefault('STORAGE_GC_ENABLED', 'false')
+os.environ.setdefault('JOB_DB_PATH', os.path.join(_state_folder, 'jobs.db'))
+os.environ.setdefault('SESSION_DB_PATH', os.path.join(_state_folder, 'sessions.db'))
+os.environ.setdefault('AUDIO_STORAGE_FOLDER', os.path.join(_state_folder, 'storage'))
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_state_folder, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    from src.main import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
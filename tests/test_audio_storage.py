@@ -0,0 +1,42 @@
+"""
+Recordings whose files go missing and come back
+"""
+
+import os
+
+import pytest
+
+from src.models.transcription.audio_storage import AudioStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return AudioStorage(str(tmp_path / 'storage'))
+
+
+@pytest.fixture
+def recording_id(storage, tmp_path):
+    source = tmp_path / 'source.wav'
+    source.write_bytes(os.urandom(256))
+    return storage.save_recording(str(source))['recording_id']
+
+
+def test_restored_file_is_listed_again(storage, recording_id):
+    path = storage.index.get(recording_id)['path']
+    os.rename(path, path + '.away')
+
+    assert not storage.get_recording(recording_id)['success']
+    assert recording_id not in storage.index.select_ids()
+
+    os.rename(path + '.away', path)
+
+    assert storage.get_recording(recording_id)['success']
+    assert recording_id in storage.index.select_ids()
+
+
+def test_probe_clears_missing_flag(storage, recording_id):
+    storage.index.set_file_missing(recording_id, True)
+    assert recording_id not in storage.index.select_ids()
+
+    assert storage.probe_recording(recording_id) is not None
+    assert recording_id in storage.index.select_ids()
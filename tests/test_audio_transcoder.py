@@ -0,0 +1,58 @@
+"""
+Transcoding and WAV decoding decided from the probed codec
+"""
+
+import wave
+
+import pytest
+
+from src.models.transcription import audio_transcoder
+from src.models.transcription.audio_storage import AudioStorage
+from src.models.transcription.audio_transcoder import AudioTranscoder
+
+
+@pytest.fixture
+def transcoder(tmp_path):
+    return AudioTranscoder(AudioStorage(str(tmp_path / 'storage')))
+
+
+def write_pcm_wav(path):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b'\x00\x00' * 1600)
+
+
+@pytest.mark.parametrize('recording, expected', [
+    ({'audio_codec': 'pcm_s16le'}, True),
+    ({'audio_codec': 'opus', 'path': 'browser.wav'}, False),
+    ({'audio_codec': None, 'path': 'unprobed.wav'}, False),
+    ({'audio_codec': 'pcm_s16le', 'codec': 'flac'}, False),
+    ({'audio_codec': 'pcm_s16le', 'transcode_error': 'failed'}, False)
+])
+def test_needs_transcode(recording, expected):
+    assert AudioTranscoder.needs_transcode(recording) is expected
+
+
+def test_pcm_wav_is_sent_as_stored(transcoder, tmp_path):
+    path = tmp_path / 'speech.wav'
+    write_pcm_wav(path)
+
+    assert transcoder.decoded_path({'id': 'pcm', 'path': str(path), 'audio_codec': 'pcm_s16le'}) == str(path)
+
+
+def test_compressed_audio_named_wav_is_decoded(transcoder, tmp_path, monkeypatch):
+    path = tmp_path / 'browser.wav'
+    path.write_bytes(b'\x1aE\xdf\xa3 webm')
+
+    class Decoded:
+        def export(self, out_path, format):
+            write_pcm_wav(out_path)
+
+    monkeypatch.setattr(audio_transcoder.AudioSegment, 'from_file', lambda source: Decoded())
+
+    decoded = transcoder.decoded_path({'id': 'opus', 'path': str(path), 'audio_codec': 'opus'})
+    assert decoded != str(path)
+    with open(decoded, 'rb') as f:
+        assert f.read(4) == b'RIFF'
@@ -0,0 +1,52 @@
+"""
+Recordings saved from several processes at once, as gunicorn workers do
+"""
+
+import os
+import json
+import multiprocessing
+
+from src.models.transcription.audio_storage import AudioStorage
+
+WORKERS = 4
+SAVES_PER_WORKER = 50
+LEGACY_RECORDINGS = 20
+
+
+def _save_recordings(args):
+    storage_folder, worker = args
+    storage = AudioStorage(storage_folder)
+
+    source = os.path.join(storage_folder, f'source_{worker}.wav')
+    with open(source, 'wb') as f:
+        f.write(os.urandom(256))
+
+    saved = []
+    for i in range(SAVES_PER_WORKER):
+        result = storage.save_recording(source, {'worker': worker, 'index': i})
+        assert result['success'], result
+        saved.append(result['recording_id'])
+    return saved
+
+
+def test_no_recording_is_lost(tmp_path):
+    storage_folder = str(tmp_path)
+
+    # Every process opens the index at the same time and races to import these
+    with open(os.path.join(storage_folder, 'recordings_metadata.json'), 'w') as f:
+        json.dump([{'id': f'legacy-{i}', 'path': f'/missing/legacy-{i}.wav', 'date_created': '2020-01-01'}
+                   for i in range(LEGACY_RECORDINGS)], f)
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(WORKERS) as pool:
+        results = pool.map(_save_recordings, [(storage_folder, worker) for worker in range(WORKERS)])
+
+    saved = [recording_id for ids in results for recording_id in ids]
+    assert len(set(saved)) == WORKERS * SAVES_PER_WORKER
+
+    storage = AudioStorage(storage_folder)
+    assert storage.index.count() == WORKERS * SAVES_PER_WORKER + LEGACY_RECORDINGS
+    for recording_id in saved:
+        recording = storage.index.get(recording_id)
+        assert recording is not None
+        assert os.path.exists(recording['path'])
@@ -0,0 +1,98 @@
+"""
+Conditional and byte-range requests on the output and recording downloads
+"""
+
+import os
+from email.utils import formatdate
+
+import pytest
+
+from src.models.transcription.audio_storage import AudioStorage
+from src.routes.api import audio_library, transcription
+
+CONTENT = os.urandom(64 * 1024)
+
+
+@pytest.fixture(params=['output', 'recording'])
+def download_url(request, tmp_path, monkeypatch):
+    """
+    URL of a stored file holding CONTENT, on each download route
+    """
+    source = tmp_path / 'source.wav'
+    source.write_bytes(CONTENT)
+
+    if request.param == 'output':
+        session_id = 'conditional-download-test'
+        transcription.sessions.save(session_id, {
+            'outputs': {'pdf': {'path': str(source), 'filename': 'transcript.pdf'}}
+        })
+        yield f'/api/transcription/download/{session_id}/pdf'
+        transcription.sessions.delete(session_id)
+    else:
+        storage = AudioStorage(str(tmp_path / 'storage'))
+        monkeypatch.setattr(audio_library, 'audio_storage', storage)
+        result = storage.save_recording(str(source), {'name': 'test'})
+        assert result['success']
+        yield f"/api/audio/download-recording/{result['recording_id']}"
+
+
+def test_full_download_has_validators(client, download_url):
+    response = client.get(download_url)
+
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+
+def test_if_none_match(client, download_url):
+    etag = client.get(download_url).headers['ETag']
+
+    response = client.get(download_url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(download_url, headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_if_modified_since(client, download_url):
+    last_modified = client.get(download_url).headers['Last-Modified']
+
+    response = client.get(download_url, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(download_url, headers={'If-Modified-Since': formatdate(0, usegmt=True)})
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_range(client, download_url):
+    response = client.get(download_url, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response.data == CONTENT[100:200]
+
+    response = client.get(download_url, headers={'Range': 'bytes=-50'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[-50:]
+
+    response = client.get(download_url, headers={'Range': f'bytes={len(CONTENT)}-'})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+
+def test_if_range(client, download_url):
+    etag = client.get(download_url).headers['ETag']
+
+    response = client.get(download_url, headers={'Range': 'bytes=1000-', 'If-Range': etag})
+    assert response.status_code == 206
+    assert response.data == CONTENT[1000:]
+
+    # A changed file is sent whole rather than spliced onto the old bytes
+    response = client.get(download_url, headers={'Range': 'bytes=1000-', 'If-Range': '"stale"'})
+    assert response.status_code == 200
+    assert response.data == CONTENT
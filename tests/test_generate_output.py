@@ -0,0 +1,32 @@
+"""
+Output generation requests
+"""
+
+import pytest
+
+from src.routes.api import transcription
+
+UP_SOTS = [{'timecode': '00:00:01', 'text': 'hello', 'start_ms': 1000, 'end_ms': 2000, 'duration_ms': 1000}]
+
+
+@pytest.fixture
+def session_id():
+    session_id = 'generate-output-test'
+    transcription.sessions.save(session_id, {'audio_file': 'interview.wav', 'up_sots': UP_SOTS})
+    yield session_id
+    transcription.sessions.delete(session_id)
+
+
+def test_body_without_json_uses_defaults(client, session_id):
+    response = client.post(f'/api/transcription/generate-output/{session_id}', data='formats=txt')
+
+    assert response.status_code == 200
+    assert sorted(response.json['formats']) == ['edl', 'pdf', 'txt']
+
+
+def test_json_body_selects_formats(client, session_id):
+    response = client.post(f'/api/transcription/generate-output/{session_id}',
+                           json={'formats': {'txt': True, 'pdf': False, 'edl': False}})
+
+    assert response.status_code == 200
+    assert response.json['formats'] == ['txt']
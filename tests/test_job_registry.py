@@ -0,0 +1,41 @@
+"""
+Job status shared between registries, as between gunicorn workers
+"""
+
+import threading
+
+from src.models.transcription.job_registry import JobRegistry
+
+
+def test_job_is_visible_to_other_workers(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    submitting = JobRegistry(max_workers=2, db_path=db_path)
+    polling = JobRegistry(max_workers=1, db_path=db_path)
+
+    release = threading.Event()
+    finished = threading.Event()
+
+    def handler(item_id):
+        release.wait(5)
+        if item_id == 'bad':
+            raise ValueError('unreadable')
+        return {'item': item_id}
+
+    job_id = submitting.submit('transcribe', ['a', 'bad'], handler, on_complete=lambda _: finished.set())
+
+    job = polling.get(job_id)
+    assert job['status'] == 'running'
+    assert job['total'] == 2
+    assert list(job['items']) == ['a', 'bad']
+
+    release.set()
+    assert finished.wait(5)
+
+    job = polling.get(job_id)
+    assert job['status'] == 'completed_with_errors'
+    assert job['progress'] == 1.0
+    assert job['items']['a'] == {'status': 'completed', 'result': {'item': 'a'},
+                                 'elapsed_ms': job['items']['a']['elapsed_ms']}
+    assert job['items']['bad']['error'] == 'unreadable'
+    assert 'items' not in polling.get(job_id, include_items=False)
+    assert polling.get('unknown') is None
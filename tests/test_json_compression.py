@@ -0,0 +1,145 @@
+"""
+JSON responses through FastJSONProvider and init_compression
+"""
+
+import gzip
+import json
+import uuid
+import decimal
+from datetime import date, datetime, timezone
+
+import pytest
+from flask import Flask, Response, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from src.routes.api import compression, json_provider
+from src.routes.api.compression import init_compression
+from src.routes.api.json_provider import FastJSONProvider
+
+PAYLOADS = [
+    {'success': True, 'up_sots': [{'timecode': '00:00:01', 'text': 'café — ok', 'start_ms': 1000,
+                                   'duration': 1.5, 'relevance_score': 0.25}]},
+    {'date_created': datetime(2024, 5, 12, 9, 30, tzinfo=timezone.utc), 'day': date(2024, 5, 12)},
+    {3: 'three', 1: 'one', 2: [None, False]},
+    {'recording_id': uuid.UUID(int=1), 'size': decimal.Decimal('1.5'), 'big': 2 ** 70},
+    [{'b': 1, 'a': {'d': [], 'c': {}}}]
+]
+
+LARGE = {'text': 'the mayor said the budget would rise ' * 200}
+SMALL = {'text': 'short'}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    init_compression(app, min_size=1024)
+
+    @app.route('/large')
+    def large():
+        response = jsonify(LARGE)
+        response.set_etag('large')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify(SMALL)
+
+    @app.route('/partial')
+    def partial():
+        response = jsonify(LARGE)
+        response.status_code = 206
+        return response
+
+    @app.route('/not-modified')
+    def not_modified():
+        response = jsonify(LARGE)
+        response.status_code = 304
+        return response
+
+    @app.route('/encoded')
+    def encoded():
+        response = Response(gzip.compress(json.dumps(LARGE).encode()), mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    @app.route('/binary')
+    def binary():
+        return Response(b'\0' * 4096, mimetype='application/octet-stream')
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_fast_provider_matches_the_default(app, payload):
+    fast = FastJSONProvider(app)
+    default = DefaultJSONProvider(app)
+
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+    with app.app_context():
+        assert json.loads(fast.response(payload).get_data()) == json.loads(default.response(payload).get_data())
+
+
+def test_fast_provider_without_orjson(app, monkeypatch):
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    fast = FastJSONProvider(app)
+    default = DefaultJSONProvider(app)
+
+    for payload in PAYLOADS:
+        assert fast.dumps(payload) == default.dumps(payload)
+    assert fast.loads('{"a": [1, 2]}') == {'a': [1, 2]}
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'br'])
+def test_large_response_is_compressed(client, encoding):
+    if encoding == 'br' and compression.brotli is None:
+        pytest.skip('Brotli is not installed')
+
+    response = client.get('/large', headers={'Accept-Encoding': encoding})
+
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = gzip.decompress(response.data) if encoding == 'gzip' else compression.brotli.decompress(response.data)
+    assert json.loads(body) == LARGE
+
+
+def test_compressed_etag_is_weak(client):
+    assert client.get('/large').headers['ETag'] == '"large"'
+    assert client.get('/large', headers={'Accept-Encoding': 'gzip'}).headers['ETag'] == 'W/"large"'
+
+
+def test_size_threshold(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.json == SMALL
+
+
+def test_identity_is_sent_when_nothing_is_accepted(client):
+    response = client.get('/large', headers={'Accept-Encoding': 'identity'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.json == LARGE
+
+
+@pytest.mark.parametrize('path', ['/partial', '/not-modified', '/encoded'])
+def test_responses_left_alone(client, path):
+    plain = client.get(path)
+    response = client.get(path, headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers.get('Content-Encoding') == plain.headers.get('Content-Encoding')
+    assert response.data == plain.data
+
+
+def test_binary_response_is_not_compressed(client):
+    response = client.get('/binary', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
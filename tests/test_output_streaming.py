@@ -0,0 +1,82 @@
+"""
+Text outputs streamed from the session when no generated file is left
+"""
+
+import io
+import zipfile
+
+import pytest
+
+from src.routes.api import transcription
+
+UP_SOTS = [{'timecode': '00:00:01', 'text': 'hello', 'start_ms': 1000, 'end_ms': 2000, 'duration_ms': 1000}]
+
+
+@pytest.fixture
+def session_id(tmp_path):
+    kept = tmp_path / 'kept.txt'
+    kept.write_text('generated')
+    session_id = 'output-streaming-test'
+    transcription.sessions.save(session_id, {
+        'up_sots': UP_SOTS,
+        'outputs': {
+            'txt': {'path': str(kept), 'filename': 'kept.txt'},
+            'srt': {'path': str(tmp_path / 'removed.srt'), 'filename': 'removed.srt'},
+            'pdf': {'path': str(tmp_path / 'removed.pdf'), 'filename': 'removed.pdf'}
+        }
+    })
+    yield session_id
+    transcription.sessions.delete(session_id)
+
+
+def test_existing_file_is_sent(client, session_id):
+    response = client.get(f'/api/transcription/download/{session_id}/txt')
+    assert response.status_code == 200
+    assert response.data == b'generated'
+
+
+@pytest.mark.parametrize('fmt', ['srt', 'vtt'])
+def test_missing_file_is_streamed(client, session_id, fmt):
+    response = client.get(f'/api/transcription/download/{session_id}/{fmt}')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert b'hello' in response.data
+
+
+def test_missing_pdf_is_not_found(client, session_id):
+    response = client.get(f'/api/transcription/download/{session_id}/pdf')
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def full_scope_session_id(tmp_path):
+    session_id = 'full-scope-streaming-test'
+    transcription.sessions.save(session_id, {
+        'up_sots': UP_SOTS,
+        'transcription': {'success': True, 'segments': UP_SOTS + [
+            {'timecode': '00:00:05', 'text': 'not an up-sot', 'start_ms': 5000, 'end_ms': 6000, 'duration_ms': 1000}
+        ]},
+        'outputs': {'srt': {'path': str(tmp_path / 'removed.srt'), 'filename': 'removed.srt', 'scope': 'full'}}
+    })
+    yield session_id
+    transcription.sessions.delete(session_id)
+
+
+def test_full_transcript_output_is_streamed_from_the_transcript(client, full_scope_session_id):
+    response = client.get(f'/api/transcription/download/{full_scope_session_id}/srt')
+    assert response.status_code == 200
+    assert b'not an up-sot' in response.data
+
+
+def test_full_transcript_bundle_entry_uses_the_transcript(client, full_scope_session_id):
+    response = client.get(f'/api/transcription/download-bundle/{full_scope_session_id}?formats=srt')
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.data)) as bundle:
+        assert b'not an up-sot' in bundle.read(bundle.namelist()[0])
+
+
+def test_full_transcript_output_without_transcript_is_not_found(client, full_scope_session_id):
+    transcription.sessions.update(full_scope_session_id, lambda current: current.pop('transcription'))
+
+    response = client.get(f'/api/transcription/download/{full_scope_session_id}/srt')
+    assert response.status_code == 404
@@ -0,0 +1,31 @@
+"""
+Timecodes written by the output formats
+"""
+
+from src.models.transcription.output_generator import OutputGenerator
+
+SEGMENTS = [
+    {'timecode': '01:23', 'text': 'short form'},
+    {'timecode': '01:02:03', 'text': 'long form', 'start_ms': 3723000, 'end_ms': 3724000}
+]
+
+
+def render(fmt, tmp_path):
+    generator = OutputGenerator(str(tmp_path))
+    return ''.join(
+        chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        for chunk in generator.iter_output(fmt, SEGMENTS, 'interview.wav')
+    )
+
+
+def test_txt_keeps_timecodes_as_written(tmp_path):
+    text = render('txt', tmp_path)
+
+    assert '[01:23] short form' in text
+    assert '[01:02:03] long form' in text
+
+
+def test_timed_formats_normalise_timecodes(tmp_path):
+    assert '00:01:23,000 --> 00:01:28,000' in render('srt', tmp_path)
+    assert '00:01:23.000 --> 00:01:28.000' in render('vtt', tmp_path)
+    assert '00:01:23:00 00:01:28:00' in render('edl', tmp_path)
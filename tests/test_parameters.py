@@ -0,0 +1,94 @@
+"""
+Immutable Parameters against the mutable ParameterControls they replaced
+"""
+
+import copy
+import pickle
+
+import pytest
+
+from src.models.transcription.parameter_controls import ParameterControls, Parameters
+
+DEFAULTS = {'up_sots_count': 10, 'sensitivity': 0.5, 'sort_by_relevance': False, 'timecode': '00:00:00'}
+
+UPDATES = [
+    {'up_sots_count': 12},
+    {'up_sots_count': '7', 'sensitivity': '0.25'},
+    {'up_sots_count': 99, 'sensitivity': -3},
+    {'up_sots_count': -1, 'sensitivity': 4.5},
+    {'up_sots_count': 'many', 'sensitivity': None},
+    {'sort_by_relevance': 1, 'timecode': '01:02:03'},
+    {'timecode': '1:02:03'},
+    {'timecode': '01:02'},
+    {'timecode': 'ab:cd:ef'},
+    {'timecode': 10203},
+    {'unknown': 'ignored'}
+]
+
+
+def test_defaults():
+    assert Parameters().to_dict() == DEFAULTS
+    assert Parameters.from_dict(None) == Parameters()
+    assert Parameters.from_dict({}) == Parameters()
+
+
+@pytest.mark.parametrize('params', UPDATES)
+def test_updated_matches_parameter_controls(params):
+    controls = ParameterControls()
+    controls.set_parameters({'up_sots_count': 5, 'sensitivity': 0.75, 'timecode': '00:10:00'})
+    current = Parameters.from_dict(controls.get_parameters())
+
+    assert current.updated(params).to_dict() == controls.set_parameters(params)
+
+
+def test_updated_does_not_change_the_original():
+    params = Parameters(up_sots_count=5)
+
+    assert params.updated({'up_sots_count': 6}).up_sots_count == 6
+    assert params.up_sots_count == 5
+
+
+def test_from_dict_clamps_and_falls_back_to_defaults():
+    params = Parameters.from_dict({'up_sots_count': 45, 'sensitivity': -0.5, 'sort_by_relevance': 'yes',
+                                   'timecode': 'noon', 'unknown': 1})
+
+    assert params.to_dict() == {'up_sots_count': 30, 'sensitivity': 0.0, 'sort_by_relevance': True,
+                                'timecode': '00:00:00'}
+    assert Parameters.from_dict({'up_sots_count': 'x', 'sensitivity': 'y'}).to_dict() == DEFAULTS
+
+
+def test_equal_values_hash_alike():
+    first = Parameters.from_dict({'up_sots_count': '12', 'sensitivity': 0.25})
+    second = Parameters(up_sots_count=12, sensitivity=0.25)
+
+    assert first == second
+    assert hash(first) == hash(second)
+    assert len({first, second, Parameters()}) == 2
+    assert first != Parameters(up_sots_count=13, sensitivity=0.25)
+    assert first != first.to_dict()
+
+
+@pytest.mark.parametrize('round_trip', [
+    lambda params: pickle.loads(pickle.dumps(params)),
+    copy.copy,
+    copy.deepcopy
+], ids=['pickle', 'copy', 'deepcopy'])
+def test_round_trip(round_trip):
+    params = Parameters(up_sots_count=3, sensitivity=0.9, sort_by_relevance=True, timecode='00:01:30')
+    restored = round_trip(params)
+
+    assert restored == params
+    assert hash(restored) == hash(params)
+    assert restored.to_dict() == params.to_dict()
+
+
+def test_attributes_cannot_be_changed():
+    params = Parameters()
+
+    with pytest.raises(AttributeError):
+        params.up_sots_count = 20
+    with pytest.raises(AttributeError):
+        params.extra = 1
+    with pytest.raises(AttributeError):
+        del params.timecode
+    assert params.to_dict() == DEFAULTS
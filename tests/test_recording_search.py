@@ -0,0 +1,80 @@
+"""
+Transcript search through FTS5 and through the LIKE fallback
+"""
+
+import pytest
+
+from src.models.transcription.recording_index import RecordingIndex
+
+INTERVIEW = [
+    {'start_ms': 0, 'end_ms': 2000, 'text': 'The mayor opened the meeting'},
+    {'start_ms': 2000, 'end_ms': 5000, 'text': 'The budget for roads will rise'},
+    {'start_ms': 5000, 'end_ms': 8000, 'text': 'Council members voted on the budget'},
+    {'start_ms': 8000, 'end_ms': 9000, 'text': ''}
+]
+BRIEFING = [
+    {'start_ms': 0, 'end_ms': 3000, 'text': 'Water prices and the 100% budget_cap'},
+    {'start_ms': 3000, 'end_ms': 6000, 'text': 'Questions about the mayor OR the council'}
+]
+
+
+@pytest.fixture(params=['fts5', 'like'])
+def index(request, tmp_path):
+    index = RecordingIndex(str(tmp_path / 'recordings.db'))
+    if request.param == 'fts5':
+        if not index.full_text:
+            pytest.skip('SQLite was built without FTS5')
+    else:
+        index.full_text = False
+
+    index.set_segments('interview', INTERVIEW, up_sots=[INTERVIEW[2]])
+    index.set_segments('briefing', BRIEFING)
+    return index
+
+
+def found(index, text, **kwargs):
+    return sorted((segment['recording_id'], segment['start_ms']) for segment in index.search_segments(text, **kwargs))
+
+
+def test_every_word_must_match(index):
+    assert found(index, 'budget') == [('briefing', 0), ('interview', 2000), ('interview', 5000)]
+    assert found(index, 'BUDGET council') == [('interview', 5000)]
+    assert found(index, 'budget zebra') == []
+
+
+def test_up_sots_only(index):
+    assert found(index, 'budget', up_sots_only=True) == [('interview', 5000)]
+
+    segment = index.search_segments('voted', up_sots_only=True)[0]
+    assert segment == {'recording_id': 'interview', 'start_ms': 5000, 'end_ms': 8000, 'up_sot': 1,
+                       'text': 'Council members voted on the budget'}
+
+
+def test_query_syntax_is_taken_literally(index):
+    assert found(index, 'mayor OR council') == [('briefing', 3000)]
+    assert found(index, '"mayor" (council*') == [('briefing', 3000)]
+    assert found(index, 'budget_cap') == [('briefing', 0)]
+    assert found(index, '100%') == [('briefing', 0)]
+    assert found(index, '%') == []
+    assert found(index, '') == []
+
+
+def test_limit(index):
+    assert len(index.search_segments('the', limit=2)) == 2
+
+
+def test_set_segments_replaces_the_transcript(index):
+    assert index.set_segments('interview', INTERVIEW) == 3
+    assert [segment['text'] for segment in index.get_segments('interview')] == [
+        'The mayor opened the meeting', 'The budget for roads will rise', 'Council members voted on the budget'
+    ]
+
+    assert index.set_segments('interview', [{'start_ms': 0, 'end_ms': 1000, 'text': 'Parks reopen'}]) == 1
+    assert index.get_segments('interview') == [{'start_ms': 0, 'end_ms': 1000, 'up_sot': 0, 'text': 'Parks reopen'}]
+    assert found(index, 'mayor') == [('briefing', 3000)]
+    assert found(index, 'parks') == [('interview', 0)]
+    assert found(index, 'budget', up_sots_only=True) == []
+
+    assert index.set_segments('interview', []) == 0
+    assert found(index, 'parks') == []
+    assert len(index.get_segments('briefing')) == 2
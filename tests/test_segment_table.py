@@ -0,0 +1,91 @@
+"""
+Up-sot ranking with SegmentTable against the original list code
+"""
+
+import random
+import re
+
+import pytest
+
+from src.models.transcription.segment_table import SegmentTable
+from src.routes.api import transcription
+
+
+def baseline_up_sots(segments, max_count=10, sensitivity=0.5, sort_by_relevance=False, reference_script=None):
+    """
+    get_up_sots() before SegmentTable
+    """
+    min_duration_ms = 1000 * (1.0 - sensitivity)
+    filtered = [dict(segment) for segment in segments if segment['duration_ms'] >= min_duration_ms]
+    if reference_script and sort_by_relevance:
+        script_words = set(re.findall(r'\b\w+\b', reference_script.lower()))
+        for segment in filtered:
+            words = set(re.findall(r'\b\w+\b', segment['text'].lower()))
+            segment['relevance_score'] = len(script_words & words) / len(script_words | words) if script_words and words else 0
+        filtered.sort(key=lambda x: x['relevance_score'], reverse=True)
+    else:
+        filtered.sort(key=lambda x: x['start_ms'])
+    return filtered[:max_count] if max_count > 0 else filtered
+
+
+def make_segments(count, seed=7):
+    # Few distinct words, start times and durations, so ties are common
+    rng = random.Random(seed)
+    words = 'mayor budget vote park'.split()
+    segments = []
+    for _ in range(count):
+        start = rng.randrange(0, 20) * 1000
+        duration = rng.choice([200, 500, 1000, 2000])
+        segments.append({
+            'timecode': '00:00:%02d' % (start // 1000),
+            'text': ' '.join(rng.choice(words) for _ in range(rng.randint(1, 3))),
+            'start_ms': start,
+            'end_ms': start + duration,
+            'duration_ms': duration
+        })
+    return segments
+
+
+@pytest.mark.parametrize('max_count', [0, 1, 5, 10, 500])
+@pytest.mark.parametrize('sensitivity', [0.2, 0.5, 1.0])
+@pytest.mark.parametrize('script', [None, 'mayor budget'])
+def test_rank_matches_baseline(max_count, sensitivity, script):
+    segments = make_segments(200)
+    table = SegmentTable.from_segments(segments)
+    kwargs = {'max_count': max_count, 'sensitivity': sensitivity,
+              'sort_by_relevance': script is not None, 'reference_script': script}
+
+    expected = baseline_up_sots(segments, **kwargs)
+    result = transcription.audio_processor.get_up_sots(table, **kwargs)
+
+    assert [(s['start_ms'], s['text']) for s in result] == [(s['start_ms'], s['text']) for s in expected]
+    if script:
+        assert [s['relevance_score'] for s in result] == [s['relevance_score'] for s in expected]
+
+
+def test_table_is_built_once_per_transcription(client, tmp_path, monkeypatch):
+    audio = tmp_path / 'audio.wav'
+    audio.write_bytes(b'RIFF')
+    session_id = 'segment-table-cache-test'
+    transcription.sessions.save(session_id, {'audio_file': str(audio), 'parameters': {}})
+    segments = make_segments(50)
+    monkeypatch.setattr(transcription.audio_processor, 'transcribe_audio',
+                        lambda path: {'success': True, 'segments': segments, 'full_transcript': ''})
+
+    builds = []
+    from_segments = SegmentTable.from_segments
+    monkeypatch.setattr(SegmentTable, 'from_segments',
+                        classmethod(lambda cls, s: builds.append(len(s)) or from_segments(s)))
+
+    try:
+        assert client.post(f'/api/transcription/transcribe/{session_id}', json={}).status_code == 200
+        for count in (3, 7):
+            response = client.post(f'/api/transcription/set-parameters/{session_id}', json={'up_sots_count': count})
+            assert len(response.json['up_sots']) == count
+        assert builds == [50]
+
+        # A new transcription gets a new table
+        assert client.post(f'/api/transcription/transcribe/{session_id}', json={}).status_code == 200
+        assert builds == [50, 50]
+    finally:
+        transcription.sessions.delete(session_id)
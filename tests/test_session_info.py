@@ -0,0 +1,124 @@
+"""
+Session info projections, revalidation and deltas between versions
+"""
+
+import pytest
+
+from src.routes.api import transcription
+
+SEGMENTS = [
+    {'timecode': '00:00:01', 'text': 'budget vote', 'start_ms': 1000, 'end_ms': 3000, 'duration_ms': 2000},
+    {'timecode': '00:00:04', 'text': 'park water', 'start_ms': 4000, 'end_ms': 7000, 'duration_ms': 3000}
+]
+
+
+def _edit_segment(current):
+    current['status'] = 'transcribed'
+    current['transcription']['segments'][1]['text'] = 'park water plan'
+
+
+def _drop_outputs(current):
+    del current['outputs']
+    current['up_sots'].append(SEGMENTS[0])
+
+
+@pytest.fixture
+def session_id():
+    session_id = 'session-info-test'
+    transcription.sessions.save(session_id, {
+        'timestamp': '2024-05-12T09:30:00',
+        'status': 'uploaded',
+        'parameters': {'up_sots_count': 10},
+        'transcription': {'success': True, 'segments': [dict(segment) for segment in SEGMENTS],
+                          'full_transcript': 'budget vote park water'},
+        'up_sots': [dict(segment) for segment in SEGMENTS],
+        'outputs': {'txt': {'path': '/missing/out.txt', 'filename': 'out.txt'}}
+    })
+    # Version 2 edits a segment, version 3 drops the outputs and adds an up-sot
+    transcription.sessions.update(session_id, _edit_segment)
+    transcription.sessions.update(session_id, _drop_outputs)
+    yield session_id
+    transcription.sessions.delete(session_id)
+
+
+def get_info(client, session_id, **params):
+    response = client.get(f'/api/transcription/session-info/{session_id}', query_string=params)
+    assert response.status_code == 200
+    return response.json['session_info']
+
+
+def test_full_info_leaves_out_segments(client, session_id):
+    info = get_info(client, session_id)
+
+    assert info['version'] == 3
+    assert info['status'] == 'transcribed'
+    assert info['segments_count'] == 2
+    assert info['up_sots_count'] == 3
+    assert 'segments' not in info
+    assert 'available_formats' not in info
+
+
+def test_fields_projection(client, session_id):
+    info = get_info(client, session_id, fields='status, segments')
+
+    assert info == {'session_id': session_id, 'version': 3, 'status': 'transcribed',
+                    'segments': transcription.sessions.get(session_id)['transcription']['segments']}
+
+
+def test_etag_revalidation(client, session_id):
+    url = f'/api/transcription/session-info/{session_id}'
+    response = client.get(url)
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    transcription.sessions.update(session_id, lambda current: current.update(status='done'))
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json['session_info']['status'] == 'done'
+
+
+def test_delta_sends_changed_fields_and_items(client, session_id):
+    info = get_info(client, session_id, since=1)
+
+    assert info['since'] == 1
+    assert info['status'] == 'transcribed'
+    assert 'parameters' not in info
+    assert 'timestamp' not in info
+    assert 'up_sots' not in info
+    assert info['up_sots_count'] == 3
+    assert info['up_sots_changes'] == [{'index': 2, 'item': SEGMENTS[0]}]
+    assert 'segments_changes' not in info
+    assert info['removed_fields'] == ['available_formats']
+
+
+def test_delta_of_segments(client, session_id):
+    info = get_info(client, session_id, since=1, fields='segments,segments_count')
+
+    assert info['segments_count'] == 2
+    assert info['segments_changes'] == [{'index': 1, 'item': dict(SEGMENTS[1], text='park water plan')}]
+    assert get_info(client, session_id, since=2, fields='segments')['segments_changes'] == []
+
+
+def test_tombstone_is_sent_once(client, session_id):
+    assert get_info(client, session_id, since=2)['removed_fields'] == ['available_formats']
+    assert get_info(client, session_id, since=2, fields='available_formats')['removed_fields'] == ['available_formats']
+    assert get_info(client, session_id, since=2, fields='status')['removed_fields'] == []
+
+    info = get_info(client, session_id, since=3)
+    assert info['removed_fields'] == []
+    assert info['up_sots_changes'] == []
+    assert 'status' not in info
+
+
+def test_invalid_requests(client, session_id):
+    response = client.get(f'/api/transcription/session-info/{session_id}?since=latest')
+    assert response.status_code == 400
+
+    response = client.get('/api/transcription/session-info/unknown-session')
+    assert response.status_code == 404
@@ -0,0 +1,59 @@
+"""
+Long-running routes merge their results instead of overwriting the session
+"""
+
+import pytest
+
+from src.routes.api import transcription
+
+SEGMENTS = [
+    {'timecode': '00:00:01', 'text': 'budget vote', 'start_ms': 1000, 'end_ms': 3000, 'duration_ms': 2000},
+    {'timecode': '00:00:04', 'text': 'park water', 'start_ms': 4000, 'end_ms': 7000, 'duration_ms': 3000}
+]
+
+
+@pytest.fixture
+def session_id(tmp_path):
+    audio = tmp_path / 'audio.wav'
+    audio.write_bytes(b'RIFF')
+    session_id = 'session-updates-test'
+    transcription.sessions.save(session_id, {'audio_file': str(audio), 'parameters': {}})
+    yield session_id
+    transcription.sessions.delete(session_id)
+
+
+def test_transcribe_keeps_changes_made_while_it_ran(client, session_id, monkeypatch):
+    def transcribe_audio(path):
+        # Another request and a background render finish meanwhile
+        transcription.sessions.update(session_id, lambda current: current.update(
+            script='budget vote', outputs={'txt': {'path': 'out.txt', 'filename': 'out.txt'}}, pending_outputs=[]
+        ))
+        return {'success': True, 'segments': SEGMENTS, 'full_transcript': 'budget vote park water'}
+
+    monkeypatch.setattr(transcription.audio_processor, 'transcribe_audio', transcribe_audio)
+
+    response = client.post(f'/api/transcription/transcribe/{session_id}', json={})
+    assert response.status_code == 200
+
+    session = transcription.sessions.get(session_id)
+    assert session['script'] == 'budget vote'
+    assert session['outputs'] == {'txt': {'path': 'out.txt', 'filename': 'out.txt'}}
+    assert session['status'] == 'transcribed'
+    assert len(session['up_sots']) == 2
+
+
+def test_set_parameters_merges_with_stored_parameters(client, session_id):
+    transcription.sessions.update(session_id, lambda current: current.update(
+        transcription={'success': True, 'segments': SEGMENTS}, script='kept'
+    ))
+
+    client.post(f'/api/transcription/set-parameters/{session_id}', json={'sensitivity': 0.9})
+    response = client.post(f'/api/transcription/set-parameters/{session_id}', json={'up_sots_count': 1})
+    assert response.status_code == 200
+    assert len(response.json['up_sots']) == 1
+
+    session = transcription.sessions.get(session_id)
+    assert session['parameters']['sensitivity'] == 0.9
+    assert session['parameters']['up_sots_count'] == 1
+    assert session['up_sots'] == response.json['up_sots']
+    assert session['script'] == 'kept'
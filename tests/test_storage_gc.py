@@ -0,0 +1,61 @@
+"""
+Storage collection passes and quota removals
+"""
+
+import os
+import time
+
+from src.models.transcription.storage_gc import StorageCollector
+
+
+def make_files(folder, count, size=100, age=0):
+    paths = []
+    for i in range(count):
+        path = folder / f'file_{i}'
+        path.write_bytes(b'x' * size)
+        mtime = time.time() - age - (count - i)
+        os.utime(path, (mtime, mtime))
+        paths.append(str(path))
+    return paths
+
+
+def finish_one_pass(collector, name):
+    while collector.get_stats()[name]['passes'] < 1:
+        collector.tick()
+
+
+def test_stats_describe_the_last_completed_pass(tmp_path):
+    make_files(tmp_path, 10, age=7200)
+    collector = StorageCollector(io_budget=3)
+    collector.add_folder('temp', str(tmp_path), ttl_seconds=3600)
+
+    collector.collect_all()
+    make_files(tmp_path, 4, size=10, age=7200)
+    collector.tick()
+
+    # The new pass is under way, but the stats still show the finished one
+    stats = collector.get_stats()['temp']
+    assert (stats['last_pass_files'], stats['last_pass_bytes']) == (10, 1000)
+
+    collector.collect_all()
+    stats = collector.get_stats()['temp']
+    assert (stats['last_pass_files'], stats['last_pass_bytes']) == (4, 40)
+
+
+def test_quota_removals_recheck_references(tmp_path):
+    oldest, touched, removable, newest = make_files(tmp_path, 4)
+    referenced = set()
+    collector = StorageCollector(reference_providers=[lambda: referenced], io_budget=1000)
+    collector.add_folder('temp', str(tmp_path), ttl_seconds=3600, max_bytes=100)
+
+    finish_one_pass(collector, 'temp')
+
+    # Changes between the pass and the queued removals
+    referenced.add(oldest)
+    os.utime(touched)
+    collector.tick()
+
+    assert os.path.exists(oldest)
+    assert os.path.exists(touched)
+    assert not os.path.exists(removable)
+    assert os.path.exists(newest)
@@ -0,0 +1,91 @@
+"""
+Transcript parsing for /extract against the regex it replaced
+"""
+
+import random
+import re
+
+import pytest
+
+from src.models.transcription.transcript_parser import parse_transcript
+
+LEGACY_PATTERN = r'(\d{2}:\d{2}:\d{2}|\d{2}:\d{2})\s+(.*?)(?=\s+\d{2}:\d{2}|\s*$)'
+WORDS = 'the mayor budget council at 10 am 123:45 x1'.split()
+
+
+def baseline_segments(transcript):
+    """
+    (timecode, text) pairs as /extract found them before TranscriptParser
+    """
+    return [(match.group(1), match.group(2).strip()) for match in re.finditer(LEGACY_PATTERN, transcript)
+            if match.group(2).strip()]
+
+
+def make_transcript(rng, count, hours):
+    lines = []
+    for i in range(count):
+        seconds = i * rng.randint(1, 9)
+        timecode = (f'{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}' if hours
+                    else f'{seconds // 60 % 60:02d}:{seconds % 60:02d}')
+        lines.append(timecode + ' ' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 8))))
+    return '\n'.join(lines)
+
+
+def split_randomly(rng, text, largest):
+    chunks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, largest)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+@pytest.mark.parametrize('hours', [True, False], ids=['HH:MM:SS', 'MM:SS'])
+def test_segments_match_the_baseline(hours):
+    rng = random.Random(1)
+    for _ in range(100):
+        transcript = make_transcript(rng, rng.randint(0, 40), hours)
+        segments = [(segment['timecode'], segment['text']) for segment in parse_transcript(transcript)]
+        assert segments == baseline_segments(transcript)
+
+
+def test_chunk_boundaries_do_not_change_segments():
+    rng = random.Random(2)
+    for _ in range(100):
+        transcript = make_transcript(rng, rng.randint(0, 40), rng.random() < 0.5)
+        expected = list(parse_transcript(transcript))
+        for largest in (1, 9, 64):
+            assert list(parse_transcript(split_randomly(rng, transcript, largest))) == expected
+
+
+@pytest.mark.parametrize('split_at', range(1, 9))
+def test_timecode_split_across_chunks(split_at):
+    transcript = 'intro 00:01:02 first part\n00:01:10 second'
+    position = transcript.index('00:01:10') + split_at
+    chunks = [transcript[:position], transcript[position:]]
+
+    assert list(parse_transcript(chunks)) == list(parse_transcript(transcript))
+    assert [segment['timecode'] for segment in parse_transcript(chunks)] == ['00:01:02', '00:01:10']
+
+
+def test_mm_ss_and_hh_mm_ss_timing():
+    segments = list(parse_transcript('01:30 short form 01:00:00 long form'))
+
+    assert segments[0] == {'timecode': '01:30', 'text': 'short form', 'start_ms': 90000, 'relevance': 1.0,
+                           'duration_ms': 3510000, 'duration': 3510.0}
+    assert segments[1] == {'timecode': '01:00:00', 'text': 'long form', 'start_ms': 3600000, 'relevance': 1.0}
+
+
+def test_leading_text_and_empty_segments_are_dropped():
+    transcript = 'Interview with the mayor, 12 May\n\n00:01 \n00:04 hello   there\n\tagain 00:10 bye'
+
+    segments = [(segment['timecode'], segment['text']) for segment in parse_transcript(transcript)]
+    assert segments == [('00:04', 'hello there again'), ('00:10', 'bye')]
+    assert list(parse_transcript('no timecodes at all')) == []
+    assert list(parse_transcript('')) == []
+
+
+def test_timecodes_inside_words_do_not_split():
+    segments = [(segment['timecode'], segment['text']) for segment in parse_transcript('00:01 at 123:45 or 10:30am ok')]
+    assert segments == [('00:01', 'at 123:45 or 10:30am ok')]